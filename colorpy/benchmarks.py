@@ -0,0 +1,283 @@
+'''
+benchmarks.py - Timing benchmarks for ColorPy.
+
+Description:
+
+The color calculations in ColorPy (colormodels, ciexyz, illuminants, blackbody,
+reflectance_color, scalarcolors, cct) should import quickly, and without matplotlib or scipy,
+so that programs which only convert colors do not pay for the plotting modules.
+The plotting modules are only imported when a plot is drawn.
+
+Each import is timed in a fresh Python interpreter, since otherwise the
+modules would already be loaded.
+
+Converting a single color (as from a user interface) is mostly overhead with the
+numpy array functions in colormodels, so scalarcolors has functions with plain Python
+floats for this.  The latency benchmarks compare the time per call of the two.
+
+Large arrays of colors and spectra can be converted in float32 rather than float64,
+which halves the memory.  The float type benchmarks compare the time and results of the two.
+The differences are measured as Delta E (the distance in Lab) for colors,
+and in 8 bit display codes for irgb colors.
+
+Run this module as a script to print the benchmarks:
+
+python benchmarks.py
+
+The exit status is nonzero if any of the core modules imports a heavy module.
+
+Constants and Functions:
+
+CORE_MODULES  - Names of the modules that must import without the HEAVY_MODULES.
+HEAVY_MODULES - Names of the (plotting and scientific) packages that should not be imported by the core.
+
+def import_benchmark (module_name, repeat = 5) -
+    Import the module in a fresh interpreter, repeat times.
+    Return (best_seconds, heavy_modules), where best_seconds is the fastest import time,
+    and heavy_modules is a list of any HEAVY_MODULES that the import loaded.
+
+def import_benchmarks (module_names = CORE_MODULES, repeat = 5) -
+    Run import_benchmark() for each module, and return a list of (module_name, best_seconds, heavy_modules).
+
+def print_import_benchmarks (results) -
+    Print the results of import_benchmarks() as a table.
+
+def latency_benchmarks (number = 20000, repeat = 5) -
+    Time the conversion of a single color, with the numpy array functions in colormodels,
+    and with the scalar functions in scalarcolors.  Each call is timed number times, repeat times.
+    Return a list of (conversion_name, array_seconds, scalar_seconds), the best time per call.
+
+def print_latency_benchmarks (results) -
+    Print the results of latency_benchmarks() as a table.
+
+def float_type_benchmarks (num_colors = 1000000, num_spectra = 20000, repeat = 3) -
+    Time the array conversions of random colors and spectra in float64 and in float32,
+    and find the largest difference between the results.
+    Return a list of (conversion_name, float64_seconds, float32_seconds, max_difference, units).
+
+def print_float_type_benchmarks (results) -
+    Print the results of float_type_benchmarks() as a table.
+
+License:
+
+This file is part of ColorPy.
+
+ColorPy is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+ColorPy is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with ColorPy.  If not, see <http://www.gnu.org/licenses/>.
+'''
+from __future__ import print_function
+
+import ast
+import os
+import subprocess
+import sys
+import timeit
+
+CORE_MODULES = [
+    'colorpy.colormodels',
+    'colorpy.ciexyz',
+    'colorpy.illuminants',
+    'colorpy.blackbody',
+    'colorpy.reflectance_color',
+    'colorpy.scalarcolors',
+    'colorpy.cct',
+]
+
+HEAVY_MODULES = [
+    'matplotlib',
+    'pylab',
+    'scipy',
+]
+
+# Run in the child interpreter: time the import, then report the time and any heavy modules.
+_IMPORT_SCRIPT = '''
+import sys, time
+t0 = time.time()
+import %s
+t1 = time.time()
+heavy = [name for name in %r if name in sys.modules]
+print (repr ((t1 - t0, heavy)))
+'''
+
+def _child_environment ():
+    '''Get the environment for the child interpreter, so that it imports this copy of colorpy.'''
+    package_dir = os.path.dirname (os.path.abspath (__file__))
+    parent_dir  = os.path.dirname (package_dir)
+    env = dict (os.environ)
+    path = env.get ('PYTHONPATH')
+    env ['PYTHONPATH'] = parent_dir if not path else parent_dir + os.pathsep + path
+    return env
+
+def import_benchmark (module_name, repeat = 5):
+    '''Import the module in a fresh interpreter, repeat times.
+    Return (best_seconds, heavy_modules), where best_seconds is the fastest import time,
+    and heavy_modules is a list of any HEAVY_MODULES that the import loaded.'''
+    if repeat < 1:
+        raise ValueError ('Invalid number of repeats %s' % str (repeat))
+    script = _IMPORT_SCRIPT % (module_name, HEAVY_MODULES)
+    env = _child_environment()
+    best_seconds = None
+    heavy_modules = []
+    for i in range (0, repeat):
+        output = subprocess.check_output ([sys.executable, '-c', script], env=env)
+        (seconds, heavy) = ast.literal_eval (output.decode().strip().splitlines() [-1])
+        if best_seconds is None or seconds < best_seconds:
+            best_seconds = seconds
+        heavy_modules = heavy
+    return (best_seconds, heavy_modules)
+
+def import_benchmarks (module_names = CORE_MODULES, repeat = 5):
+    '''Run import_benchmark() for each module, and return a list of (module_name, best_seconds, heavy_modules).'''
+    results = []
+    for module_name in module_names:
+        (seconds, heavy) = import_benchmark (module_name, repeat)
+        results.append ((module_name, seconds, heavy))
+    return results
+
+def print_import_benchmarks (results):
+    '''Print the results of import_benchmarks() as a table.'''
+    print ('%-28s %12s   %s' % ('Module', 'Import (ms)', 'Heavy modules loaded'))
+    for (module_name, seconds, heavy) in results:
+        print ('%-28s %12.1f   %s' % (module_name, 1000.0 * seconds, ', '.join (heavy) if heavy else '-'))
+
+def _latency_conversions ():
+    '''Get the list of (conversion_name, array_function, scalar_function), each converting one color.'''
+    import colorpy.colormodels as colormodels
+    import colorpy.scalarcolors as scalarcolors
+    xyz = (0.3, 0.4, 0.2)
+    rgb = (0.2, 0.5, 0.7)
+    irgb = (40, 128, 250)
+    lab = (50.0, 20.0, -30.0)
+    luv = (50.0, 20.0, -30.0)
+    hex_string = '#2880FA'
+    return [
+        ('rgb_from_xyz',
+            lambda: colormodels.rgb_from_xyz (colormodels.xyz_color (*xyz)),
+            lambda: scalarcolors.rgb_from_xyz (xyz)),
+        ('xyz_from_rgb',
+            lambda: colormodels.xyz_from_rgb (colormodels.rgb_color (*rgb)),
+            lambda: scalarcolors.xyz_from_rgb (rgb)),
+        ('irgb_from_rgb',
+            lambda: colormodels.irgb_from_rgb (colormodels.rgb_color (*rgb)),
+            lambda: scalarcolors.irgb_from_rgb (rgb)),
+        ('rgb_from_irgb',
+            lambda: colormodels.rgb_from_irgb (colormodels.irgb_color (*irgb)),
+            lambda: scalarcolors.rgb_from_irgb (irgb)),
+        ('irgb_string_from_xyz',
+            lambda: colormodels.irgb_string_from_xyz (colormodels.xyz_color (*xyz)),
+            lambda: scalarcolors.irgb_string_from_xyz (xyz)),
+        ('irgb_from_irgb_string',
+            lambda: colormodels.irgb_from_irgb_string (hex_string),
+            lambda: scalarcolors.irgb_from_irgb_string (hex_string)),
+        ('lab_from_xyz',
+            lambda: colormodels.lab_from_xyz (colormodels.xyz_color (*xyz)),
+            lambda: scalarcolors.lab_from_xyz (xyz)),
+        ('xyz_from_lab',
+            lambda: colormodels.xyz_from_lab (colormodels.xyz_color (*lab)),
+            lambda: scalarcolors.xyz_from_lab (lab)),
+        ('luv_from_xyz',
+            lambda: colormodels.luv_from_xyz (colormodels.xyz_color (*xyz)),
+            lambda: scalarcolors.luv_from_xyz (xyz)),
+        ('xyz_from_luv',
+            lambda: colormodels.xyz_from_luv (colormodels.xyz_color (*luv)),
+            lambda: scalarcolors.xyz_from_luv (luv)),
+    ]
+
+def latency_benchmarks (number = 20000, repeat = 5):
+    '''Time the conversion of a single color, with the numpy array functions in colormodels,
+    and with the scalar functions in scalarcolors.  Each call is timed number times, repeat times.
+    Return a list of (conversion_name, array_seconds, scalar_seconds), the best time per call.'''
+    if number < 1 or repeat < 1:
+        raise ValueError ('Invalid number of calls %s or repeats %s' % (str (number), str (repeat)))
+    results = []
+    for (name, array_function, scalar_function) in _latency_conversions():
+        array_seconds  = min (timeit.repeat (array_function,  number=number, repeat=repeat)) / number
+        scalar_seconds = min (timeit.repeat (scalar_function, number=number, repeat=repeat)) / number
+        results.append ((name, array_seconds, scalar_seconds))
+    return results
+
+def print_latency_benchmarks (results):
+    '''Print the results of latency_benchmarks() as a table.'''
+    print ('%-28s %12s %12s %9s' % ('Conversion', 'Array (us)', 'Scalar (us)', 'Speedup'))
+    for (name, array_seconds, scalar_seconds) in results:
+        print ('%-28s %12.2f %12.2f %8.1fx' % (name, 1.0e6 * array_seconds, 1.0e6 * scalar_seconds, array_seconds / scalar_seconds))
+
+def _best_time (function, args, repeat):
+    '''Call the function with the args repeat times, and return (best_seconds, result).'''
+    best_seconds = None
+    for i in range (0, repeat):
+        t0 = timeit.default_timer()
+        result = function (*args)
+        seconds = timeit.default_timer() - t0
+        if best_seconds is None or seconds < best_seconds:
+            best_seconds = seconds
+    return (best_seconds, result)
+
+def float_type_benchmarks (num_colors = 1000000, num_spectra = 20000, repeat = 3):
+    '''Time the array conversions of random colors and spectra in float64 and in float32,
+    and find the largest difference between the results.
+    Return a list of (conversion_name, float64_seconds, float32_seconds, max_difference, units).'''
+    import numpy
+    import colorpy.colormodels as colormodels
+    import colorpy.ciexyz as ciexyz
+    if repeat < 1:
+        raise ValueError ('Invalid number of repeats %s' % str (repeat))
+    random = numpy.random.RandomState (42)
+    xyzs = random.uniform (0.0, 1.0, (num_colors, 3))
+    wavelengths = ciexyz.empty_spectrum (numpy.float64) [:,0]
+    spectra = random.uniform (0.0, 0.02, (num_spectra, len (wavelengths)))
+    def delta_E (xyz64, xyz32):
+        lab64 = colormodels.lab_from_xyz (xyz64)
+        lab32 = colormodels.lab_from_xyz (xyz32.astype (numpy.float64))
+        return numpy.max (numpy.sqrt (numpy.sum (numpy.square (lab64 - lab32), axis=-1)))
+    def lab_delta_E (lab64, lab32):
+        # also for Luv colors
+        return numpy.max (numpy.sqrt (numpy.sum (numpy.square (lab64 - lab32), axis=-1)))
+    def code_difference (irgb64, irgb32):
+        return numpy.max (numpy.abs (irgb64.astype (int) - irgb32))
+    conversions = [
+        ('rgb_from_xyz',      colormodels.rgb_from_xyz,  (xyzs,),                 lambda a, b: delta_E (colormodels.xyz_from_rgb (a), colormodels.xyz_from_rgb (b.astype (numpy.float64))), 'Delta E'),
+        ('lab_from_xyz',      colormodels.lab_from_xyz,  (xyzs,),                 lab_delta_E,     'Delta E'),
+        ('luv_from_xyz',      colormodels.luv_from_xyz,  (xyzs,),                 lab_delta_E,     'Delta E (Luv)'),
+        ('clip_rgb_colors',   lambda rgb: colormodels.clip_rgb_colors (rgb) [0], (xyzs,), code_difference, 'codes'),
+        ('xyz_from_spectra',  lambda s: ciexyz.xyz_from_spectra (wavelengths, s), (spectra,), delta_E, 'Delta E'),
+        ('irgb_from_spectra', lambda s: ciexyz.irgb_from_spectra (wavelengths, s), (spectra,), code_difference, 'codes'),
+    ]
+    results = []
+    for (name, function, args, difference, units) in conversions:
+        (seconds_64, result_64) = _best_time (function, args, repeat)
+        args_32 = tuple (arg.astype (numpy.float32) for arg in args)
+        (seconds_32, result_32) = _best_time (function, args_32, repeat)
+        results.append ((name, seconds_64, seconds_32, float (difference (result_64, result_32)), units))
+    return results
+
+def print_float_type_benchmarks (results):
+    '''Print the results of float_type_benchmarks() as a table.'''
+    print ('%-28s %12s %12s %9s   %s' % ('Conversion', 'float64 (ms)', 'float32 (ms)', 'Speedup', 'Max difference'))
+    for (name, seconds_64, seconds_32, difference, units) in results:
+        print ('%-28s %12.1f %12.1f %8.1fx %9.2g %s' % (name, 1000.0 * seconds_64, 1000.0 * seconds_32, seconds_64 / seconds_32, difference, units))
+
+def main ():
+    '''Print the import, latency and float type benchmarks, and return a nonzero status if the core imports heavy modules.'''
+    results = import_benchmarks()
+    print_import_benchmarks (results)
+    print ('')
+    print_latency_benchmarks (latency_benchmarks())
+    print ('')
+    print_float_type_benchmarks (float_type_benchmarks())
+    ok = all (len (heavy) == 0 for (module_name, seconds, heavy) in results)
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit (main())
@@ -7,6 +7,10 @@ Calculate the spectrum of a thermal blackbody at an arbitrary temperature.
 
 Constants:
 
+MAX_EXPONENT      - Blackbody intensities with an exponent (hc / lambda kT) above this are returned as zero.
+LOCUS_MIN_T       - Lowest temperature in the Planckian locus table, in K
+LOCUS_MAX_T       - Highest temperature in the Planckian locus table, in K
+LOCUS_TABLE_SIZE  - Default number of rows in the Planckian locus table
 PLANCK_CONSTANT   - Planck's constant, in J-sec
 SPEED_OF_LIGHT    - Speed of light, in m/sec
 BOLTZMAN_CONSTANT - Boltzman's constant, in J/K
@@ -20,12 +24,79 @@ blackbody_specific_intensity (wl_nm, T_K) -
         T_K   = temperature [K]
     This is the energy radiated per second per unit wavelength per unit solid angle.
     Reference - Shu, eq. 4.6, p. 78.
+    wl_nm and T_K may also be arrays, which are broadcast together.
 
-blackbody_spectrum (T_K) -
+blackbody_spectrum (T_K, dtype = None) -
     Get the spectrum of a blackbody, as a numpy array.
-
-blackbody_color (T_K) -
+    dtype is the float type, by default that of colormodels.init_float_type().
+
+blackbody_spectra (T_K, wl_nm = None, dtype = None) -
+    Get the spectra of blackbodies at many temperatures, as an array of intensities,
+    with shape T_K.shape + (W,) for the W wavelengths wl_nm [nm], which are
+    by default those of ciexyz.empty_spectrum().  The intensities are scaled as
+    in blackbody_spectrum(), so for a 1D array of temperatures, row i is the
+    intensity column of blackbody_spectrum (T_K [i]).
+
+blackbody_band_intensity (start_wl_nm, end_wl_nm, T_K) -
+    Get the specific intensity of a blackbody integrated over the band of wavelengths -
+        start_wl_nm = shortest wavelength [nm]
+        end_wl_nm   = longest wavelength [nm]
+        T_K         = temperature [K]
+    This is the energy radiated per second per unit solid angle, between the wavelengths.
+    It is calculated exactly (to double precision), with the series for the integral
+    of the Planck function, rather than by sampling the specific intensity.
+    Over all wavelengths (0 to infinity), this is sigma T^4 / pi (the Stefan-Boltzman law).
+    The arguments may also be arrays, which are broadcast together.
+
+blackbody_band_spectra (T_K, wl_nm = None, dtype = None) -
+    Get the spectra of blackbodies at many temperatures, as an array of intensities,
+    with shape T_K.shape + (W,), for the bands centered on the W wavelengths wl_nm [nm]
+    (by default those of ciexyz.empty_spectrum()).  The bands extend halfway to the
+    neighboring wavelengths.  Each intensity is the exact average of the specific intensity
+    over the band, scaled as in blackbody_spectrum(), so the intensities times the band
+    widths [nm] are the energy in each band, for any spacing of the wavelengths.
+    Note that the colors of coarsely sampled spectra are limited by the sampling of the
+    matching functions, so that band averages do not give more accurate colors than
+    blackbody_spectra() at the band centers (at 10 nm spacing, both are within about 2e-4
+    in chromaticity).  The band averages are for the total intensities, or to match
+    other band averaged data (e.g. spectrophotometer reflectances).
+
+blackbody_color (T_K, exact = False) -
     Given a temperature (K), return the xyz color of a thermal blackbody.
+    Unless exact is True, the color is interpolated in the Planckian locus table
+    (see below), for temperatures within its range.
+
+blackbody_colors (T_K, dtype = None, exact = False) -
+    Given an array of temperatures (K), return the xyz colors of thermal blackbodies,
+    with shape T_K.shape + (3,).  This is the same as blackbody_color() for each temperature.
+    With exact = True (or for temperatures outside the range of the locus table),
+    the spectra are converted with a single matrix product
+    (a chunk of temperatures at a time, to limit the memory used).
+
+Planckian locus table:
+
+Calculating a blackbody color exactly means building and integrating a spectrum
+of 471 wavelengths.  For many temperatures (e.g. a star catalogue), this is much
+slower than interpolating in a table of the colors along the Planckian locus.
+
+The table has LOCUS_TABLE_SIZE rows, for temperatures from LOCUS_MIN_T to LOCUS_MAX_T,
+equally spaced in reciprocal temperature (1.0e6 / T_K, in mireds), along which
+the chromaticity changes smoothly.  Each row holds the chromaticity (x, y) and
+the logarithm of the luminance Y per unit display intensity, divided by the temperature
+(which is nearly linear in reciprocal temperature, at both high and low temperatures).
+These are interpolated linearly.  With the default size of 4096 rows, the largest error
+in the chromaticity x or y is 1.2e-7, and the largest relative error in Y is 2e-6.
+The table does not depend on the display intensity in ciexyz.init(), so it remains valid
+when that changes.
+
+init_locus_table (size = LOCUS_TABLE_SIZE, filename = None) -
+    Build the locus table, with size rows, and use it for later lookups.
+    If filename (a .npy file) is given, the table is loaded from that file if it exists
+    (and was saved by this version of ColorPy), otherwise it is built and saved there.
+    Without this, the default table is built when it is first needed.
+
+save_locus_table (filename) -
+    Save the locus table (building it first if needed) as a .npy file.
 
 Plots:
 
@@ -67,13 +138,14 @@ GNU Lesser General Public License for more details.
 You should have received a copy of the GNU Lesser General Public License
 along with ColorPy.  If not, see <http://www.gnu.org/licenses/>.
 '''
-import math
+import math, os
 import numpy
-import pylab
 
 import colorpy.colormodels as colormodels
 import colorpy.ciexyz as ciexyz
-import colorpy.plots as plots
+
+# The plotting modules (plots, and through it matplotlib) are only imported
+# by the figure functions, so that the color calculations do not need them.
 
 # Physical constants in mks units
 PLANCK_CONSTANT   = 6.6237e-34      # J-sec
@@ -81,41 +153,363 @@ SPEED_OF_LIGHT    = 2.997925e+08    # m/sec
 BOLTZMAN_CONSTANT = 1.3802e-23      # J/K
 SUN_TEMPERATURE   = 5778.0          # K
 
+# Exponents larger than this give (nearly) zero intensity, which is returned as exactly zero.
+MAX_EXPONENT = 500.0
+
+def _specific_intensity (wl_nm, T_K):
+    '''Get the blackbody specific intensity, for float64 arrays wl_nm and T_K, which are broadcast together.'''
+    # precalculations that could be made global
+    a = (PLANCK_CONSTANT * SPEED_OF_LIGHT) / (BOLTZMAN_CONSTANT)
+    b = (2.0 * PLANCK_CONSTANT * SPEED_OF_LIGHT * SPEED_OF_LIGHT)
+    wl_m = wl_nm * 1.0e-9
+    with numpy.errstate (divide='ignore', invalid='ignore'):
+        exponent = a / (wl_m * T_K)
+        # Very large exponents (including infinite ones, from zero wavelength or temperature)
+        # result in nearly zero intensity.  Avoid the numeric troubles (overflow in the exponential)
+        # by limiting the exponent, and return zero intensity for these.
+        visible = (exponent <= MAX_EXPONENT)
+        specific_intensity = b / (numpy.power (wl_m, 5) * numpy.expm1 (numpy.minimum (exponent, MAX_EXPONENT)))
+    return numpy.where (visible, specific_intensity, 0.0)
+
 def blackbody_specific_intensity (wl_nm, T_K):
     '''Get the monochromatic specific intensity for a blackbody -
         wl_nm = wavelength [nm]
         T_K   = temperature [K]
     This is the energy radiated per second per unit wavelength per unit solid angle.
-    Reference - Shu, eq. 4.6, p. 78.'''
-    # precalculations that could be made global
-    a = (PLANCK_CONSTANT * SPEED_OF_LIGHT) / (BOLTZMAN_CONSTANT)
-    b = (2.0 * PLANCK_CONSTANT * SPEED_OF_LIGHT * SPEED_OF_LIGHT)
-    wl_m = wl_nm * 1.0e-9
-    inv_exponent = (wl_m * T_K) / a
-    # Very large exponents (small inv_exponent) result in nearly zero intensity.
-    # Avoid the numeric troubles in this case and return zero intensity.
-    if inv_exponent < 1.0 / 500.0:
-        return 0.0
-    exponent = 1.0 / inv_exponent
-    specific_intensity = b / (math.pow (wl_m, 5) * (math.exp (exponent) - 1.0))
+    Reference - Shu, eq. 4.6, p. 78.
+    wl_nm and T_K may also be arrays, which are broadcast together.'''
+    specific_intensity = _specific_intensity (numpy.asarray (wl_nm, dtype=float), numpy.asarray (T_K, dtype=float))
+    if specific_intensity.ndim == 0:
+        return float (specific_intensity)
     return specific_intensity
 
-def blackbody_spectrum (T_K):
-    '''Get the spectrum of a blackbody, as a numpy array.'''
-    spectrum = ciexyz.empty_spectrum()
-    num_wl = spectrum.shape[0]
-    for i in range (0, num_wl):
-        # Intensity per unit wavelength.
-        specific_intensity = blackbody_specific_intensity (spectrum [i][0], T_K)
-        # Scale by size of wavelength interval.
-        spectrum [i][1] = specific_intensity * ciexyz.delta_wl_nm * 1.0e-9
+def blackbody_spectrum (T_K, dtype = None):
+    '''Get the spectrum of a blackbody, as a numpy array, of the float type dtype.'''
+    spectrum = ciexyz.empty_spectrum (dtype)
+    # Intensity per unit wavelength, scaled by size of wavelength interval.
+    spectrum [:,1] = _specific_intensity (spectrum [:,0].astype (float), float (T_K)) * (ciexyz.delta_wl_nm * 1.0e-9)
     return spectrum
 
-def blackbody_color (T_K):
-    '''Given a temperature (K), return the xyz color of a thermal blackbody.'''
-    spectrum = blackbody_spectrum (T_K)
-    xyz = ciexyz.xyz_from_spectrum (spectrum)
-    return xyz
+def blackbody_spectra (T_K, wl_nm = None, dtype = None):
+    '''Get the spectra of blackbodies at many temperatures, as an array of intensities,
+    with shape T_K.shape + (W,) for the W wavelengths wl_nm [nm], which are
+    by default those of ciexyz.empty_spectrum().  The intensities are scaled as
+    in blackbody_spectrum(), so for a 1D array of temperatures, row i is the
+    intensity column of blackbody_spectrum (T_K [i]).
+    dtype is the float type, by default that of colormodels.init_float_type().'''
+    T_K = numpy.asarray (T_K, dtype=float)
+    if wl_nm is None:
+        wl_nm = ciexyz.empty_spectrum (numpy.float64) [:,0]
+    wl_nm = numpy.asarray (wl_nm, dtype=float)
+    assert wl_nm.ndim == 1, 'Expecting 1D array of wavelengths [nm]'
+    intensities = _specific_intensity (wl_nm, T_K [..., numpy.newaxis])
+    intensities *= (ciexyz.delta_wl_nm * 1.0e-9)
+    return intensities.astype (colormodels.get_float_type (None, dtype), copy=False)
+
+#
+# Band-integrated intensities
+#
+# The integral of the specific intensity over wavelength, with x = hc / (lambda k T), is
+#     integral (lambda1 .. lambda2) = (2 k^4 T^4 / h^3 c^2) * integral (x2 .. x1) t^3 / (exp (t) - 1) dt
+# The integral of t^3 / (exp (t) - 1) from 0 to x is found with two series:
+#     For small x, the series (with the Bernoulli numbers B_n) -
+#         sum (n >= 0) B_n x^(n+3) / (n! (n+3))
+#     which converges for x < 2 pi.
+#     For large x, the integral from x to infinity, which is pi^4/15 minus this, is -
+#         sum (n >= 1) exp (-n x) (x^3/n + 3 x^2/n^2 + 6 x/n^3 + 6/n^4)
+# The difference between the two ends of a band is taken with whichever of the two
+# integrals is small, so that precision is not lost for very narrow or very dim bands.
+
+# Below this, the small x series is used, otherwise the large x series.
+_BAND_SERIES_SWITCH = 2.0
+
+# Number of terms of the large x series.  For x >= 2, the terms after this are below 1e-17 of the sum.
+_BAND_SERIES_TERMS = 20
+
+# Integral of t^3 / (exp (t) - 1) from 0 to infinity.
+_BAND_TOTAL = math.pi ** 4 / 15.0
+
+def _small_x_coefficients ():
+    '''Get the coefficients B_n / (n! (n+3)) of the small x series, for n = 0, 1, and even n = 2 to 30.
+    For x < 2, the terms after these are below 1e-16 of the sum.'''
+    # Bernoulli numbers B_n, for n = 0, 1, 2, 4, ... 30 (the other odd ones are zero)
+    bernoulli = [1.0, -0.5, 1.0/6.0, -1.0/30.0, 1.0/42.0, -1.0/30.0, 5.0/66.0,
+        -691.0/2730.0, 7.0/6.0, -3617.0/510.0, 43867.0/798.0, -174611.0/330.0,
+        854513.0/138.0, -236364091.0/2730.0, 8553103.0/6.0, -23749461029.0/870.0, 8615841276005.0/14322.0]
+    orders = [0, 1] + list (range (2, 32, 2))
+    return [B_n / (math.factorial (n) * (n + 3)) for (n, B_n) in zip (orders, bernoulli)]
+
+_SMALL_X_COEFFICIENTS = _small_x_coefficients()
+
+def _planck_integrals (x):
+    '''Get the integrals of t^3 / (exp (t) - 1), from 0 to x and from x to infinity, for a float64 array x >= 0.
+    Returns (lower, upper), arrays of the shape of x.'''
+    small = (x < _BAND_SERIES_SWITCH)
+    # small x series, as x^3 (c_0 + c_1 x + x^2 P (x^2)), with P evaluated by Horner's rule.
+    # Large x are replaced, so that they do not overflow.
+    xs = numpy.where (small, x, 0.0)
+    xs2 = xs * xs
+    poly = numpy.full_like (xs, _SMALL_X_COEFFICIENTS [-1])
+    for c_n in _SMALL_X_COEFFICIENTS [-2:1:-1]:
+        poly *= xs2
+        poly += c_n
+    lower_small = xs2 * xs * (_SMALL_X_COEFFICIENTS [0] + _SMALL_X_COEFFICIENTS [1] * xs + xs2 * poly)
+    # large x series, with zero for very large x (including infinity)
+    xl = numpy.where (small, _BAND_SERIES_SWITCH, numpy.minimum (x, MAX_EXPONENT))
+    exp_x = numpy.exp (-xl)
+    exp_nx = exp_x.copy()
+    upper_large = numpy.zeros_like (xl)
+    for n in range (1, _BAND_SERIES_TERMS + 1):
+        upper_large += exp_nx * (((xl / n + 3.0 / (n * n)) * xl + 6.0 / (n * n * n)) * xl + 6.0 / (n * n * n * n))
+        exp_nx *= exp_x
+    upper_large = numpy.where (x <= MAX_EXPONENT, upper_large, 0.0)
+    lower = numpy.where (small, lower_small, _BAND_TOTAL - upper_large)
+    upper = numpy.where (small, _BAND_TOTAL - lower_small, upper_large)
+    return (lower, upper)
+
+def _planck_x (wl_nm, T_K):
+    '''Get x = hc / (lambda k T), for float64 arrays wl_nm and T_K, which are broadcast together.
+    Zero wavelengths or temperatures give infinite x.'''
+    a = (PLANCK_CONSTANT * SPEED_OF_LIGHT) / (BOLTZMAN_CONSTANT)
+    with numpy.errstate (divide='ignore', invalid='ignore'):
+        x = a / (wl_nm * 1.0e-9 * T_K)
+    return numpy.where (numpy.isnan (x), numpy.inf, x)
+
+def _band_integral (x_start, start_integrals, end_integrals):
+    '''Get the integral of t^3 / (exp (t) - 1) between the ends of the bands, from the
+    results of _planck_integrals() at each end.  x_start (the larger x) selects which to use.'''
+    (lower_start, upper_start) = start_integrals
+    (lower_end,   upper_end)   = end_integrals
+    return numpy.where (x_start < _BAND_SERIES_SWITCH, lower_start - lower_end, upper_end - upper_start)
+
+def _band_scale (T_K):
+    '''Get the factor (2 k^4 T^4 / h^3 c^2) of the band integrals.'''
+    c = (2.0 * BOLTZMAN_CONSTANT ** 4) / (PLANCK_CONSTANT ** 3 * SPEED_OF_LIGHT ** 2)
+    return c * numpy.power (T_K, 4)
+
+def _band_intensity (start_wl_nm, end_wl_nm, T_K):
+    '''Get the integral of the specific intensity over the band, for float64 arrays, which are broadcast together.'''
+    x_start = _planck_x (start_wl_nm, T_K)
+    x_end   = _planck_x (end_wl_nm,   T_K)
+    integral = _band_integral (x_start, _planck_integrals (x_start), _planck_integrals (x_end))
+    return _band_scale (T_K) * integral
+
+def blackbody_band_intensity (start_wl_nm, end_wl_nm, T_K):
+    '''Get the specific intensity of a blackbody integrated over the band of wavelengths -
+        start_wl_nm = shortest wavelength [nm]
+        end_wl_nm   = longest wavelength [nm]
+        T_K         = temperature [K]
+    This is the energy radiated per second per unit solid angle, between the wavelengths.
+    Over all wavelengths (0 to infinity), this is sigma T^4 / pi (the Stefan-Boltzman law).
+    The arguments may also be arrays, which are broadcast together.'''
+    intensity = _band_intensity (
+        numpy.asarray (start_wl_nm, dtype=float),
+        numpy.asarray (end_wl_nm,   dtype=float),
+        numpy.asarray (T_K,         dtype=float))
+    if intensity.ndim == 0:
+        return float (intensity)
+    return intensity
+
+def _band_edges (wl_nm):
+    '''Get the edges of the bands centered on the wavelengths [nm], a 1D float64 array in increasing order.
+    The edges are halfway between the wavelengths, and the first and last bands are symmetric.'''
+    if len (wl_nm) < 2 or numpy.any (numpy.diff (wl_nm) <= 0.0):
+        raise ValueError('Band integration requires at least two wavelengths, in increasing order')
+    midpoints = 0.5 * (wl_nm [1:] + wl_nm [:-1])
+    first = wl_nm [0]  - (midpoints [0]  - wl_nm [0])
+    last  = wl_nm [-1] + (wl_nm [-1] - midpoints [-1])
+    return numpy.concatenate ([[max (first, 0.0)], midpoints, [last]])
+
+def blackbody_band_spectra (T_K, wl_nm = None, dtype = None):
+    '''Get the spectra of blackbodies at many temperatures, as an array of intensities,
+    with shape T_K.shape + (W,), for the bands centered on the W wavelengths wl_nm [nm].
+    Each intensity is the exact average of the specific intensity over the band,
+    scaled as in blackbody_spectrum().'''
+    T_K = numpy.asarray (T_K, dtype=float)
+    if wl_nm is None:
+        wl_nm = ciexyz.empty_spectrum (numpy.float64) [:,0]
+    wl_nm = numpy.asarray (wl_nm, dtype=float)
+    assert wl_nm.ndim == 1, 'Expecting 1D array of wavelengths [nm]'
+    edges = _band_edges (wl_nm)
+    # the integrals at each edge are shared by the bands on either side
+    x = _planck_x (edges, T_K [..., numpy.newaxis])
+    (lower, upper) = _planck_integrals (x)
+    intensities = _band_integral (x [..., :-1], (lower [..., :-1], upper [..., :-1]), (lower [..., 1:], upper [..., 1:]))
+    intensities *= _band_scale (T_K) [..., numpy.newaxis]
+    # average over each band, per unit wavelength, scaled by size of wavelength interval
+    intensities *= (ciexyz.delta_wl_nm / numpy.diff (edges))
+    return intensities.astype (colormodels.get_float_type (None, dtype), copy=False)
+
+def blackbody_color (T_K, exact = False):
+    '''Given a temperature (K), return the xyz color of a thermal blackbody.
+    Unless exact is True, the color is interpolated in the Planckian locus table.'''
+    if exact or not (LOCUS_MIN_T <= T_K <= LOCUS_MAX_T):
+        spectrum = blackbody_spectrum (T_K)
+        xyz = ciexyz.xyz_from_spectrum (spectrum)
+        return xyz
+    return _locus_color (float (T_K))
+
+# Number of temperatures converted at once by blackbody_colors(), so that the spectra are small.
+BLACKBODY_COLORS_CHUNK_SIZE = 4096
+
+def _exact_colors (T_K, float_type):
+    '''Get the xyz colors of blackbodies at the temperatures T_K (a float64 array), from their spectra.'''
+    wl_nm = ciexyz.empty_spectrum (numpy.float64) [:,0]
+    kernel = ciexyz.integration_kernel (wl_nm, dtype=float_type)
+    flat_T = T_K.reshape (-1)
+    xyzs = numpy.empty ((len (flat_T), 3), float_type)
+    for start in range (0, len (flat_T), BLACKBODY_COLORS_CHUNK_SIZE):
+        stop = min (start + BLACKBODY_COLORS_CHUNK_SIZE, len (flat_T))
+        spectra = blackbody_spectra (flat_T [start:stop], wl_nm, float_type)
+        numpy.matmul (spectra, kernel, out=xyzs [start:stop])
+    return xyzs.reshape (T_K.shape + (3,))
+
+def blackbody_colors (T_K, dtype = None, exact = False):
+    '''Given an array of temperatures (K), return the xyz colors of thermal blackbodies,
+    with shape T_K.shape + (3,).  This is the same as blackbody_color() for each temperature.
+    With exact = True (or for temperatures outside the range of the locus table),
+    the spectra are converted with a single matrix product
+    (a chunk of temperatures at a time, to limit the memory used).
+    dtype is the float type, by default that of colormodels.init_float_type().'''
+    T_K = numpy.asarray (T_K, dtype=float)
+    float_type = colormodels.get_float_type (None, dtype)
+    if exact:
+        return _exact_colors (T_K, float_type)
+    # NaN temperatures are not in the table either
+    in_table = (T_K >= LOCUS_MIN_T) & (T_K <= LOCUS_MAX_T)
+    if numpy.all (in_table):
+        return _locus_colors (T_K).astype (float_type, copy=False)
+    xyzs = numpy.empty (T_K.shape + (3,), float_type)
+    xyzs [in_table] = _locus_colors (T_K [in_table])
+    outside = numpy.logical_not (in_table)
+    xyzs [outside] = _exact_colors (T_K [outside], float_type)
+    return xyzs
+
+#
+# Planckian locus table
+#
+
+LOCUS_MIN_T      = 500.0
+LOCUS_MAX_T      = 1.0e6
+LOCUS_TABLE_SIZE = 4096
+
+# Change this if the way the table is calculated changes, so that old files are not used.
+LOCUS_TABLE_VERSION = 1
+
+# The table, as a single record (as saved in a .npy file), or None until it is needed.
+# The rows are equally spaced in mireds, from 1.0e6 / max_T to 1.0e6 / min_T.
+# log_Y is log (Y * display_intensity / T_K), which is independent of the display intensity.
+_locus_table = None
+
+def _locus_record_type (size):
+    '''Get the numpy type of the locus table record with size rows.'''
+    return numpy.dtype ([
+        ('version', int),
+        ('min_T',   float),
+        ('max_T',   float),
+        ('xy',      float, (size, 2)),
+        ('log_Y',   float, (size,))])
+
+def _build_locus_table (size):
+    '''Calculate the locus table with size rows, from the exact colors.'''
+    if size < 2:
+        raise ValueError('Invalid locus table size %s' % str (size))
+    mireds = numpy.linspace (1.0e6 / LOCUS_MAX_T, 1.0e6 / LOCUS_MIN_T, size)
+    T_K = 1.0e6 / mireds
+    xyzs = _exact_colors (T_K, numpy.dtype (numpy.float64))
+    table = numpy.zeros ((), _locus_record_type (size))
+    table ['version'] = LOCUS_TABLE_VERSION
+    table ['min_T']   = LOCUS_MIN_T
+    table ['max_T']   = LOCUS_MAX_T
+    table ['xy']      = xyzs [:, 0:2] / numpy.sum (xyzs, axis=-1) [:, numpy.newaxis]
+    table ['log_Y']   = numpy.log (xyzs [:, 1] * ciexyz.get_display_intensity() / T_K)
+    return table
+
+def _load_locus_table (filename):
+    '''Load the locus table from a .npy file, or return None if it was saved by a different version.'''
+    table = numpy.load (filename)
+    if table.dtype.names is None or 'version' not in table.dtype.names:
+        raise ValueError('Invalid locus table file %s' % str (filename))
+    if table ['version'] != LOCUS_TABLE_VERSION:
+        return None
+    return table
+
+def _check_filename (filename):
+    '''Raise a ValueError if the locus table file is not a .npy file.'''
+    if os.path.splitext (filename) [1].lower() != '.npy':
+        raise ValueError('Invalid locus table file %s, expecting .npy' % str (filename))
+
+def init_locus_table (size = LOCUS_TABLE_SIZE, filename = None):
+    '''Build the locus table, with size rows, and use it for later lookups.
+    If filename (a .npy file) is given, the table is loaded from that file if it exists
+    (and was saved by this version of ColorPy), otherwise it is built and saved there.'''
+    global _locus_table
+    table = None
+    if filename is not None:
+        _check_filename (filename)
+        if os.path.exists (filename):
+            table = _load_locus_table (filename)
+    if table is None:
+        table = _build_locus_table (size)
+        if filename is not None:
+            numpy.save (filename, table)
+    _locus_table = table
+
+def _get_locus_table ():
+    '''Get the locus table, building the default one if needed.'''
+    if _locus_table is None:
+        init_locus_table()
+    return _locus_table
+
+def save_locus_table (filename):
+    '''Save the locus table (building it first if needed) as a .npy file.'''
+    _check_filename (filename)
+    numpy.save (filename, _get_locus_table())
+
+def _locus_color (T_K):
+    '''Interpolate the xyz color of a blackbody at the temperature T_K
+    (a float, within the range of the table) in the locus table.
+    This is the same as _locus_colors(), with Python floats, which is faster for one color.'''
+    table = _get_locus_table()
+    xy    = table ['xy']
+    log_Y = table ['log_Y']
+    size  = len (log_Y)
+    min_mired = 1.0e6 / float (table ['max_T'])
+    max_mired = 1.0e6 / float (table ['min_T'])
+    position = (1.0e6 / T_K - min_mired) * ((size - 1) / (max_mired - min_mired))
+    row = min (max (int (position), 0), size - 2)
+    fraction = position - row
+    (x0, y0) = xy [row].tolist()
+    (x1, y1) = xy [row + 1].tolist()
+    x = x0 + fraction * (x1 - x0)
+    y = y0 + fraction * (y1 - y0)
+    Y = math.exp (float (log_Y [row]) + fraction * float (log_Y [row + 1] - log_Y [row]))
+    Y *= T_K / ciexyz.get_display_intensity()
+    return colormodels.xyz_color (x * Y / y, Y, (1.0 - x - y) * Y / y)
+
+def _locus_colors (T_K):
+    '''Interpolate the xyz colors of blackbodies at the temperatures T_K
+    (a float64 array, within the range of the table) in the locus table.'''
+    table = _get_locus_table()
+    xy    = table ['xy']
+    log_Y = table ['log_Y']
+    size  = len (log_Y)
+    min_mired = 1.0e6 / table ['max_T']
+    max_mired = 1.0e6 / table ['min_T']
+    position = (1.0e6 / T_K - min_mired) * ((size - 1) / (max_mired - min_mired))
+    # row below each temperature, and the fraction of the way to the next row
+    rows = numpy.clip (position.astype (numpy.intp), 0, size - 2)
+    fraction = position - rows
+    x = xy [rows, 0] + fraction * (xy [rows + 1, 0] - xy [rows, 0])
+    y = xy [rows, 1] + fraction * (xy [rows + 1, 1] - xy [rows, 1])
+    Y = numpy.exp (log_Y [rows] + fraction * (log_Y [rows + 1] - log_Y [rows]))
+    Y *= T_K / ciexyz.get_display_intensity()
+    xyzs = numpy.empty (T_K.shape + (3,))
+    Y_over_y = Y / y
+    xyzs [..., 0] = x * Y_over_y
+    xyzs [..., 1] = Y
+    xyzs [..., 2] = (1.0 - x - y) * Y_over_y
+    return xyzs
 
 #
 # Figures
@@ -123,23 +517,20 @@ def blackbody_color (T_K):
 
 def blackbody_patch_plot (T_list, title, filename):
     '''Draw a patch plot of blackbody colors for the given temperature range.'''
-    xyz_colors = []
+    import colorpy.plots as plots
+    xyz_colors = list (blackbody_colors (T_list))
     color_names = []
     for Ti in T_list:
-        xyz = blackbody_color (Ti)
-        xyz_colors.append (xyz)
         name = '%g K' % (Ti)
         color_names.append (name)
     plots.xyz_patch_plot (xyz_colors, color_names, title, filename)
 
 def blackbody_color_vs_temperature_plot (T_list, title, filename):
     '''Draw a color vs temperature plot for the given temperature range.'''
-    num_T = len (T_list)
-    rgb_list = numpy.empty ((num_T, 3))
-    for i in range (0, num_T):
-        T_i = T_list [i]
-        xyz = blackbody_color (T_i)
-        rgb_list [i] = colormodels.rgb_from_xyz (xyz)
+    import pylab
+    import colorpy.plots as plots
+    xyz_list = blackbody_colors (T_list)
+    rgb_list = colormodels.rgb_from_xyz (xyz_list)
     # Note that b and g become negative for low T.
     # MatPlotLib skips those on the semilog plot.
     plots.color_vs_param_plot (
@@ -154,6 +545,7 @@ def blackbody_color_vs_temperature_plot (T_list, title, filename):
 
 def blackbody_spectrum_plot (T_K):
     '''Draw the spectrum of a blackbody at the given temperature.'''
+    import colorpy.plots as plots
     spectrum = blackbody_spectrum (T_K)
     title    = 'Blackbody Spectrum - T %d K' % (round (T_K))
     filename = 'BlackbodySpectrum-%dK' % (round (T_K))
@@ -169,6 +561,7 @@ def blackbody_spectrum_plot (T_K):
 
 def figures ():
     '''Create some blackbody plots.'''
+    import colorpy.plots as plots
     # Some patch plots.
     T_norm = plots.log_interpolate ( 1200.0, 20000.0, 48)
     T_hot  = plots.log_interpolate (10000.0, 40000.0, 24)
@@ -34,6 +34,33 @@ Neither is perfect, so perhaps try each, and see what works best for your applic
 The models store color values as 3-element NumPy vectors.
 The values are stored as floats, except for irgb, which are stored as integers.
 
+Float types:
+
+Colors and spectra are float64 by default, but can also be float32, which halves the
+memory (and memory traffic) for large images and hyperspectral data.  The conversions
+keep the type of float32 or float64 array arguments, so that a float32 calculation stays
+float32 from end to end.  Otherwise (for lists, integers, and the constructors below),
+the default type is used, which init_float_type() can change.  Most functions also
+take a dtype argument, to choose the result type for that call.
+
+The float32 results are accurate to about 1.0e-7 relative, much more than enough for
+displayed colors.  For a million random colors, the float32 conversions from xyz to rgb and Lab
+are 2-2.5 times faster than float64, and differ by at most about 5.0e-4 Delta E (far below
+the 1.0 that is just noticeable).  8 bit irgb colors from float32 colors are the same as
+from float64, except for about one color in 100000, which differs by one code (when the
+value is very close to a rounding boundary).  Spectra are converted 2-2.5 times faster
+in float32.  benchmarks.py measures these.
+
+DEFAULT_FLOAT_TYPE = numpy.float64
+
+init_float_type (dtype = DEFAULT_FLOAT_TYPE) -
+    Set the default float type, numpy.float64 or numpy.float32.
+
+get_float_type (values = None, dtype = None) -
+    Get the float type for a result computed from values: dtype, if supplied,
+    otherwise the type of values, if they are a float32 or float64 array,
+    otherwise the default float type.
+
 Constants:
 
 SRGB_Red
@@ -57,7 +84,10 @@ Functions:
 
 'Constructor-like' functions:
 
-xyz_color (x, y, z = None) -
+    The constructors below also take a dtype argument, the float type of the result,
+    by default the default float type.
+
+xyz_color (x, y, z = None, dtype = None) -
     Construct an xyz color.  If z is omitted, set it so that x+y+z = 1.0.
 
 xyz_normalize (xyz) -
@@ -68,40 +98,59 @@ xyz_normalize_Y1 (xyz) -
     Scale so that the y component is 1.0.
     This both modifies the passed argument and returns the normalized result.
 
-xyz_color_from_xyY (x, y, Y) -
+xyz_color_from_xyY (x, y, Y, dtype = None) -
     Given the 'little' x,y chromaticity, and the intensity Y,
     construct an xyz color.  See Foley/Van Dam p. 581, eq. 13.21.
 
-rgb_color (r, g, b) -
+rgb_color (r, g, b, dtype = None) -
     Construct a linear rgb color from components.
 
 irgb_color (ir, ig, ib) -
     Construct a displayable integer irgb color from components.
 
-luv_color (L, u, v) -
+luv_color (L, u, v, dtype = None) -
     Construct a Luv color from components.
 
-lab_color (L, a, b) -
+lab_color (L, a, b, dtype = None) -
     Construct a Lab color from components.
 
 Conversion functions:
 
-rgb_from_xyz (xyz) -
+rgb_from_xyz (xyz, out = None, dtype = None) -
     Convert an xyz color to rgb.
 
-xyz_from_rgb (rgb) -
+xyz_from_rgb (rgb, out = None, dtype = None) -
     Convert an rgb color to xyz.
 
+    These also accept an array of colors, of any shape (..., 3), and return
+    the converted colors in the same shape.  The result can optionally be
+    placed into an existing array out, which must have that shape.
+
+brightest_rgb_from_xyz (xyz, max_component = 1.0, out = None, dtype = None) -
+    Convert an xyz color (or an array of them) to rgb, scaled so that the
+    largest component of each color is max_component.
+
 irgb_string_from_irgb (irgb) -
     Convert a displayable irgb color (0-255) into a hex string.
 
 irgb_from_irgb_string (irgb_string) -
     Convert a color hex string (like '#AB13D2') into a displayable irgb color.
 
+irgb_strings_from_irgb_colors (irgb_colors) -
+    Convert an integer array of displayable irgb colors, with shape (..., 3), into
+    an array of hex strings with shape (...).  Return a tuple (irgb_strings, clipped),
+    where clipped is a boolean array, True for colors that were outside the range 0 - 255.
+
+irgb_colors_from_irgb_strings (irgb_strings) -
+    Convert an array or list of color hex strings (like '#AB13D2') into a uint8 array of
+    displayable irgb colors, with shape (..., 3).  Return a tuple (irgb_colors, invalid),
+    where invalid is a boolean array, True for strings that are not valid colors
+    (these are converted to black), rather than raising an exception.
+
 irgb_from_rgb (rgb) -
     Convert a (linear) rgb value (range 0.0 - 1.0) into a 0-255 displayable integer irgb value (range 0 - 255).
 
-rgb_from_irgb (irgb) -
+rgb_from_irgb (irgb, dtype = None) -
     Convert a displayable (gamma corrected) irgb value (range 0 - 255) into a linear rgb value (range 0.0 - 1.0).
 
 irgb_string_from_rgb (rgb) -
@@ -113,28 +162,34 @@ irgb_from_xyz (xyz) -
 irgb_string_from_xyz (xyz) -
     Convert an xyz color directly into a displayable irgb color hex string.
 
-luv_from_xyz (xyz) -
+luv_from_xyz (xyz, dtype = None) -
     Convert CIE XYZ to Luv.
+    This, and the following Luv/Lab conversions, also accept an array of colors
+    with shape (..., 3), and return an array of the same shape.
 
-xyz_from_luv (luv) -
+xyz_from_luv (luv, dtype = None) -
     Convert Luv to CIE XYZ.  Inverse of luv_from_xyz().
 
-lab_from_xyz (xyz) -
+lab_from_xyz (xyz, dtype = None) -
     Convert color from CIE XYZ to Lab.
 
-xyz_from_lab (Lab) -
+xyz_from_lab (Lab, dtype = None) -
     Convert color from Lab to CIE XYZ.  Inverse of lab_from_xyz().
 
 Gamma correction:
 
-simple_gamma_invert (x) -
+The gamma correction functions accept single values, or numpy arrays.
+
+simple_gamma_invert (x, gamma = None) -
     Simple power law for gamma inverse correction.
     Not used by default.
 
-simple_gamma_correct (x) -
+simple_gamma_correct (x, gamma = None) -
     Simple power law for gamma correction.
     Not used by default.
 
+    The gamma exponent is the one from init_gamma_correction(), unless supplied.
+
 srgb_gamma_invert (x) -
     sRGB standard for gamma inverse correction.
     This is used by default.
@@ -143,6 +198,28 @@ srgb_gamma_correct (x) -
     sRGB standard for gamma correction.
     This is used by default.
 
+Gamma correction lookup tables, for 8 bit (uint8, 0 - 255) or 16 bit (uint16, 0 - 65535) display codes:
+
+display_codes_from_linear (x, dtype = numpy.uint8, out = None) -
+    Gamma correct the linear components x (an array of any shape), and convert to integer display codes.
+    This uses a lookup table, which gives exactly the same codes as rounding the gamma corrected value.
+    Only available for srgb_gamma_invert() and simple_gamma_invert().
+
+linear_from_display_codes (codes, dtype = numpy.uint8, float_type = numpy.float64) -
+    Convert the integer display codes (an array of any shape) into linear components, using a lookup table.
+    The result has type float_type.
+
+has_gamma_encode_table () -
+    Return True if the current gamma correction has an encoding lookup table.
+
+gamma_encode_thresholds (dtype = numpy.uint8) -
+    Get the read-only array of the smallest linear component that is encoded as each display code,
+    from 1 to the maximum code, so the code for x is numpy.searchsorted (thresholds, x, side='right').
+    Only available for srgb_gamma_invert() and simple_gamma_invert().
+
+    The tables are built when first needed, and kept by the ColorSpace (see below).
+    clip_rgb_colors() and rgb_from_irgb() use them.
+
 Color clipping:
 
 clip_rgb_color (rgb_color) -
@@ -152,6 +229,15 @@ clip_rgb_color (rgb_color) -
     The return value is a tuple, the first element is the clipped irgb color,
     and the second element is a tuple indicating which (if any) clipping processes were used.
 
+clip_rgb_colors (rgb_colors, dtype = numpy.uint8, out = None, overwrite_input = False) -
+    Convert an array of linear rgb colors, with shape (..., 3), into displayable
+    colors of the unsigned integer type dtype (uint8 for 0 - 255, uint16 for 0 - 65535),
+    clipping as necessary.  The same as clip_rgb_color() on each color, done with array operations.
+
+    The return value is a tuple (irgb_colors, clipped_chromaticity, clipped_intensity),
+    where the last two are boolean arrays, with one element per color,
+    indicating which colors were clipped by each process.
+
 Initialization functions:
 
 init (
@@ -198,6 +284,47 @@ init_gamma_correction (
 init_clipping (clip_method = CLIP_ADD_WHITE) -
     Specify the color clipping method.
 
+Color spaces:
+
+The init functions above set up the conversions for the whole module.
+A ColorSpace holds the same settings for one display (the phosphors and white point,
+the Luv/Lab white point, the gamma correction and the clipping method), with the
+conversion matrices, reference white and gamma lookup tables calculated in advance.
+It cannot be changed, so several can be used at once, say in different threads,
+without locking, and without changing the module settings.
+
+color_space (
+    phosphor_red   = SRGB_Red,
+    phosphor_green = SRGB_Green,
+    phosphor_blue  = SRGB_Blue,
+    white_point    = SRGB_White,
+    luv_lab_white_point = None,
+    display_from_linear_function = srgb_gamma_invert,
+    linear_from_display_function = srgb_gamma_correct,
+    gamma = STANDARD_GAMMA,
+    clip_method = CLIP_ADD_WHITE) -
+
+    Get the ColorSpace with these settings, which are as for the init functions.
+    If luv_lab_white_point is None, white_point is used.
+    The most recently used COLOR_SPACE_CACHE_SIZE ColorSpaces are kept, so asking again
+    for the same settings usually returns the same object.
+
+class ColorSpace -
+    On these objects, the conversion functions above (rgb_from_xyz(), luv_from_xyz(),
+    clip_rgb_colors(), display_codes_from_linear(), irgb_from_xyz(), etc.) are available,
+    using the settings of the ColorSpace, as well as:
+
+    replace (**changes) -
+        Get the ColorSpace with the same settings, except for the changes,
+        which are keyword arguments as for color_space().
+
+get_color_space () -
+    Get the current ColorSpace, which the module conversion functions use.
+    The init functions replace it.
+
+set_color_space (space) -
+    Make space the current ColorSpace, and update the module settings to match.
+
 References:
 
 Foley, van Dam, Feiner and Hughes. Computer Graphics: Principles and Practice, 2nd edition,
@@ -245,16 +372,55 @@ along with ColorPy.  If not, see <http://www.gnu.org/licenses/>.
 '''
 from __future__ import print_function
 
-import math, numpy
+import collections, functools, numpy, threading
+
+# Float types - float64 [default] or float32
+
+DEFAULT_FLOAT_TYPE = numpy.float64
+
+_float_types = (numpy.dtype (numpy.float64), numpy.dtype (numpy.float32))
+_float_type = numpy.dtype (DEFAULT_FLOAT_TYPE)
+
+def init_float_type (dtype = DEFAULT_FLOAT_TYPE):
+    '''Set the default float type, numpy.float64 or numpy.float32.'''
+    global _float_type
+    dtype = numpy.dtype (dtype)
+    if dtype not in _float_types:
+        raise ValueError('Invalid float type %s, expecting float64 or float32' % (str(dtype)))
+    _float_type = dtype
+
+def get_float_type (values = None, dtype = None):
+    '''Get the float type for a result computed from values: dtype, if supplied,
+    otherwise the type of values, if they are a float32 or float64 array,
+    otherwise the default float type.'''
+    if dtype is not None:
+        dtype = numpy.dtype (dtype)
+        if dtype not in _float_types:
+            raise ValueError('Invalid float type %s, expecting float64 or float32' % (str(dtype)))
+        return dtype
+    if isinstance (values, (numpy.ndarray, numpy.generic)) and values.dtype in _float_types:
+        return values.dtype
+    return _float_type
+
+def _float_array (values, dtype = None):
+    '''Get the values as an array of the float type from get_float_type().'''
+    return numpy.asarray (values, dtype=get_float_type (values, dtype))
+
+def _as_float (values):
+    '''Get the values as a float array, keeping the type of float32 arrays, otherwise float64.
+    This is for the elementwise functions, which are also used to build exact tables.'''
+    if isinstance (values, (numpy.ndarray, numpy.generic)) and values.dtype in _float_types:
+        return numpy.asarray (values)
+    return numpy.asarray (values, dtype=float)
 
 # The xyz constructors have some special versions to handle some common situations
 
-def xyz_color (x, y, z = None):
+def xyz_color (x, y, z = None, dtype = None):
     '''Construct an xyz color.  If z is omitted, set it so that x+y+z = 1.0.'''
     if z == None:
         # choose z so that x+y+z = 1.0
         z = 1.0 - (x + y)
-    rtn = numpy.array ([x, y, z])
+    rtn = numpy.array ([x, y, z], get_float_type (None, dtype))
     return rtn
 
 def xyz_normalize (xyz):
@@ -278,19 +444,20 @@ def xyz_normalize_Y1 (xyz):
         xyz [2] *= scale
     return xyz
 
-def xyz_color_from_xyY (x, y, Y):
+def xyz_color_from_xyY (x, y, Y, dtype = None):
     '''Given the 'little' x,y chromaticity, and the intensity Y,
     construct an xyz color.  See Foley/Van Dam p. 581, eq. 13.21.'''
     return xyz_color (
         (x/y)* Y,
         Y,
-        (1.0-x-y)/(y) * Y)
+        (1.0-x-y)/(y) * Y,
+        dtype)
 
 # Simple constructors for the remaining models
 
-def rgb_color (r, g, b):
+def rgb_color (r, g, b, dtype = None):
     '''Construct a linear rgb color from components.'''
-    rtn = numpy.array ([r, g, b])
+    rtn = numpy.array ([r, g, b], get_float_type (None, dtype))
     return rtn
 
 def irgb_color (ir, ig, ib):
@@ -298,14 +465,14 @@ def irgb_color (ir, ig, ib):
     rtn = numpy.array ([ir, ig, ib], int)
     return rtn
 
-def luv_color (L, u, v):
+def luv_color (L, u, v, dtype = None):
     '''Construct a Luv color from components.'''
-    rtn = numpy.array ([L, u, v])
+    rtn = numpy.array ([L, u, v], get_float_type (None, dtype))
     return rtn
 
-def lab_color (L, a, b):
+def lab_color (L, a, b, dtype = None):
     '''Construct a Lab color from components.'''
-    rtn = numpy.array ([L, a, b])
+    rtn = numpy.array ([L, a, b], get_float_type (None, dtype))
     return rtn
 
 #
@@ -358,6 +525,23 @@ Judd_Red   = xyz_color (0.68, 0.32)       # Europium Yttrium Vanadate
 Judd_Green = xyz_color (0.28, 0.60)       # Zinc Cadmium Sulfide
 Judd_Blue  = xyz_color (0.15, 0.07)       # Zinc Sulfide
 
+# Wide gamut displays [all use D65 as white point]
+
+# Display P3 (the DCI-P3 primaries, with D65 white)
+DisplayP3_Red   = xyz_color (0.680, 0.320)
+DisplayP3_Green = xyz_color (0.265, 0.690)
+DisplayP3_Blue  = xyz_color (0.150, 0.060)
+
+# Adobe RGB (1998)
+AdobeRGB_Red   = xyz_color (0.640, 0.330)
+AdobeRGB_Green = xyz_color (0.210, 0.710)
+AdobeRGB_Blue  = xyz_color (0.150, 0.060)
+
+# ITU-R BT.2020 (UHDTV)
+Rec2020_Red   = xyz_color (0.708, 0.292)
+Rec2020_Green = xyz_color (0.170, 0.797)
+Rec2020_Blue  = xyz_color (0.131, 0.046)
+
 # White points [all are for CIE 1931 for small field of view]
 #   These are from Judd/Wyszecki
 WhiteA   = xyz_color (0.4476, 0.4074)      # approx 2856 K
@@ -417,6 +601,25 @@ PhosphorWhite = None
 rgb_from_xyz_matrix = None
 xyz_from_rgb_matrix = None
 
+def _rgb_xyz_matrices (phosphor_red, phosphor_green, phosphor_blue, white_point):
+    '''Get the conversion matrices (xyz_from_rgb, rgb_from_xyz) for the phosphors and white point.
+    See [Foley/Van Dam, p.587, eqn 13.27, 13.29] and [Hall, p. 239].'''
+    phosphor_matrix = numpy.column_stack ((phosphor_red, phosphor_green, phosphor_blue))
+    # normalize white point to Y=1.0
+    normalized_white = numpy.array (white_point, dtype=float)
+    xyz_normalize_Y1 (normalized_white)
+    # Determine intensities of each phosphor by solving:
+    #     phosphor_matrix * intensity_vector = white_point
+    intensities = numpy.linalg.solve (phosphor_matrix, normalized_white)
+    # construct xyz_from_rgb matrix from the results
+    xyz_from_rgb = numpy.column_stack (
+        (phosphor_red   * intensities [0],
+         phosphor_green * intensities [1],
+         phosphor_blue  * intensities [2]))
+    # invert to get rgb_from_xyz matrix
+    rgb_from_xyz = numpy.linalg.inv (xyz_from_rgb)
+    return (xyz_from_rgb, rgb_from_xyz)
+
 def init (
     phosphor_red   = SRGB_Red,
     phosphor_green = SRGB_Green,
@@ -432,58 +635,33 @@ def init (
     of the phosphors are at full strength.
 
     See [Foley/Van Dam, p.587, eqn 13.27, 13.29] and [Hall, p. 239].
-    '''
-    global PhosphorRed, PhosphorGreen, PhosphorBlue, PhosphorWhite
-    PhosphorRed   = phosphor_red
-    PhosphorGreen = phosphor_green
-    PhosphorBlue  = phosphor_blue
-    PhosphorWhite = white_point
-    global xyz_from_rgb_matrix, rgb_from_xyz_matrix
-    phosphor_matrix = numpy.column_stack ((phosphor_red, phosphor_green, phosphor_blue))
-    # normalize white point to Y=1.0
-    normalized_white = white_point.copy()
-    xyz_normalize_Y1 (normalized_white)
-    # Determine intensities of each phosphor by solving:
-    #     phosphor_matrix * intensity_vector = white_point
-    intensities = numpy.linalg.solve (phosphor_matrix, normalized_white)
-    # construct xyz_from_rgb matrix from the results
-    xyz_from_rgb_matrix = numpy.column_stack (
-        (phosphor_red   * intensities [0],
-         phosphor_green * intensities [1],
-         phosphor_blue  * intensities [2]))
-    # invert to get rgb_from_xyz matrix
-    rgb_from_xyz_matrix = numpy.linalg.inv (xyz_from_rgb_matrix)
-    #print ('xyz_from_rgb', str (xyz_from_rgb_matrix))
-    #print ('rgb_from_xyz', str (rgb_from_xyz_matrix))
 
-    # conversions between the (almost) perceptually uniform
-    # spaces (Luv, Lab) require the definition of a white point.
-    init_Luv_Lab_white_point (white_point)
-
-    # init gamma correction functions to default
-    init_gamma_correction()
+    The white point is also used for the Luv and Lab conversions,
+    and gamma correction and clipping are set to the defaults.
+    '''
+    set_color_space (color_space (phosphor_red, phosphor_green, phosphor_blue, white_point))
 
-    # init color clipping method to default
-    init_clipping()
+# The conversions accept a single color, or an array of colors of shape (..., 3).
+# Each color is multiplied by the matrix, as colors @ matrix.T, so the result has
+# the same shape.  The optional out array, of that shape, receives the result.
+#
+# These, and the other module conversion functions below, use the current ColorSpace.
 
-def rgb_from_xyz (xyz):
-    '''Convert an xyz color to rgb.'''
-    return numpy.dot (rgb_from_xyz_matrix, xyz)
+def rgb_from_xyz (xyz, out=None, dtype=None):
+    '''Convert an xyz color (or an array of them, with shape (..., 3)) to rgb.'''
+    return _color_space.rgb_from_xyz (xyz, out=out, dtype=dtype)
 
-def xyz_from_rgb (rgb):
-    '''Convert an rgb color to xyz.'''
-    return numpy.dot (xyz_from_rgb_matrix, rgb)
+def xyz_from_rgb (rgb, out=None, dtype=None):
+    '''Convert an rgb color (or an array of them, with shape (..., 3)) to xyz.'''
+    return _color_space.xyz_from_rgb (rgb, out=out, dtype=dtype)
 
 # Conversion from xyz to rgb, while also scaling the brightness to the maximum displayable
 
-def brightest_rgb_from_xyz (xyz, max_component=1.0):
-    '''Convert the xyz color to rgb, and scale to maximum displayable brightness, so one of the components will be 1.0 (or max_component).'''
-    rgb = rgb_from_xyz (xyz)
-    max_rgb = max (rgb)
-    if max_rgb != 0.0:
-        scale = max_component / max_rgb
-        rgb *= scale
-    return rgb
+def brightest_rgb_from_xyz (xyz, max_component=1.0, out=None, dtype=None):
+    '''Convert the xyz color to rgb, and scale to maximum displayable brightness, so one of the components will be 1.0 (or max_component).
+    xyz may also be an array of colors, with shape (..., 3), each of which is scaled separately.
+    Colors with a maximum rgb component of zero are not scaled.'''
+    return _color_space.brightest_rgb_from_xyz (xyz, max_component, out=out, dtype=dtype)
 
 #
 # Color model conversions to (nearly) perceptually uniform spaces Luv and Lab.
@@ -497,10 +675,7 @@ _reference_v_prime = None
 
 def init_Luv_Lab_white_point (white_point):
     '''Specify the white point to use for Luv/Lab conversions.'''
-    global _reference_white, _reference_u_prime, _reference_v_prime
-    _reference_white = white_point.copy()
-    xyz_normalize_Y1 (_reference_white)
-    (_reference_u_prime, _reference_v_prime) = uv_primes (_reference_white)
+    set_color_space (_color_space.replace (luv_lab_white_point = white_point))
 
 # Luminance function [of Y value of an XYZ color] used in Luv and Lab. See [Kasson p.399] for details.
 # The linear range coefficient L_LUM_C has more digits than in the paper,
@@ -511,55 +686,70 @@ L_LUM_B      = 16.0
 L_LUM_C      = 903.29629551307664
 L_LUM_CUTOFF = 0.008856
 
+# The Luv/Lab functions below accept either single values, or numpy arrays
+# of any shape, and work elementwise.  Both branches of each function are
+# evaluated and the right one is chosen with numpy.where(), so that whole
+# arrays are converted without looping.  Single values give float results.
+
+def _float_or_array (a):
+    '''Return a 0-dimensional array as a float, and any other array unchanged.'''
+    if a.ndim == 0:
+        return float (a)
+    return a
+
 def L_luminance (y):
     '''L coefficient for Luv and Lab models.'''
-    if y > L_LUM_CUTOFF:
-        return L_LUM_A * math.pow (y, 1.0/3.0) - L_LUM_B
-    else:
-        # linear range
-        return L_LUM_C * y
+    y = _as_float (y)
+    L = numpy.where (
+        y > L_LUM_CUTOFF,
+        L_LUM_A * numpy.cbrt (y) - L_LUM_B,
+        L_LUM_C * y)            # linear range
+    return _float_or_array (L)
 
 def L_luminance_inverse (L):
     '''Inverse of L_luminance().'''
-    if L <= (L_LUM_C * L_LUM_CUTOFF):
-        # linear range
-        y = L / L_LUM_C
-    else:
-        t = (L + L_LUM_B) / L_LUM_A
-        y = math.pow (t, 3)
-    return y
+    L = _as_float (L)
+    t = (L + L_LUM_B) / L_LUM_A
+    y = numpy.where (
+        L <= (L_LUM_C * L_LUM_CUTOFF),
+        L / L_LUM_C,            # linear range
+        t * t * t)
+    return _float_or_array (y)
 
 # Utility function for Luv
 
 def uv_primes (xyz):
-    '''Luv utility.'''
-    x = xyz [0]
-    y = xyz [1]
-    z = xyz [2]
+    '''Luv utility.
+    xyz may be a single color, or an array of colors with shape (..., 3),
+    in which case u_prime and v_prime are arrays of shape (...).'''
+    xyz = _as_float (xyz)
+    x = xyz [..., 0]
+    y = xyz [..., 1]
+    z = xyz [..., 2]
     w_denom = x + 15.0 * y + 3.0 * z
-    if w_denom != 0.0:
-        u_prime = 4.0 * x / w_denom
-        v_prime = 9.0 * y / w_denom
-    else:
-        # this should only happen when x=y=z=0 [i.e. black] since xyz values are positive
-        u_prime = 0.0
-        v_prime = 0.0
-    return (u_prime, v_prime)
+    # w_denom should only be zero when x=y=z=0 [i.e. black] since xyz values are positive,
+    # in which case u_prime = v_prime = 0.
+    nonzero = (w_denom != 0.0)
+    w_denom = numpy.where (nonzero, w_denom, 1.0)
+    u_prime = numpy.where (nonzero, 4.0 * x / w_denom, 0.0)
+    v_prime = numpy.where (nonzero, 9.0 * y / w_denom, 0.0)
+    return (_float_or_array (u_prime), _float_or_array (v_prime))
 
 def uv_primes_inverse (u_prime, v_prime, y):
-    '''Inverse of form_uv_primes(). We will always have y known when this is called.'''
-    if v_prime != 0.0:
-        # normal
-        w_denom = (9.0 * y) / v_prime
-        x = 0.25 * u_prime * w_denom
-        y = y
-        z = (w_denom - x - 15.0 * y) / 3.0
-    else:
-        # should only happen when color is totally black
-        x = 0.0
-        y = 0.0
-        z = 0.0
-    xyz = xyz_color (x, y, z)
+    '''Inverse of form_uv_primes(). We will always have y known when this is called.
+    The arguments may also be arrays (of the same shape), and then the result has
+    shape (..., 3).'''
+    (u_prime, v_prime, y) = numpy.broadcast_arrays (
+        _as_float (u_prime),
+        _as_float (v_prime),
+        _as_float (y))
+    # v_prime should only be zero when color is totally black
+    normal = (v_prime != 0.0)
+    w_denom = (9.0 * y) / numpy.where (normal, v_prime, 1.0)
+    x = 0.25 * u_prime * w_denom
+    z = (w_denom - x - 15.0 * y) / 3.0
+    xyz = numpy.stack ((x, y, z), axis=-1)
+    xyz [~normal] = 0.0
     return xyz
 
 # Utility function for Lab
@@ -573,99 +763,45 @@ LAB_F_B = (16.0/116.0)
 
 def Lab_f (t):
     '''Lab utility function.'''
-    if t > L_LUM_CUTOFF:
-        return math.pow (t, 1.0/3.0)
-    else:
-        # linear range
-        return LAB_F_A * t + LAB_F_B
+    t = _as_float (t)
+    F = numpy.where (
+        t > L_LUM_CUTOFF,
+        numpy.cbrt (t),
+        LAB_F_A * t + LAB_F_B)  # linear range
+    return _float_or_array (F)
 
 def Lab_f_inverse (F):
     '''Inverse of Lab_f().'''
-    if F <= (LAB_F_A * L_LUM_CUTOFF + LAB_F_B):
-        # linear range
-        t = (F - LAB_F_B) / LAB_F_A
-    else:
-        t = math.pow (F, 3)
-    return t
+    F = _as_float (F)
+    t = numpy.where (
+        F <= (LAB_F_A * L_LUM_CUTOFF + LAB_F_B),
+        (F - LAB_F_B) / LAB_F_A,    # linear range
+        F * F * F)
+    return _float_or_array (t)
 
 # Conversions between standard device independent color space (CIE XYZ)
 # and the almost perceptually uniform space Luv.
+# These accept a single color, or an array of colors with shape (..., 3).
 
-def luv_from_xyz (xyz):
+def luv_from_xyz (xyz, dtype = None):
     '''Convert CIE XYZ to Luv.'''
-    y = xyz [1]
-    y_p = y / _reference_white [1];       # actually reference_white [1] is probably always 1.0
-    (u_prime, v_prime) = uv_primes (xyz)
-    L = L_luminance (y_p)
-    u = 13.0 * L * (u_prime - _reference_u_prime)
-    v = 13.0 * L * (v_prime - _reference_v_prime)
-    luv = luv_color (L, u, v)
-    return luv
-
-def xyz_from_luv (luv):
+    return _color_space.luv_from_xyz (xyz, dtype)
+
+def xyz_from_luv (luv, dtype = None):
     '''Convert Luv to CIE XYZ.  Inverse of luv_from_xyz().'''
-    L = luv [0]
-    u = luv [1]
-    v = luv [2]
-    # invert L_luminance() to get y
-    y = L_luminance_inverse (L)
-    if L != 0.0:
-        # color is not totally black
-        # get u_prime, v_prime
-        L13 = 13.0 * L
-        u_prime = _reference_u_prime + (u / L13)
-        v_prime = _reference_v_prime + (v / L13)
-        # get xyz color
-        xyz = uv_primes_inverse (u_prime, v_prime, y)
-    else:
-        # color is black
-        xyz = xyz_color (0.0, 0.0, 0.0)
-    return xyz
+    return _color_space.xyz_from_luv (luv, dtype)
 
 # Conversions between standard device independent color space (CIE XYZ)
 # and the almost perceptually uniform space Lab.
+# These accept a single color, or an array of colors with shape (..., 3).
 
-def lab_from_xyz (xyz):
+def lab_from_xyz (xyz, dtype = None):
     '''Convert color from CIE XYZ to Lab.'''
-    x = xyz [0]
-    y = xyz [1]
-    z = xyz [2]
+    return _color_space.lab_from_xyz (xyz, dtype)
 
-    x_p = x / _reference_white [0]
-    y_p = y / _reference_white [1]
-    z_p = z / _reference_white [2]
-
-    f_x = Lab_f (x_p)
-    f_y = Lab_f (y_p)
-    f_z = Lab_f (z_p)
-
-    L = L_luminance (y_p)
-    a = 500.0 * (f_x - f_y)
-    b = 200.0 * (f_y - f_z)
-    Lab = lab_color (L, a, b)
-    return Lab
-
-def xyz_from_lab (Lab):
+def xyz_from_lab (Lab, dtype = None):
     '''Convert color from Lab to CIE XYZ.  Inverse of lab_from_xyz().'''
-    L = Lab [0]
-    a = Lab [1]
-    b = Lab [2]
-    # invert L_luminance() to get y_p
-    y_p = L_luminance_inverse (L)
-    # calculate f_y
-    f_y = Lab_f (y_p)
-    # solve for f_x and f_z
-    f_x = f_y + (a / 500.0)
-    f_z = f_y - (b / 200.0)
-    # invert Lab_f() to get x_p and z_p
-    x_p = Lab_f_inverse (f_x)
-    z_p = Lab_f_inverse (f_z)
-    # multiply by reference white to get xyz
-    x = x_p * _reference_white [0]
-    y = y_p * _reference_white [1]
-    z = z_p * _reference_white [2]
-    xyz = xyz_color (x, y, z)
-    return xyz
+    return _color_space.xyz_from_lab (Lab, dtype)
 
 # Gamma correction
 #
@@ -699,20 +835,29 @@ STANDARD_GAMMA = 2.2
 POYNTON_GAMMA = 2.45
 
 # Simple power laws for gamma correction
+# The gamma exponent is the one set by init_gamma_correction(), unless supplied.
 
-def simple_gamma_invert (x):
+def simple_gamma_invert (x, gamma = None):
     '''Simple power law for gamma inverse correction.'''
-    if x <= 0.0:
-        return x
-    else:
-        return math.pow (x, 1.0 / gamma_exponent)
-
-def simple_gamma_correct (x):
+    if gamma is None:
+        gamma = gamma_exponent
+    x = _as_float (x)
+    rtn = numpy.where (
+        x <= 0.0,
+        x,
+        numpy.power (numpy.maximum (x, 0.0), 1.0 / gamma))
+    return _float_or_array (rtn)
+
+def simple_gamma_correct (x, gamma = None):
     '''Simple power law for gamma correction.'''
-    if x <= 0.0:
-        return x
-    else:
-        return math.pow (x, gamma_exponent)
+    if gamma is None:
+        gamma = gamma_exponent
+    x = _as_float (x)
+    rtn = numpy.where (
+        x <= 0.0,
+        x,
+        numpy.power (numpy.maximum (x, 0.0), gamma))
+    return _float_or_array (rtn)
 
 # sRGB gamma correction - http://www.color.org/sRGB.xalter
 # The effect of the equations is to closely fit a straightforward
@@ -722,19 +867,38 @@ def simple_gamma_correct (x):
 
 def srgb_gamma_invert (x):
     '''sRGB standard for gamma inverse correction.'''
-    if x <= 0.00304:
-        rtn = 12.92 * x
-    else:
-        rtn = 1.055 * math.pow (x, 1.0/2.4) - 0.055
-    return rtn
+    x = _as_float (x)
+    rtn = numpy.where (
+        x <= 0.00304,
+        12.92 * x,
+        1.055 * numpy.power (numpy.maximum (x, 0.0), 1.0/2.4) - 0.055)
+    return _float_or_array (rtn)
 
 def srgb_gamma_correct (x):
     '''sRGB standard for gamma correction.'''
-    if x <= 0.03928:
-        rtn = x / 12.92
-    else:
-        rtn = math.pow ((x + 0.055) / 1.055, 2.4)
-    return rtn
+    x = _as_float (x)
+    rtn = numpy.where (
+        x <= 0.03928,
+        x / 12.92,
+        numpy.power ((numpy.maximum (x, 0.0) + 0.055) / 1.055, 2.4))
+    return _float_or_array (rtn)
+
+# The gamma functions above work on whole arrays.  Any other functions
+# passed to init_gamma_correction() are assumed to only handle one value.
+_array_gamma_functions = (simple_gamma_invert, simple_gamma_correct, srgb_gamma_invert, srgb_gamma_correct)
+
+def _gamma_function (function, gamma):
+    '''Get the gamma correction function, with the gamma exponent supplied to the simple() functions.'''
+    if function in (simple_gamma_invert, simple_gamma_correct):
+        return functools.partial (function, gamma=gamma)
+    return function
+
+def _array_gamma_function (function, gamma):
+    '''Get the gamma correction function, with the gamma exponent supplied,
+    in a version that works on each element of an array.'''
+    if function in _array_gamma_functions:
+        return _gamma_function (function, gamma)
+    return numpy.vectorize (function, otypes=[float])
 
 def init_gamma_correction (
     display_from_linear_function = srgb_gamma_invert,
@@ -762,10 +926,112 @@ def init_gamma_correction (
 
     The gamma parameter is only used for the simple() functions,
     as sRGB implies an effective gamma of 2.2.'''
-    global display_from_linear_component, linear_from_display_component, gamma_exponent
-    display_from_linear_component = display_from_linear_function
-    linear_from_display_component = linear_from_display_function
-    gamma_exponent = gamma
+    set_color_space (_color_space.replace (
+        display_from_linear_function = display_from_linear_function,
+        linear_from_display_function = linear_from_display_function,
+        gamma = gamma))
+
+#
+# Gamma correction lookup tables, for integer display codes of 8 bits (0 - 255) or 16 bits (0 - 65535).
+#
+# The decoding table has one entry per code, with the linear value of that code.
+#
+# The encoding table gives exactly the same code as rounding the gamma corrected value,
+# i.e. round (max_value * display_from_linear_component (x)), clipped to 0 - max_value.
+# Since the gamma functions are increasing, the code is a step function of x, and
+# the thresholds, where the code increases by one, are found by bisection on the
+# floating point values.  A dense table of the code at the start of evenly spaced bins
+# of x then gives the code with one lookup, corrected by comparison with the threshold
+# of the next code (usually just once) for bins that contain a threshold.
+#
+# Encoding tables are only available for srgb_gamma_invert() and simple_gamma_invert().
+# Each ColorSpace builds its tables when first needed, and keeps them.
+#
+
+# Number of bins in the dense encoding table, as a power of two, per number of bits of the codes.
+# These are small enough that a bin is narrower than the smallest step between sRGB codes.
+_GAMMA_ENCODE_TABLE_BITS = {8 : 12, 16 : 20}
+
+def _display_code_max (dtype):
+    '''Get the maximum display code for the integer type, which must be uint8 or uint16.'''
+    dtype = numpy.dtype (dtype)
+    if dtype not in (numpy.dtype (numpy.uint8), numpy.dtype (numpy.uint16)):
+        raise ValueError('Invalid display code type %s, expecting uint8 or uint16' % (str(dtype)))
+    return int (numpy.iinfo (dtype).max)
+
+def has_gamma_encode_table ():
+    '''Return True if the current display_from_linear_component has an encoding lookup table.'''
+    return _color_space.has_gamma_encode_table()
+
+def gamma_encode_thresholds (dtype = numpy.uint8):
+    '''Get the smallest linear component that is encoded as each display code 1 - max, with the current gamma correction.'''
+    return _color_space.gamma_encode_thresholds (dtype)
+
+def _gamma_encode_thresholds (display_from_linear, max_value):
+    '''Get the array of the smallest linear value x, that is encoded as each code 1 - max_value.'''
+    def codes (x):
+        return numpy.rint (max_value * display_from_linear (x))
+    # Bisection on the bit patterns of the (non-negative) floats, which have the same order as the values.
+    num_codes = max_value
+    wanted = numpy.arange (1, max_value + 1, dtype=float)
+    lo = numpy.zeros (num_codes, numpy.int64)                                       # 0.0 is code 0
+    hi = numpy.full (num_codes, numpy.array (2.0).view (numpy.int64), numpy.int64)  # 2.0 is beyond max_value
+    assert (codes (2.0) >= max_value), 'Gamma function is too small to encode'
+    while numpy.any (hi - lo > 1):
+        mid = lo + (hi - lo) // 2
+        high_enough = (codes (mid.view (numpy.float64)) >= wanted)
+        hi = numpy.where (high_enough, mid, hi)
+        lo = numpy.where (high_enough, lo, mid)
+    return hi.view (numpy.float64)
+
+def _build_gamma_encode_table (display_from_linear, dtype):
+    '''Build the encoding table for the gamma function, as a tuple (scale, table, thresholds).
+
+    The code for x is table [int (x * scale)], plus one if x >= thresholds [code].
+    Bins that contain more than one threshold have the code -1 in the table,
+    and the code for x in those is found by searching the thresholds.'''
+    max_value = _display_code_max (dtype)
+    thresholds = _gamma_encode_thresholds (display_from_linear, max_value)
+    # Bins 0 - num_bins-1 cover 0.0 to (just past) the threshold of max_value,
+    # and the extra last bin, for anything larger, is max_value.
+    slack = 4.0 * numpy.finfo (float).eps
+    num_bins = 2 ** _GAMMA_ENCODE_TABLE_BITS [8 * numpy.dtype (dtype).itemsize]
+    scale = num_bins / (thresholds [-1] * (1.0 + slack))
+    bin_starts = numpy.arange (num_bins) / scale
+    # Codes at the start and end of each bin, allowing for rounding in x * scale,
+    # so that the table never gives too large a code.
+    lo_codes = numpy.searchsorted (thresholds, bin_starts * (1.0 - slack), side='right')
+    hi_codes = numpy.searchsorted (thresholds, (bin_starts + 1.0 / scale) * (1.0 + slack), side='right')
+    lo_codes [hi_codes - lo_codes > 1] = -1
+    lo_codes = numpy.append (lo_codes, max_value).astype (numpy.int32)
+    # Comparison with the threshold of the next code, which is NaN (never reached) after max_value.
+    thresholds = numpy.append (thresholds, numpy.nan)
+    lo_codes.flags.writeable = False
+    thresholds.flags.writeable = False
+    return (scale, lo_codes, thresholds)
+
+# Number of values encoded at once, small enough that the temporary arrays stay in the cache.
+_GAMMA_ENCODE_CHUNK_SIZE = 16384
+
+def display_codes_from_linear (x, dtype = numpy.uint8, out = None):
+    '''Gamma correct the linear components x (an array of any shape), and convert to integer display codes,
+    with the encoding lookup table.  This gives the same codes as clip_rgb_colors(), without the clipping.'''
+    return _color_space.display_codes_from_linear (x, dtype, out=out)
+
+def _build_gamma_decode_table (linear_from_display, dtype):
+    '''Build the decoding table, with the linear value of each display code.'''
+    max_value = _display_code_max (dtype)
+    # each entry is found exactly as rgb_from_irgb() does for a single value
+    table = numpy.array ([
+        linear_from_display (float (code) / float (max_value))
+        for code in range (0, max_value + 1)], dtype=float)
+    table.flags.writeable = False
+    return table
+
+def linear_from_display_codes (codes, dtype = numpy.uint8, float_type = numpy.float64):
+    '''Convert the integer display codes (an array of any shape), in the range of dtype (uint8 or uint16),
+    into linear components of type float_type, with the decoding lookup table.'''
+    return _color_space.linear_from_display_codes (codes, dtype, float_type)
 
 #
 # Color clipping - Physical color values may exceed the what the display can show,
@@ -782,8 +1048,7 @@ CLIP_ADD_WHITE     = 1
 
 def init_clipping (clip_method = CLIP_ADD_WHITE):
     '''Specify the color clipping method.'''
-    global _clip_method
-    _clip_method = clip_method
+    set_color_space (_color_space.replace (clip_method = clip_method))
 
 def clip_rgb_color (rgb_color):
     '''Convert a linear rgb color (nominal range 0.0 - 1.0), into a displayable
@@ -792,66 +1057,25 @@ def clip_rgb_color (rgb_color):
     The return value is a tuple, the first element is the clipped irgb color,
     and the second element is a tuple indicating which (if any) clipping processes were used.
     '''
-    clipped_chromaticity = False
-    clipped_intensity = False
-
-    rgb = rgb_color.copy()
-
-    # clip chromaticity if needed (negative rgb values)
-    if _clip_method == CLIP_CLAMP_TO_ZERO:
-        # set negative rgb values to zero
-        if rgb [0] < 0.0:
-            rgb [0] = 0.0
-            clipped_chromaticity = True
-        if rgb [1] < 0.0:
-            rgb [1] = 0.0
-            clipped_chromaticity = True
-        if rgb [2] < 0.0:
-            rgb [2] = 0.0
-            clipped_chromaticity = True
-    elif _clip_method == CLIP_ADD_WHITE:
-        # add enough white to make all rgb values nonnegative
-        # find max negative rgb (or 0.0 if all non-negative), we need that much white
-        rgb_min = min (0.0, min (rgb))
-        # get max positive component
-        rgb_max = max (rgb)
-	# get scaling factor to maintain max rgb after adding white
-        scaling = 1.0
-        if rgb_max > 0.0:
-            scaling = rgb_max / (rgb_max - rgb_min)
-        # add enough white to cancel this out, maintaining the maximum of rgb
-        if rgb_min < 0.0:
-            rgb [0] = scaling * (rgb [0] - rgb_min);
-            rgb [1] = scaling * (rgb [1] - rgb_min);
-            rgb [2] = scaling * (rgb [2] - rgb_min);
-            clipped_chromaticity = True
-    else:
-        raise ValueError('Invalid color clipping method %s' % (str(_clip_method)))
+    return _color_space.clip_rgb_color (rgb_color)
 
-    # clip intensity if needed (rgb values > 1.0) by scaling
-    rgb_max = max (rgb)
-    # we actually don't overflow until 255.0 * intensity > 255.5, so instead of 1.0 use ...
-    intensity_cutoff = 1.0 + (0.5 / 255.0)
-    if rgb_max > intensity_cutoff:
-        # must scale intensity, so max value is intensity_cutoff
-        scaling = intensity_cutoff / rgb_max
-        rgb *= scaling
-        clipped_intensity = True
+def clip_rgb_colors (rgb_colors, dtype = numpy.uint8, out = None, overwrite_input = False):
+    '''Convert an array of linear rgb colors (nominal range 0.0 - 1.0), with shape (..., 3),
+    into displayable irgb colors, clipping as necessary.  This is the same as clip_rgb_color()
+    applied to each color, but done with array operations.
 
-    # gamma correction
-    for index in range (0, 3):
-        rgb [index] = display_from_linear_component (rgb [index])
+    dtype is the unsigned integer type of the result, numpy.uint8 for the
+    range (0 - 255) or numpy.uint16 for the range (0 - 65535).
+    The result can optionally be placed into an existing array out, of that type and shape (..., 3).
 
-    # scale to 0 - 255
-    ir = round (255.0 * rgb [0])
-    ig = round (255.0 * rgb [1])
-    ib = round (255.0 * rgb [2])
-    # ensure that values are in the range 0-255
-    ir = min (255, max (0, ir))
-    ig = min (255, max (0, ig))
-    ib = min (255, max (0, ib))
-    irgb = irgb_color (ir, ig, ib)
-    return (irgb, (clipped_chromaticity, clipped_intensity))
+    If overwrite_input is True, and rgb_colors is a float array, then it is clipped in place
+    (and left holding the clipped, but not gamma corrected, values) rather than copied.
+
+    The return value is a tuple (irgb_colors, clipped_chromaticity, clipped_intensity),
+    where the last two are boolean arrays with shape (...), indicating which colors
+    were clipped by each process.
+    '''
+    return _color_space.clip_rgb_colors (rgb_colors, dtype, out=out, overwrite_input=overwrite_input)
 
 #
 # Conversions between linear rgb colors (range 0.0 - 1.0, values proportional to light intensity)
@@ -885,24 +1109,97 @@ def irgb_from_irgb_string (irgb_string):
     irgb = irgb_color (ir, ig, ib)
     return irgb
 
+# The batched conversions work on the characters as (byte or unicode) codes.
+_HEX_DIGITS = numpy.frombuffer (b'0123456789ABCDEF', dtype=numpy.uint8)
+_HEX_INVALID = 255
+_HEX_VALUES = numpy.full (256, _HEX_INVALID, dtype=numpy.uint8)
+_HEX_VALUES [numpy.frombuffer (b'0123456789', dtype=numpy.uint8)] = numpy.arange (10)
+_HEX_VALUES [numpy.frombuffer (b'ABCDEF', dtype=numpy.uint8)] = numpy.arange (10, 16)
+_HEX_VALUES [numpy.frombuffer (b'abcdef', dtype=numpy.uint8)] = numpy.arange (10, 16)
+
+def irgb_strings_from_irgb_colors (irgb_colors):
+    '''Convert an integer array of displayable irgb colors, with shape (..., 3), into
+    an array of hex strings (like '#AB13D2') with shape (...).
+
+    Colors outside the range 0 - 255 are clamped to it, as irgb_string_from_irgb() does,
+    but the input is not changed.  The return value is a tuple (irgb_strings, clipped),
+    where clipped is a boolean array with shape (...), True for the colors that were clamped.
+    '''
+    irgbs = numpy.asarray (irgb_colors)
+    assert (irgbs.ndim >= 1 and irgbs.shape [-1] == 3), 'Expecting irgb colors with shape (..., 3), instead shape is %s' % (str (irgbs.shape))
+    if irgbs.dtype.kind not in 'ui':
+        raise ValueError('Invalid irgb colors of type %s, expecting integers' % (str(irgbs.dtype)))
+    if irgbs.dtype == numpy.uint8:
+        clipped = numpy.zeros (irgbs.shape [:-1], dtype=bool)
+    else:
+        clipped = numpy.any ((irgbs < 0) | (irgbs > 255), axis=-1)
+        irgbs = numpy.clip (irgbs, 0, 255).astype (numpy.uint8)
+    # the 7 characters of each string, as bytes
+    chars = numpy.empty (irgbs.shape [:-1] + (7,), dtype=numpy.uint8)
+    chars [..., 0] = ord ('#')
+    chars [..., 1::2] = _HEX_DIGITS [irgbs >> 4]
+    chars [..., 2::2] = _HEX_DIGITS [irgbs & 15]
+    irgb_strings = chars.view ('S7') [..., 0].astype ('U7')
+    return (irgb_strings, clipped)
+
+def _string_codes (irgb_strings):
+    '''Get the character codes of the strings, as an array of shape (..., 7),
+    and a boolean array (...) that is True for the strings that do not fit.'''
+    strings = numpy.asarray (irgb_strings)
+    shape = strings.shape
+    # flatten (and make contiguous), so that the characters can be viewed as codes
+    strings = strings.reshape (-1)
+    if strings.size == 0:
+        strings = strings.astype (str)
+    if strings.dtype.kind == 'O':
+        # only the str elements can be colors
+        is_string = numpy.array ([isinstance (string, str) for string in strings], dtype=bool)
+        strings = numpy.array ([string if ok else '' for (string, ok) in zip (strings, is_string)], dtype=str)
+        not_string = ~is_string
+    elif strings.dtype.kind in 'US':
+        not_string = numpy.zeros (strings.shape, dtype=bool)
+    else:
+        raise ValueError('Invalid irgb strings of type %s, expecting strings' % (str(strings.dtype)))
+    if strings.dtype.kind == 'U':
+        num_chars = strings.dtype.itemsize // 4
+        codes = strings.view (numpy.uint32)
+    else:
+        num_chars = strings.dtype.itemsize
+        codes = strings.view (numpy.uint8)
+    codes = codes.reshape (shape + (num_chars,))
+    not_string = not_string.reshape (shape)
+    if num_chars < 7:
+        # too short to be valid, but pad so that all have 7 characters
+        padded = numpy.zeros (shape + (7,), dtype=codes.dtype)
+        padded [..., :num_chars] = codes
+        codes = padded
+    too_long = numpy.any (codes [..., 7:] != 0, axis=-1)
+    return (codes [..., :7], not_string | too_long)
+
+def irgb_colors_from_irgb_strings (irgb_strings):
+    '''Convert an array or list of color hex strings (like '#AB13D2'), with shape (...),
+    into a uint8 array of displayable irgb colors, with shape (..., 3).
+
+    All the strings are checked at once.  Rather than raising an exception for an invalid string,
+    the return value is a tuple (irgb_colors, invalid), where invalid is a boolean array with shape (...),
+    True for the strings that are not valid colors, which are converted to black.
+    '''
+    (codes, invalid) = _string_codes (irgb_strings)
+    invalid |= (codes [..., 0] != ord ('#'))
+    # codes beyond 255 are not hex digits, and 255 itself is not either
+    digits = _HEX_VALUES [numpy.minimum (codes [..., 1:], _HEX_INVALID)]
+    invalid |= numpy.any (digits == _HEX_INVALID, axis=-1)
+    irgbs = (digits [..., 0::2] << 4) | digits [..., 1::2]
+    irgbs [invalid] = 0
+    return (irgbs, invalid)
+
 def irgb_from_rgb (rgb):
     '''Convert a (linear) rgb value (range 0.0 - 1.0) into a 0-255 displayable integer irgb value (range 0 - 255).'''
-    result = clip_rgb_color (rgb)
-    (irgb, (clipped_chrom,clipped_int)) = result
-    return irgb
+    return _color_space.irgb_from_rgb (rgb)
 
-def rgb_from_irgb (irgb):
+def rgb_from_irgb (irgb, dtype = None):
     '''Convert a displayable (gamma corrected) irgb value (range 0 - 255) into a linear rgb value (range 0.0 - 1.0).'''
-    # scale to 0.0 - 1.0
-    r0 = float (irgb [0]) / 255.0
-    g0 = float (irgb [1]) / 255.0
-    b0 = float (irgb [2]) / 255.0
-    # gamma adjustment
-    r = linear_from_display_component (r0)
-    g = linear_from_display_component (g0)
-    b = linear_from_display_component (b0)
-    rgb = rgb_color (r, g, b)
-    return rgb
+    return _color_space.rgb_from_irgb (irgb, dtype)
 
 def irgb_string_from_rgb (rgb):
     '''Clip the rgb color, convert to a displayable color, and convert to a hex string.'''
@@ -918,6 +1215,547 @@ def irgb_string_from_xyz (xyz):
     '''Convert an xyz color directly into a displayable irgb color hex string.'''
     return irgb_string_from_rgb (rgb_from_xyz (xyz))
 
+#
+# Color spaces - All of the settings from the init functions above, for one display,
+#   together in an immutable ColorSpace object, with the conversions that use them.
+#
+# Everything that can be is calculated when the ColorSpace is made (the rgb/xyz matrices,
+# the reference white and its u'v' primes), and the gamma lookup tables are built the first
+# time they are needed, and kept.  Since a ColorSpace never changes, conversions for several
+# displays can be done at once (in different threads, say), each with its own ColorSpace,
+# without any locking, and without touching the module settings.
+#
+# ColorSpaces should be made with color_space(), which keeps each one that it makes,
+# so that asking again for the same settings returns the same object, at no cost.
+#
+# The module conversion functions use the current ColorSpace, which the init functions replace.
+#
+
+def _out_float_type (out, dtype):
+    '''Get the float type requested for a conversion, which is the type of out if it is supplied and dtype is not.'''
+    if dtype is None and out is not None:
+        return get_float_type (out)
+    return dtype
+
+def _read_only_array (a):
+    '''Get a read-only float array copy of a.'''
+    rtn = numpy.array (a, dtype=float)
+    rtn.flags.writeable = False
+    return rtn
+
+class ColorSpace (object):
+    '''The immutable settings for converting colors for one display, with all the conversions.'''
+
+    def __init__ (self,
+        phosphor_red   = SRGB_Red,
+        phosphor_green = SRGB_Green,
+        phosphor_blue  = SRGB_Blue,
+        white_point    = SRGB_White,
+        luv_lab_white_point = None,
+        display_from_linear_function = srgb_gamma_invert,
+        linear_from_display_function = srgb_gamma_correct,
+        gamma = STANDARD_GAMMA,
+        clip_method = CLIP_ADD_WHITE):
+        '''Set up the conversions.  The arguments are as for init(), init_Luv_Lab_white_point(),
+        init_gamma_correction() and init_clipping().  If luv_lab_white_point is None, white_point is used.'''
+        if clip_method not in (CLIP_CLAMP_TO_ZERO, CLIP_ADD_WHITE):
+            raise ValueError('Invalid color clipping method %s' % (str(clip_method)))
+        if luv_lab_white_point is None:
+            luv_lab_white_point = white_point
+        self.phosphor_red   = _read_only_array (phosphor_red)
+        self.phosphor_green = _read_only_array (phosphor_green)
+        self.phosphor_blue  = _read_only_array (phosphor_blue)
+        self.white_point    = _read_only_array (white_point)
+        self.luv_lab_white_point = _read_only_array (luv_lab_white_point)
+        # conversions between xyz and rgb
+        (xyz_from_rgb_matrix, rgb_from_xyz_matrix) = _rgb_xyz_matrices (
+            self.phosphor_red, self.phosphor_green, self.phosphor_blue, self.white_point)
+        self.xyz_from_rgb_matrix = _read_only_array (xyz_from_rgb_matrix)
+        self.rgb_from_xyz_matrix = _read_only_array (rgb_from_xyz_matrix)
+        # white point for Luv/Lab, normalized to Y=1.0
+        reference_white = numpy.array (luv_lab_white_point, dtype=float)
+        xyz_normalize_Y1 (reference_white)
+        self.reference_white = _read_only_array (reference_white)
+        (self.reference_u_prime, self.reference_v_prime) = uv_primes (reference_white)
+        # gamma correction
+        self.display_from_linear_function = display_from_linear_function
+        self.linear_from_display_function = linear_from_display_function
+        self.gamma = gamma
+        self._display_from_linear = _gamma_function (display_from_linear_function, gamma)
+        self._linear_from_display = _gamma_function (linear_from_display_function, gamma)
+        self._display_from_linear_array = _array_gamma_function (display_from_linear_function, gamma)
+        # color clipping
+        self.clip_method = clip_method
+        # gamma lookup tables, by maximum display code, built when first needed
+        self._gamma_encode_tables = {}
+        self._gamma_decode_tables = {}
+        self._frozen = True
+
+    def __setattr__ (self, name, value):
+        if getattr (self, '_frozen', False):
+            raise AttributeError('ColorSpace is immutable, use replace() for different settings')
+        object.__setattr__ (self, name, value)
+
+    def __repr__ (self):
+        return 'ColorSpace (phosphors = %s, white_point = %s, gamma = %s %s, clip_method = %s)' % (
+            str ([tuple (self.phosphor_red), tuple (self.phosphor_green), tuple (self.phosphor_blue)]),
+            str (tuple (self.white_point)),
+            self.display_from_linear_function.__name__, str (self.gamma), str (self.clip_method))
+
+    def replace (self, **changes):
+        '''Get the ColorSpace with these settings, except for the changes, which are keyword arguments of color_space().'''
+        settings = dict (
+            phosphor_red   = self.phosphor_red,
+            phosphor_green = self.phosphor_green,
+            phosphor_blue  = self.phosphor_blue,
+            white_point    = self.white_point,
+            luv_lab_white_point = self.luv_lab_white_point,
+            display_from_linear_function = self.display_from_linear_function,
+            linear_from_display_function = self.linear_from_display_function,
+            gamma = self.gamma,
+            clip_method = self.clip_method)
+        for name in changes:
+            if name not in settings:
+                raise ValueError('Invalid color space setting %s' % str (name))
+        settings.update (changes)
+        return color_space (**settings)
+
+    # Conversions between xyz and rgb
+
+    def rgb_from_xyz (self, xyz, out=None, dtype=None):
+        '''Convert an xyz color (or an array of them, with shape (..., 3)) to rgb.'''
+        xyz = _float_array (xyz, _out_float_type (out, dtype))
+        return numpy.matmul (xyz, self.rgb_from_xyz_matrix.T.astype (xyz.dtype, copy=False), out=out)
+
+    def xyz_from_rgb (self, rgb, out=None, dtype=None):
+        '''Convert an rgb color (or an array of them, with shape (..., 3)) to xyz.'''
+        rgb = _float_array (rgb, _out_float_type (out, dtype))
+        return numpy.matmul (rgb, self.xyz_from_rgb_matrix.T.astype (rgb.dtype, copy=False), out=out)
+
+    def brightest_rgb_from_xyz (self, xyz, max_component=1.0, out=None, dtype=None):
+        '''Convert the xyz color to rgb, and scale to maximum displayable brightness, so one of the components will be 1.0 (or max_component).
+        xyz may also be an array of colors, with shape (..., 3), each of which is scaled separately.
+        Colors with a maximum rgb component of zero are not scaled.'''
+        rgb = self.rgb_from_xyz (xyz, out=out, dtype=dtype)
+        max_rgb = numpy.max (rgb, axis=-1, keepdims=True)
+        scale = numpy.ones_like (max_rgb)
+        numpy.divide (max_component, max_rgb, out=scale, where=(max_rgb != 0.0))
+        rgb *= scale
+        return rgb
+
+    # Conversions with Luv and Lab
+
+    def luv_from_xyz (self, xyz, dtype = None):
+        '''Convert CIE XYZ to Luv.'''
+        xyz = _float_array (xyz, dtype)
+        # the reference values in the float type of xyz, so that float32 colors are not promoted
+        float_type = xyz.dtype.type
+        y = xyz [..., 1]
+        y_p = y / float_type (self.reference_white [1])        # actually reference_white [1] is probably always 1.0
+        (u_prime, v_prime) = uv_primes (xyz)
+        L = L_luminance (y_p)
+        u = 13.0 * L * (u_prime - float_type (self.reference_u_prime))
+        v = 13.0 * L * (v_prime - float_type (self.reference_v_prime))
+        luv = numpy.stack (numpy.broadcast_arrays (L, u, v), axis=-1).astype (xyz.dtype, copy=False)
+        return luv
+
+    def xyz_from_luv (self, luv, dtype = None):
+        '''Convert Luv to CIE XYZ.  Inverse of luv_from_xyz().'''
+        luv = _float_array (luv, dtype)
+        L = luv [..., 0]
+        u = luv [..., 1]
+        v = luv [..., 2]
+        # invert L_luminance() to get y
+        y = L_luminance_inverse (L)
+        # L is zero only when the color is black
+        not_black = (L != 0.0)
+        # get u_prime, v_prime
+        L13 = 13.0 * numpy.where (not_black, L, luv.dtype.type (1.0))
+        u_prime = luv.dtype.type (self.reference_u_prime) + (u / L13)
+        v_prime = luv.dtype.type (self.reference_v_prime) + (v / L13)
+        # get xyz color
+        xyz = uv_primes_inverse (u_prime, v_prime, y).astype (luv.dtype, copy=False)
+        xyz [~not_black] = 0.0
+        return xyz
+
+    def lab_from_xyz (self, xyz, dtype = None):
+        '''Convert color from CIE XYZ to Lab.'''
+        xyz = _float_array (xyz, dtype)
+        xyz_p = xyz / self.reference_white.astype (xyz.dtype, copy=False)
+        f = Lab_f (xyz_p)
+        f_x = f [..., 0]
+        f_y = f [..., 1]
+        f_z = f [..., 2]
+        L = L_luminance (xyz_p [..., 1])
+        a = 500.0 * (f_x - f_y)
+        b = 200.0 * (f_y - f_z)
+        Lab = numpy.stack (numpy.broadcast_arrays (L, a, b), axis=-1).astype (xyz.dtype, copy=False)
+        return Lab
+
+    def xyz_from_lab (self, Lab, dtype = None):
+        '''Convert color from Lab to CIE XYZ.  Inverse of lab_from_xyz().'''
+        Lab = _float_array (Lab, dtype)
+        L = Lab [..., 0]
+        a = Lab [..., 1]
+        b = Lab [..., 2]
+        # invert L_luminance() to get y_p
+        y_p = L_luminance_inverse (L)
+        # calculate f_y
+        f_y = Lab_f (y_p)
+        # solve for f_x and f_z
+        f_x = f_y + (a / 500.0)
+        f_z = f_y - (b / 200.0)
+        # invert Lab_f() to get x_p and z_p
+        x_p = Lab_f_inverse (f_x)
+        z_p = Lab_f_inverse (f_z)
+        # multiply by reference white to get xyz
+        xyz_p = numpy.stack (numpy.broadcast_arrays (x_p, y_p, z_p), axis=-1).astype (Lab.dtype, copy=False)
+        xyz = xyz_p * self.reference_white.astype (Lab.dtype, copy=False)
+        return xyz
+
+    # Gamma correction
+
+    def display_from_linear_component (self, x):
+        '''Convert a linear component [proportional to light intensity] into a display component.'''
+        return self._display_from_linear (x)
+
+    def linear_from_display_component (self, x):
+        '''Convert a display component into a linear component [proportional to light intensity].'''
+        return self._linear_from_display (x)
+
+    def has_gamma_encode_table (self):
+        '''Return True if the display_from_linear_function has an encoding lookup table.'''
+        return self.display_from_linear_function in (srgb_gamma_invert, simple_gamma_invert)
+
+    def _gamma_encode_table (self, dtype):
+        '''Get the encoding table for the gamma correction, as a tuple (scale, table, thresholds).'''
+        max_value = _display_code_max (dtype)
+        table = self._gamma_encode_tables.get (max_value)
+        if table is None:
+            if not self.has_gamma_encode_table():
+                raise ValueError('No gamma encoding table for %s' % (str(self.display_from_linear_function)))
+            table = _build_gamma_encode_table (self._display_from_linear, dtype)
+            self._gamma_encode_tables [max_value] = table
+        return table
+
+    def gamma_encode_thresholds (self, dtype = numpy.uint8):
+        '''Get the (read-only) array of the smallest linear component that is encoded as each display code 1 - max.'''
+        (scale, table, thresholds) = self._gamma_encode_table (dtype)
+        return thresholds [:-1]
+
+    def display_codes_from_linear (self, x, dtype = numpy.uint8, out = None):
+        '''Gamma correct the linear components x (an array of any shape), and convert to integer display codes,
+        with the encoding lookup table.  This gives the same codes as clip_rgb_colors(), without the clipping.'''
+        (scale, table, thresholds) = self._gamma_encode_table (dtype)
+        x = _as_float (x)
+        if out is None:
+            out = numpy.empty (x.shape, dtype)
+        # work on flat arrays, with a temporary result if out is not contiguous
+        result = out if out.flags.c_contiguous else numpy.empty (out.shape, dtype)
+        flat_x = x.reshape (-1)
+        flat_out = result.reshape (-1)
+        num_bins = len (table) - 1
+        chunk = min (_GAMMA_ENCODE_CHUNK_SIZE, max (1, flat_x.size))
+        index_float = numpy.empty (chunk)
+        index = numpy.empty (chunk, numpy.int32)
+        codes = numpy.empty (chunk, numpy.int32)
+        for start in range (0, flat_x.size, chunk):
+            stop = min (start + chunk, flat_x.size)
+            n = stop - start
+            xs = flat_x [start:stop]
+            fi = index_float [:n]
+            numpy.multiply (xs, scale, out=fi)
+            # fmax() makes NaN values zero, as well as negative ones.
+            numpy.fmax (fi, 0.0, out=fi)
+            numpy.minimum (fi, num_bins, out=fi)
+            ix = index [:n]
+            ix [...] = fi
+            cs = codes [:n]
+            numpy.take (table, ix, out=cs)
+            cs += (xs >= thresholds [cs])
+            crowded = (cs < 0)
+            if numpy.any (crowded):
+                cs [crowded] = numpy.searchsorted (thresholds, xs [crowded], side='right')
+            flat_out [start:stop] = cs
+        if result is not out:
+            out [...] = result
+        return out
+
+    def _gamma_decode_table (self, dtype, float_type = numpy.float64):
+        '''Get the decoding table, with the linear value of each display code, of type float_type.'''
+        max_value = _display_code_max (dtype)
+        float_type = get_float_type (None, float_type)
+        key = (max_value, float_type.name)
+        table = self._gamma_decode_tables.get (key)
+        if table is None:
+            if float_type == numpy.float64:
+                table = _build_gamma_decode_table (self._linear_from_display, dtype)
+            else:
+                table = self._gamma_decode_table (dtype).astype (float_type)
+                table.flags.writeable = False
+            self._gamma_decode_tables [key] = table
+        return table
+
+    def linear_from_display_codes (self, codes, dtype = numpy.uint8, float_type = numpy.float64):
+        '''Convert the integer display codes (an array of any shape), in the range of dtype (uint8 or uint16),
+        into linear components of type float_type, with the decoding lookup table.'''
+        table = self._gamma_decode_table (dtype, float_type)
+        codes = numpy.asarray (codes)
+        if codes.dtype.kind not in 'ui':
+            raise ValueError('Invalid display codes of type %s, expecting integers' % (str(codes.dtype)))
+        if codes.size > 0 and (numpy.min (codes) < 0 or numpy.max (codes) >= len (table)):
+            raise ValueError('Invalid display codes, expecting the range 0 - %d' % (len (table) - 1))
+        return table [codes]
+
+    # Color clipping
+
+    def clip_rgb_color (self, rgb_color):
+        '''Convert a linear rgb color (nominal range 0.0 - 1.0), into a displayable
+        irgb color with values in the range (0 - 255), clipping as necessary.
+
+        The return value is a tuple, the first element is the clipped irgb color,
+        and the second element is a tuple indicating which (if any) clipping processes were used.
+        '''
+        clipped_chromaticity = False
+        clipped_intensity = False
+
+        rgb = rgb_color.copy()
+
+        # clip chromaticity if needed (negative rgb values)
+        if self.clip_method == CLIP_CLAMP_TO_ZERO:
+            # set negative rgb values to zero
+            if rgb [0] < 0.0:
+                rgb [0] = 0.0
+                clipped_chromaticity = True
+            if rgb [1] < 0.0:
+                rgb [1] = 0.0
+                clipped_chromaticity = True
+            if rgb [2] < 0.0:
+                rgb [2] = 0.0
+                clipped_chromaticity = True
+        elif self.clip_method == CLIP_ADD_WHITE:
+            # add enough white to make all rgb values nonnegative
+            # find max negative rgb (or 0.0 if all non-negative), we need that much white
+            rgb_min = min (0.0, min (rgb))
+            # get max positive component
+            rgb_max = max (rgb)
+            # get scaling factor to maintain max rgb after adding white
+            scaling = 1.0
+            if rgb_max > 0.0:
+                scaling = rgb_max / (rgb_max - rgb_min)
+            # add enough white to cancel this out, maintaining the maximum of rgb
+            if rgb_min < 0.0:
+                rgb [0] = scaling * (rgb [0] - rgb_min);
+                rgb [1] = scaling * (rgb [1] - rgb_min);
+                rgb [2] = scaling * (rgb [2] - rgb_min);
+                clipped_chromaticity = True
+        else:
+            raise ValueError('Invalid color clipping method %s' % (str(self.clip_method)))
+
+        # clip intensity if needed (rgb values > 1.0) by scaling
+        rgb_max = max (rgb)
+        # we actually don't overflow until 255.0 * intensity > 255.5, so instead of 1.0 use ...
+        intensity_cutoff = 1.0 + (0.5 / 255.0)
+        if rgb_max > intensity_cutoff:
+            # must scale intensity, so max value is intensity_cutoff
+            scaling = intensity_cutoff / rgb_max
+            rgb *= scaling
+            clipped_intensity = True
+
+        # gamma correction
+        for index in range (0, 3):
+            rgb [index] = self._display_from_linear (rgb [index])
+
+        # scale to 0 - 255
+        ir = round (255.0 * rgb [0])
+        ig = round (255.0 * rgb [1])
+        ib = round (255.0 * rgb [2])
+        # ensure that values are in the range 0-255
+        ir = min (255, max (0, ir))
+        ig = min (255, max (0, ig))
+        ib = min (255, max (0, ib))
+        irgb = irgb_color (ir, ig, ib)
+        return (irgb, (clipped_chromaticity, clipped_intensity))
+
+    def clip_rgb_colors (self, rgb_colors, dtype = numpy.uint8, out = None, overwrite_input = False):
+        '''Convert an array of linear rgb colors (nominal range 0.0 - 1.0), with shape (..., 3),
+        into displayable irgb colors, clipping as necessary.  See clip_rgb_colors() for details.'''
+        max_value = _display_code_max (dtype)
+
+        if overwrite_input:
+            rgb = _as_float (rgb_colors)
+        else:
+            rgb = numpy.array (_as_float (rgb_colors))
+        assert (rgb.ndim >= 1 and rgb.shape [-1] == 3), 'Expecting rgb colors with shape (..., 3), instead shape is %s' % (str (rgb.shape))
+
+        # clip chromaticity if needed (negative rgb values)
+        rgb_min = numpy.min (rgb, axis=-1, keepdims=True)
+        clipped_chromaticity = (rgb_min [..., 0] < 0.0)
+        if self.clip_method == CLIP_CLAMP_TO_ZERO:
+            # set negative rgb values to zero
+            numpy.maximum (rgb, 0.0, out=rgb)
+        elif self.clip_method == CLIP_ADD_WHITE:
+            # add enough white to make all rgb values nonnegative,
+            # scaled to maintain the maximum of rgb (if positive)
+            rgb_min = numpy.minimum (rgb_min, 0.0)
+            rgb_max = numpy.max (rgb, axis=-1, keepdims=True)
+            scaling = numpy.ones_like (rgb_max)
+            numpy.divide (rgb_max, rgb_max - rgb_min, out=scaling, where=(rgb_max > 0.0))
+            # colors without negative values have rgb_min = 0.0 and scaling = 1.0, so are unchanged
+            rgb -= rgb_min
+            rgb *= scaling
+        else:
+            raise ValueError('Invalid color clipping method %s' % (str(self.clip_method)))
+
+        # clip intensity if needed (rgb values > 1.0) by scaling
+        rgb_max = numpy.max (rgb, axis=-1, keepdims=True)
+        # we actually don't overflow until max_value * intensity > max_value + 0.5, so instead of 1.0 use ...
+        intensity_cutoff = 1.0 + (0.5 / max_value)
+        clipped_intensity = (rgb_max [..., 0] > intensity_cutoff)
+        # must scale intensity, so max value is intensity_cutoff
+        scaling = numpy.ones_like (rgb_max)
+        numpy.divide (intensity_cutoff, rgb_max, out=scaling, where=(rgb_max > intensity_cutoff))
+        rgb *= scaling
+
+        # gamma correction, and scale to 0 - max_value, with the lookup table if available
+        if self.has_gamma_encode_table():
+            out = self.display_codes_from_linear (rgb, dtype, out=out)
+            return (out, clipped_chromaticity, clipped_intensity)
+        rgb = _as_float (self._display_from_linear_array (rgb))
+
+        # scale to 0 - max_value, rounding half to even like round(),
+        # and ensure that values are in that range
+        rgb *= max_value
+        numpy.rint (rgb, out=rgb)
+        numpy.clip (rgb, 0, max_value, out=rgb)
+        if out is None:
+            out = numpy.empty (rgb.shape, dtype)
+        out [...] = rgb
+        return (out, clipped_chromaticity, clipped_intensity)
+
+    # Conversions with displayable irgb colors
+
+    def irgb_from_rgb (self, rgb):
+        '''Convert a (linear) rgb value (range 0.0 - 1.0) into a 0-255 displayable integer irgb value (range 0 - 255).'''
+        (irgb, (clipped_chrom, clipped_int)) = self.clip_rgb_color (rgb)
+        return irgb
+
+    def rgb_from_irgb (self, irgb, dtype = None):
+        '''Convert a displayable (gamma corrected) irgb value (range 0 - 255) into a linear rgb value (range 0.0 - 1.0).'''
+        irgb_array = numpy.asarray (irgb)
+        float_type = get_float_type (None, dtype)
+        if irgb_array.dtype.kind in 'ui' and (irgb_array.size == 0 or (numpy.min (irgb_array) >= 0 and numpy.max (irgb_array) <= 255)):
+            # the usual case, use the lookup table
+            return self.linear_from_display_codes (irgb_array, float_type=float_type)
+        # otherwise scale to 0.0 - 1.0 and gamma adjust, for colors of any shape (..., 3)
+        rgb = self._linear_from_display (numpy.asarray (irgb_array, dtype=float) / 255.0)
+        return numpy.asarray (rgb, dtype=float_type)
+
+    def irgb_string_from_rgb (self, rgb):
+        '''Clip the rgb color, convert to a displayable color, and convert to a hex string.'''
+        return irgb_string_from_irgb (self.irgb_from_rgb (rgb))
+
+    def irgb_from_xyz (self, xyz):
+        '''Convert an xyz color directly into a displayable irgb color.'''
+        return self.irgb_from_rgb (self.rgb_from_xyz (xyz))
+
+    def irgb_string_from_xyz (self, xyz):
+        '''Convert an xyz color directly into a displayable irgb color hex string.'''
+        return self.irgb_string_from_rgb (self.rgb_from_xyz (xyz))
+
+# Number of ColorSpaces that are saved for reuse, with their gamma tables
+COLOR_SPACE_CACHE_SIZE = 32
+
+# The most recently used ColorSpaces, by their settings, least recently used first.
+# The lock guards the dictionary, so that threads can share the ColorSpaces.
+_color_spaces = collections.OrderedDict()
+_color_spaces_lock = threading.Lock()
+
+def _color_space_key (settings):
+    '''Get a hashable key for the settings of a ColorSpace, as given to color_space().'''
+    key = []
+    for (name, value) in settings:
+        if isinstance (value, numpy.ndarray) or isinstance (value, (list, tuple)):
+            value = tuple (float (v) for v in numpy.ravel (value))
+        key.append ((name, value))
+    return tuple (key)
+
+def color_space (
+    phosphor_red   = SRGB_Red,
+    phosphor_green = SRGB_Green,
+    phosphor_blue  = SRGB_Blue,
+    white_point    = SRGB_White,
+    luv_lab_white_point = None,
+    display_from_linear_function = srgb_gamma_invert,
+    linear_from_display_function = srgb_gamma_correct,
+    gamma = STANDARD_GAMMA,
+    clip_method = CLIP_ADD_WHITE):
+    '''Get the ColorSpace with these settings.  The arguments are as for init(),
+    init_Luv_Lab_white_point(), init_gamma_correction() and init_clipping().
+    If luv_lab_white_point is None, white_point is used.
+
+    The ColorSpace is made the first time these settings are asked for, and the same one returned after that,
+    unless more than COLOR_SPACE_CACHE_SIZE other settings have been asked for since.'''
+    if luv_lab_white_point is None:
+        luv_lab_white_point = white_point
+    key = _color_space_key ([
+        ('phosphor_red',   phosphor_red),
+        ('phosphor_green', phosphor_green),
+        ('phosphor_blue',  phosphor_blue),
+        ('white_point',    white_point),
+        ('luv_lab_white_point', luv_lab_white_point),
+        ('display_from_linear_function', display_from_linear_function),
+        ('linear_from_display_function', linear_from_display_function),
+        ('gamma', gamma),
+        ('clip_method', clip_method)])
+    with _color_spaces_lock:
+        space = _color_spaces.get (key)
+        if space is not None:
+            _color_spaces.move_to_end (key)
+            return space
+    space = ColorSpace (
+        phosphor_red, phosphor_green, phosphor_blue, white_point, luv_lab_white_point,
+        display_from_linear_function, linear_from_display_function, gamma, clip_method)
+    with _color_spaces_lock:
+        # another thread may have made the same ColorSpace meanwhile, if so use that one
+        space = _color_spaces.setdefault (key, space)
+        _color_spaces.move_to_end (key)
+        while len (_color_spaces) > COLOR_SPACE_CACHE_SIZE:
+            _color_spaces.popitem (last=False)
+    return space
+
+# The current ColorSpace, used by the module conversion functions
+_color_space = None
+
+def get_color_space ():
+    '''Get the current ColorSpace, which the module conversion functions use.'''
+    return _color_space
+
+def set_color_space (space):
+    '''Make space the current ColorSpace, which the module conversion functions use.
+    The module settings (PhosphorRed, rgb_from_xyz_matrix, display_from_linear_component, etc.)
+    are updated to match it.'''
+    global _color_space
+    global PhosphorRed, PhosphorGreen, PhosphorBlue, PhosphorWhite
+    global xyz_from_rgb_matrix, rgb_from_xyz_matrix
+    global _reference_white, _reference_u_prime, _reference_v_prime
+    global display_from_linear_component, linear_from_display_component, gamma_exponent
+    global _clip_method
+    PhosphorRed   = space.phosphor_red.copy()
+    PhosphorGreen = space.phosphor_green.copy()
+    PhosphorBlue  = space.phosphor_blue.copy()
+    PhosphorWhite = space.white_point.copy()
+    xyz_from_rgb_matrix = space.xyz_from_rgb_matrix
+    rgb_from_xyz_matrix = space.rgb_from_xyz_matrix
+    _reference_white   = space.reference_white
+    _reference_u_prime = space.reference_u_prime
+    _reference_v_prime = space.reference_v_prime
+    display_from_linear_component = space.display_from_linear_function
+    linear_from_display_component = space.linear_from_display_function
+    gamma_exponent = space.gamma
+    _clip_method = space.clip_method
+    _color_space = space
+
 #
 # Initialization - Initialize to sRGB at module startup.
 #   If a different rgb model is needed, then the startup can be re-done to set the new conditions.
@@ -0,0 +1,156 @@
+'''
+datatables.py - Precompiled binary copies of the tabulated data that ColorPy uses.
+
+Description:
+
+The 1931 CIE XYZ matching functions and the CIE Illuminant D65 spectrum are
+tabulated at 1 nm increments in the text files data/ciexyz31_1.txt and
+data/Illuminantd65.txt.  Parsing these is slow, and keeping them as Python
+list literals in the source makes the modules slow to import, so ColorPy
+ships them as numpy binary files (data/*.npy), which are loaded only when
+they are first needed.
+
+The binary files are built from the text files by build_tables().
+Run this module as a script to rebuild them:
+
+python datatables.py
+
+Constants and Functions:
+
+CIEXYZ_1931_TABLE   = 'ciexyz31_1'
+ILLUMINANT_D65_TABLE = 'Illuminantd65'
+    Names of the available tables.
+    CIEXYZ_1931_TABLE has one row for each wavelength (nm) and four columns: wl, x, y, z.
+    ILLUMINANT_D65_TABLE has one row for each wavelength (nm) and two columns: wl, intensity.
+
+def init (memory_map = False) -
+    Specify if the tables should be memory-mapped from the files, rather than read
+    into memory, and discard any tables already loaded.
+
+def get_table (name) -
+    Get the named table, as a read-only 2D numpy array.
+    The table is loaded from its binary file on the first call, and saved for later calls.
+
+def read_text_table (name) -
+    Read the named table from its original text file, as a 2D numpy array.
+
+def build_table (name) -
+    Rebuild the binary file for the named table from its text file.
+
+def build_tables () -
+    Rebuild the binary files for all the tables.
+
+References:
+
+CVRL Color and Vision Database - http://cvrl.ioo.ucl.ac.uk/index.htm - (accessed 17 Sep 2008)
+    Color and Vision Research Laboratories.
+    Provides a set of data sets related to color vision.
+    ColorPy uses the tables from this site for the 1931 CIE XYZ matching functions,
+    and for Illuminant D65, both at 1 nm wavelength increments.
+
+License:
+
+This file is part of ColorPy.
+
+ColorPy is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+ColorPy is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with ColorPy.  If not, see <http://www.gnu.org/licenses/>.
+'''
+from __future__ import print_function
+
+import os
+import numpy
+
+# directory holding the text and binary data files
+DATA_DIR = os.path.join (os.path.dirname (os.path.abspath (__file__)), 'data')
+
+# available tables, and the number of columns in each
+CIEXYZ_1931_TABLE    = 'ciexyz31_1'
+ILLUMINANT_D65_TABLE = 'Illuminantd65'
+
+_table_columns = {
+    CIEXYZ_1931_TABLE    : 4,
+    ILLUMINANT_D65_TABLE : 2,
+}
+
+# tables that have been loaded so far, by name
+_tables = {}
+_memory_map = False
+
+def init (memory_map = False):
+    '''Specify if the tables should be memory-mapped from the files, rather than read
+    into memory, and discard any tables already loaded.'''
+    global _memory_map
+    _memory_map = memory_map
+    _tables.clear()
+
+def _check_name (name):
+    '''Raise a ValueError if there is no table of that name.'''
+    if name not in _table_columns:
+        raise ValueError ('Invalid data table name %s' % str (name))
+
+def _text_filename (name):
+    '''Get the path of the original text file for the table.'''
+    return os.path.join (DATA_DIR, name + '.txt')
+
+def _binary_filename (name):
+    '''Get the path of the binary (.npy) file for the table.'''
+    return os.path.join (DATA_DIR, name + '.npy')
+
+def get_table (name):
+    '''Get the named table, as a read-only 2D numpy array.
+    The table is loaded from its binary file on the first call, and saved for later calls.'''
+    table = _tables.get (name)
+    if table is None:
+        _check_name (name)
+        if _memory_map:
+            table = numpy.load (_binary_filename (name), mmap_mode='r')
+        else:
+            table = numpy.load (_binary_filename (name))
+            table.flags.writeable = False
+        _tables [name] = table
+    return table
+
+def read_text_table (name):
+    '''Read the named table from its original text file, as a 2D numpy array.
+
+    The files are comma separated, one wavelength per line.
+    They may end with a DOS end-of-file marker (Ctrl-Z), which is ignored.'''
+    _check_name (name)
+    num_columns = _table_columns [name]
+    rows = []
+    with open (_text_filename (name)) as f:
+        for line in f:
+            line = line.strip().strip ('\x1a')
+            if not line:
+                continue
+            row = [float (field) for field in line.split (',')]
+            assert (len (row) == num_columns), 'Expecting %d columns in %s but found %d' % (num_columns, name, len (row))
+            rows.append (row)
+    return numpy.array (rows, dtype=float)
+
+def build_table (name):
+    '''Rebuild the binary file for the named table from its text file.'''
+    table = read_text_table (name)
+    numpy.save (_binary_filename (name), table)
+    # any loaded copy is now out of date
+    _tables.pop (name, None)
+    return table
+
+def build_tables ():
+    '''Rebuild the binary files for all the tables.'''
+    for name in sorted (_table_columns.keys()):
+        table = build_table (name)
+        print ('%s: %d rows, %d columns' % (_binary_filename (name), table.shape [0], table.shape [1]))
+
+if __name__ == '__main__':
+    build_tables()
@@ -0,0 +1,239 @@
+'''
+irgbtables.py - Tables of the xyz and Lab colors of all 8 bit irgb colors.
+
+Description:
+
+There are only 256 x 256 x 256 = 16777216 displayable 8 bit irgb colors, so rather than
+converting each pixel of an image with rgb_from_irgb(), xyz_from_rgb() and lab_from_xyz(),
+the xyz or Lab color of every irgb color can be calculated once, and saved in a file.
+Converting an image is then a single lookup (gather) of each pixel in the table.
+
+The tables are numpy (.npy) files of float32 (about 200 MB) or float16 (about 100 MB) values,
+with shape (16777216, 3), where the row for the irgb color (r, g, b) is (r * 65536 + g * 256 + b).
+They are memory-mapped read-only, rather than read into memory, so that several processes
+using the same table share one copy of it (in the operating system file cache), and only
+the parts of the table that are used are read.
+
+The table depends on the ColorSpace (the gamma correction, the xyz_from_rgb matrix and,
+for Lab, the reference white), so the file name includes a digest of these settings.
+When the settings change, the digest changes, and a new table is built the first time
+it is needed.  Tables are written to a temporary file, which is renamed when complete,
+so other processes never see a partly written table.
+
+Run this module as a script to build the tables for the default (sRGB) ColorSpace:
+
+python irgbtables.py [directory]
+
+Constants and Functions:
+
+LAB_TABLE = 'lab'
+XYZ_TABLE = 'xyz'
+    The kinds of tables.
+
+init (directory = DEFAULT_DIRECTORY, build = True) -
+    Specify the directory holding the table files, and whether missing tables should be built
+    (if not, a missing table is an error), and discard any tables already loaded.
+
+table_digest (kind = LAB_TABLE, color_space = None) -
+    Get the digest (a hex string) of the settings of the ColorSpace (by default, the current one)
+    that the table depends on.
+
+table_filename (kind = LAB_TABLE, color_space = None, dtype = numpy.float32) -
+    Get the path of the file for the table.
+
+build_table (kind = LAB_TABLE, color_space = None, dtype = numpy.float32) -
+    Calculate the table, and write it to its file.  Return the path of the file.
+
+get_table (kind = LAB_TABLE, color_space = None, dtype = numpy.float32) -
+    Get the table, as a read-only memory-mapped array of shape (16777216, 3),
+    building it first if needed.  Tables are saved for later calls.
+
+lab_from_irgb (irgbs, color_space = None, dtype = numpy.float32, out = None) -
+    Convert the irgb colors, an integer array of shape (..., 3), into Lab colors, with the table.
+    The result has shape (..., 3) and type dtype, and can optionally be placed into an existing array out.
+
+xyz_from_irgb (irgbs, color_space = None, dtype = numpy.float32, out = None) -
+    Convert the irgb colors into xyz colors, with the table.
+
+License:
+
+This file is part of ColorPy.
+
+ColorPy is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+ColorPy is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with ColorPy.  If not, see <http://www.gnu.org/licenses/>.
+'''
+from __future__ import print_function
+
+import hashlib
+import os
+import sys
+import tempfile
+import numpy
+
+import colorpy.colormodels as colormodels
+
+# The kinds of tables
+LAB_TABLE = 'lab'
+XYZ_TABLE = 'xyz'
+
+# Change this if the way the tables are calculated changes, so that old files are not used.
+TABLE_VERSION = 1
+
+# Number of irgb colors in the tables
+NUM_IRGB_COLORS = 256 * 256 * 256
+
+DEFAULT_DIRECTORY = os.path.join (os.path.expanduser ('~'), '.cache', 'colorpy')
+
+_table_types = (numpy.dtype (numpy.float32), numpy.dtype (numpy.float16))
+
+_directory = DEFAULT_DIRECTORY
+_build = True
+# tables that have been loaded so far, by file name
+_tables = {}
+
+def init (directory = DEFAULT_DIRECTORY, build = True):
+    '''Specify the directory holding the table files, and whether missing tables should be built
+    (if not, a missing table is an error), and discard any tables already loaded.'''
+    global _directory, _build
+    _directory = directory
+    _build = build
+    _tables.clear()
+
+def _check_kind (kind):
+    '''Raise a ValueError if there is no table of that kind.'''
+    if kind not in (LAB_TABLE, XYZ_TABLE):
+        raise ValueError('Invalid irgb table kind %s' % str (kind))
+
+def _check_dtype (dtype):
+    '''Get the numpy type for the table, which must be float32 or float16.'''
+    dtype = numpy.dtype (dtype)
+    if dtype not in _table_types:
+        raise ValueError('Invalid irgb table type %s, expecting float32 or float16' % str (dtype))
+    return dtype
+
+def _get_color_space (color_space):
+    '''Get the ColorSpace, by default the current one.'''
+    if color_space is None:
+        return colormodels.get_color_space()
+    return color_space
+
+def table_digest (kind = LAB_TABLE, color_space = None):
+    '''Get the digest (a hex string) of the settings of the ColorSpace (by default, the current one)
+    that the table depends on.
+
+    The gamma correction is included as the linear values of the 256 display codes,
+    so that any gamma function (not just the standard ones) is described exactly.'''
+    _check_kind (kind)
+    space = _get_color_space (color_space)
+    digest = hashlib.sha1()
+    digest.update (('colorpy irgb table %d %s' % (TABLE_VERSION, kind)).encode ('ascii'))
+    digest.update (numpy.ascontiguousarray (space.linear_from_display_codes (numpy.arange (256))).tobytes())
+    digest.update (numpy.ascontiguousarray (space.xyz_from_rgb_matrix).tobytes())
+    if kind == LAB_TABLE:
+        digest.update (numpy.ascontiguousarray (space.reference_white).tobytes())
+    return digest.hexdigest()
+
+def table_filename (kind = LAB_TABLE, color_space = None, dtype = numpy.float32):
+    '''Get the path of the file for the table.'''
+    dtype = _check_dtype (dtype)
+    return os.path.join (_directory, 'irgb_%s_%s_%s.npy' % (kind, dtype.name, table_digest (kind, color_space) [:16]))
+
+# Number of irgb colors calculated at once, all those with the same red value.
+_BUILD_CHUNK_SIZE = 256 * 256
+
+def build_table (kind = LAB_TABLE, color_space = None, dtype = numpy.float32):
+    '''Calculate the table, and write it to its file.  Return the path of the file.'''
+    dtype = _check_dtype (dtype)
+    space = _get_color_space (color_space)
+    filename = table_filename (kind, space, dtype)
+    directory = os.path.dirname (filename)
+    if not os.path.isdir (directory):
+        os.makedirs (directory)
+    # linear values of each component, and of the green and blue components for each chunk
+    linear = space.linear_from_display_codes (numpy.arange (256))
+    gb_linear = numpy.empty ((_BUILD_CHUNK_SIZE, 3))
+    gb_linear [:, 1] = numpy.repeat (linear, 256)
+    gb_linear [:, 2] = numpy.tile (linear, 256)
+    (handle, temp_filename) = tempfile.mkstemp (suffix='.npy', dir=directory)
+    os.close (handle)
+    try:
+        table = numpy.lib.format.open_memmap (temp_filename, mode='w+', dtype=dtype, shape=(NUM_IRGB_COLORS, 3))
+        for red in range (256):
+            gb_linear [:, 0] = linear [red]
+            xyz = space.xyz_from_rgb (gb_linear)
+            if kind == LAB_TABLE:
+                xyz = space.lab_from_xyz (xyz)
+            start = red * _BUILD_CHUNK_SIZE
+            table [start:start + _BUILD_CHUNK_SIZE] = xyz
+        table.flush()
+        del table
+        os.replace (temp_filename, filename)
+    finally:
+        # the temporary file remains only if the table was not completed
+        if os.path.exists (temp_filename):
+            os.remove (temp_filename)
+    # any loaded copy is now out of date
+    _tables.pop (filename, None)
+    return filename
+
+def get_table (kind = LAB_TABLE, color_space = None, dtype = numpy.float32):
+    '''Get the table, as a read-only memory-mapped array of shape (16777216, 3),
+    building it first if needed.  Tables are saved for later calls.'''
+    filename = table_filename (kind, color_space, dtype)
+    table = _tables.get (filename)
+    if table is None:
+        if not os.path.exists (filename):
+            if not _build:
+                raise ValueError('Missing irgb table %s' % filename)
+            build_table (kind, color_space, dtype)
+        table = numpy.load (filename, mmap_mode='r')
+        assert (table.shape == (NUM_IRGB_COLORS, 3)), 'Expecting irgb table with shape (%d, 3), instead shape is %s' % (NUM_IRGB_COLORS, str (table.shape))
+        _tables [filename] = table
+    return table
+
+def _table_rows (irgbs):
+    '''Get the rows of the table for the irgb colors, an integer array of shape (..., 3).'''
+    irgbs = numpy.asarray (irgbs)
+    assert (irgbs.ndim >= 1 and irgbs.shape [-1] == 3), 'Expecting irgb colors with shape (..., 3), instead shape is %s' % (str (irgbs.shape))
+    if irgbs.dtype.kind not in 'ui':
+        raise ValueError('Invalid irgb colors of type %s, expecting integers' % (str(irgbs.dtype)))
+    if irgbs.dtype != numpy.uint8 and irgbs.size > 0 and (numpy.min (irgbs) < 0 or numpy.max (irgbs) > 255):
+        raise ValueError('Invalid irgb colors, expecting the range 0 - 255')
+    rows = irgbs [..., 0].astype (numpy.intp) << 16
+    rows |= irgbs [..., 1].astype (numpy.intp) << 8
+    rows |= irgbs [..., 2].astype (numpy.intp)
+    return rows
+
+def _convert (kind, irgbs, color_space, dtype, out):
+    '''Look up the irgb colors in the table.'''
+    table = get_table (kind, color_space, dtype)
+    rows = _table_rows (irgbs)
+    return numpy.take (table, rows, axis=0, out=out)
+
+def lab_from_irgb (irgbs, color_space = None, dtype = numpy.float32, out = None):
+    '''Convert the irgb colors, an integer array of shape (..., 3), into Lab colors, with the table.'''
+    return _convert (LAB_TABLE, irgbs, color_space, dtype, out)
+
+def xyz_from_irgb (irgbs, color_space = None, dtype = numpy.float32, out = None):
+    '''Convert the irgb colors, an integer array of shape (..., 3), into xyz colors, with the table.'''
+    return _convert (XYZ_TABLE, irgbs, color_space, dtype, out)
+
+def main (directory = DEFAULT_DIRECTORY):
+    '''Build the float32 tables for the default ColorSpace.'''
+    init (directory)
+    space = colormodels.color_space()
+    for kind in [LAB_TABLE, XYZ_TABLE]:
+        print (build_table (kind, space))
+
+if __name__ == '__main__':
+    main (*sys.argv [1:])
@@ -0,0 +1,426 @@
+'''
+lut3d.py - Three dimensional lookup tables for color conversions.
+
+Description:
+
+Converting each pixel of an image from xyz (or Lab) to a displayable color
+takes a matrix product, clipping and gamma correction.  For quick previews,
+the whole conversion can instead be sampled once, on a grid of N x N x N colors
+(typically N = 17, 33 or 65), and each pixel then found by interpolating in
+the grid, which costs the same whatever the conversion.
+
+A Lut3D holds the samples of any conversion function (which takes an array of
+colors with shape (..., 3) and returns an array with shape (..., C)), and
+evaluates it for arrays of colors, with either trilinear interpolation, between
+the 8 corners of the grid cell, or tetrahedral interpolation, between 4 of them.
+Tetrahedral interpolation is faster, and exact along the neutral (diagonal) axis
+of each cell, but which is more accurate depends on the conversion.
+
+The interpolation is only approximate, most of all where the conversion curves
+sharply, such as the sRGB gamma correction near black, or is not smooth, such as
+at the edges of the displayable colors, where clipping starts.  error_report()
+measures the error, against the exact conversion, at random colors in the grid.
+For the standard xyz and Lab tables, with 33 x 33 x 33 grids, the mean error is
+about one 8 bit display code (or less), but the largest errors, for colors near
+black or outside the displayable range, are many codes.
+
+The tables can be saved to, and loaded from, numpy (.npy) files, or .cube files,
+the text format for 3D LUTs used by many image and video programs.
+
+Run this module as a script to print the errors of the standard tables:
+
+python lut3d.py
+
+Constants and Functions:
+
+INTERPOLATE_TRILINEAR   = 0
+INTERPOLATE_TETRAHEDRAL = 1
+    Available interpolation methods.  Tetrahedral is the default.
+
+class Lut3D (table, domain_min = (0.0, 0.0, 0.0), domain_max = (1.0, 1.0, 1.0), title = '') -
+    Represents a lookup table, with the samples table, of shape (N, N, N, C), where table [i, j, k]
+    is the conversion of the color at grid point (i, j, k), spaced evenly from domain_min to domain_max.
+
+On these class objects, the following functions are available:
+
+evaluate (colors, method = INTERPOLATE_TETRAHEDRAL, out = None) -
+    Interpolate the conversion of the colors, an array of shape (..., 3), into an array of shape (..., C).
+    Colors outside the domain are clamped to it.
+
+evaluate_irgb (colors, dtype = numpy.uint8, method = INTERPOLATE_TETRAHEDRAL, out = None) -
+    Interpolate a table of display values (range 0.0 - 1.0), and convert them to integer display codes.
+
+save (filename) -
+    Save the table, as a .npy file or a .cube file, by the extension of the filename.
+
+build_lut (function, size = 33, domain_min = (0.0, 0.0, 0.0), domain_max = (1.0, 1.0, 1.0), title = '') -
+    Sample the conversion function on a grid of size x size x size colors, and return the Lut3D.
+
+load_lut (filename) -
+    Load a Lut3D from a .npy or .cube file.
+
+display_rgb_from_xyz (color_space = None) -
+    Get the function that converts xyz colors into display values (range 0.0 - 1.0),
+    by clipping and gamma correction in the color space (by default, the current one).
+
+display_rgb_from_lab (color_space = None) -
+    Get the function that converts Lab colors into display values (range 0.0 - 1.0).
+
+build_xyz_lut (size = 33, color_space = None) -
+build_lab_lut (size = 33, color_space = None) -
+    Build a Lut3D, over the colors that can be displayed, for these conversions.
+
+error_report (lut, function, num_samples = 100000, method = INTERPOLATE_TETRAHEDRAL, scale = 255.0) -
+    Compare the table against the exact conversion function, at random colors in the domain,
+    and the centers of the grid cells.  Return a dictionary of the errors, measured as the
+    largest difference in any component, times scale (so by default in 8 bit display codes).
+
+print_error_report (report) -
+    Print the result of error_report().
+
+References:
+
+Kasson, Nin and Plouffe, An Analysis of Selected Computer Interchange Color Spaces,
+    ACM Transactions on Graphics, Vol. 11, No. 4, October 1992.
+    Compares trilinear and tetrahedral interpolation for color conversions.
+
+Cube LUT Specification, Version 1.0, Adobe Systems, 2013.
+    The .cube file format.
+
+License:
+
+This file is part of ColorPy.
+
+ColorPy is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+ColorPy is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with ColorPy.  If not, see <http://www.gnu.org/licenses/>.
+'''
+from __future__ import print_function
+
+import os
+import numpy
+
+import colorpy.colormodels as colormodels
+
+# Available interpolation methods
+INTERPOLATE_TRILINEAR   = 0
+INTERPOLATE_TETRAHEDRAL = 1
+
+# Number of colors interpolated at once, so that the temporary arrays are small.
+LUT_EVALUATE_CHUNK_SIZE = 65536
+
+class Lut3D:
+    '''A three dimensional lookup table, with the samples of a color conversion on an evenly spaced grid.'''
+    def __init__ (self, table, domain_min = (0.0, 0.0, 0.0), domain_max = (1.0, 1.0, 1.0), title = ''):
+        table = numpy.array (table, dtype=float)
+        assert (table.ndim == 4 and table.shape [0] == table.shape [1] == table.shape [2] and table.shape [0] >= 2), \
+            'Expecting a table with shape (N, N, N, C), instead shape is %s' % (str (table.shape))
+        self.table = table
+        self.size = table.shape [0]
+        self.num_outputs = table.shape [3]
+        self.domain_min = numpy.array (domain_min, dtype=float)
+        self.domain_max = numpy.array (domain_max, dtype=float)
+        if not numpy.all (self.domain_max > self.domain_min):
+            raise ValueError('Invalid lookup table domain %s - %s' % (str (self.domain_min), str (self.domain_max)))
+        self.title = title
+        # the table as one row per grid point, and the step in rows along each axis
+        self._rows = table.reshape ((-1, self.num_outputs))
+        self._strides = numpy.array ([self.size * self.size, self.size, 1])
+        self._scale = (self.size - 1) / (self.domain_max - self.domain_min)
+
+    def _cells (self, colors):
+        '''Get the index of the first corner of the grid cell of each color, and the fractions
+        (0.0 - 1.0) of the way across the cell along each axis.'''
+        t = (colors - self.domain_min) * self._scale
+        numpy.clip (t, 0.0, self.size - 1, out=t)
+        corner = numpy.minimum (t.astype (numpy.intp), self.size - 2)
+        t -= corner
+        index = corner [:, 0] * self._strides [0]
+        index += corner [:, 1] * self._strides [1]
+        index += corner [:, 2]
+        return (index, t)
+
+    def _trilinear (self, colors, out):
+        '''Trilinear interpolation of the colors, an array of shape (M, 3), into out, of shape (M, C).'''
+        (index, f) = self._cells (colors)
+        out [...] = 0.0
+        for corner in range (8):
+            # bits of the corner number choose the low or high side of the cell on each axis
+            weight = numpy.ones (len (colors))
+            offset = 0
+            for axis in range (3):
+                if (corner >> (2 - axis)) & 1:
+                    weight *= f [:, axis]
+                    offset += self._strides [axis]
+                else:
+                    weight *= (1.0 - f [:, axis])
+            out += weight [:, numpy.newaxis] * self._rows [index + offset]
+
+    def _tetrahedral (self, colors, out):
+        '''Tetrahedral interpolation of the colors, an array of shape (M, 3), into out, of shape (M, C).
+
+        The cell is split into six tetrahedra, which all share the corners (0,0,0) and (1,1,1).
+        The path from (0,0,0) to (1,1,1) through the corners of the tetrahedron holding the color
+        steps first along the axis with the largest fraction, and last along the axis with the smallest.'''
+        (index, f) = self._cells (colors)
+        f_hi = numpy.max (f, axis=1)
+        f_lo = numpy.min (f, axis=1)
+        f_mid = f [:, 0] + f [:, 1]
+        f_mid += f [:, 2]
+        f_mid -= f_hi
+        f_mid -= f_lo
+        index1 = numpy.take (self._strides, numpy.argmax (f, axis=1))
+        index1 += index
+        index3 = index + numpy.sum (self._strides)
+        index2 = index3 - numpy.take (self._strides, numpy.argmin (f, axis=1))
+        # sum of the corner values, times the weights, which add to 1.0
+        corner = numpy.empty (out.shape)
+        numpy.take (self._rows, index, axis=0, out=out)
+        out *= (1.0 - f_hi) [:, numpy.newaxis]
+        for (corner_index, weight) in [(index1, f_hi - f_mid), (index2, f_mid - f_lo), (index3, f_lo)]:
+            numpy.take (self._rows, corner_index, axis=0, out=corner)
+            corner *= weight [:, numpy.newaxis]
+            out += corner
+
+    def evaluate (self, colors, method = INTERPOLATE_TETRAHEDRAL, out = None):
+        '''Interpolate the conversion of the colors, an array of shape (..., 3), into an array of shape (..., C).
+        Colors outside the domain are clamped to it.'''
+        if method == INTERPOLATE_TRILINEAR:
+            interpolate = self._trilinear
+        elif method == INTERPOLATE_TETRAHEDRAL:
+            interpolate = self._tetrahedral
+        else:
+            raise ValueError('Invalid interpolation method %s' % (str(method)))
+        colors = numpy.asarray (colors, dtype=float)
+        assert (colors.ndim >= 1 and colors.shape [-1] == 3), 'Expecting colors with shape (..., 3), instead shape is %s' % (str (colors.shape))
+        result_shape = colors.shape [:-1] + (self.num_outputs,)
+        if out is None:
+            out = numpy.empty (result_shape)
+        assert out.shape == result_shape, 'Expecting out to have shape %s' % (str (result_shape))
+        # flat views of the colors and result, with a temporary result if out is not a contiguous float array
+        result = out if (out.flags.c_contiguous and out.dtype == numpy.float64) else numpy.empty (result_shape)
+        flat_colors = colors.reshape ((-1, 3))
+        flat_result = result.reshape ((-1, self.num_outputs))
+        for start in range (0, flat_colors.shape [0], LUT_EVALUATE_CHUNK_SIZE):
+            stop = min (start + LUT_EVALUATE_CHUNK_SIZE, flat_colors.shape [0])
+            interpolate (flat_colors [start:stop], flat_result [start:stop])
+        if result is not out:
+            out [...] = result
+        return out
+
+    def evaluate_irgb (self, colors, dtype = numpy.uint8, method = INTERPOLATE_TETRAHEDRAL, out = None):
+        '''Interpolate a table of display values (range 0.0 - 1.0), and convert them to integer display codes,
+        of type dtype (uint8 for 0 - 255, uint16 for 0 - 65535).'''
+        max_value = numpy.iinfo (dtype).max
+        values = self.evaluate (colors, method)
+        values *= max_value
+        numpy.rint (values, out=values)
+        numpy.clip (values, 0, max_value, out=values)
+        if out is None:
+            out = numpy.empty (values.shape, dtype)
+        out [...] = values
+        return out
+
+    def save (self, filename):
+        '''Save the table, as a .npy file or a .cube file, by the extension of the filename.'''
+        extension = os.path.splitext (filename) [1].lower()
+        if extension == '.npy':
+            _save_npy (self, filename)
+        elif extension == '.cube':
+            _save_cube (self, filename)
+        else:
+            raise ValueError('Invalid lookup table file %s, expecting .npy or .cube' % str (filename))
+
+def build_lut (function, size = 33, domain_min = (0.0, 0.0, 0.0), domain_max = (1.0, 1.0, 1.0), title = ''):
+    '''Sample the conversion function on a grid of size x size x size colors, and return the Lut3D.
+    The function must accept an array of colors of shape (..., 3), and return an array of shape (..., C).'''
+    if size < 2:
+        raise ValueError('Invalid lookup table size %s' % str (size))
+    domain_min = numpy.array (domain_min, dtype=float)
+    domain_max = numpy.array (domain_max, dtype=float)
+    axes = [numpy.linspace (domain_min [i], domain_max [i], size) for i in range (3)]
+    grid = numpy.stack (numpy.meshgrid (axes [0], axes [1], axes [2], indexing='ij'), axis=-1)
+    table = numpy.asarray (function (grid), dtype=float)
+    if table.shape [:3] != (size, size, size) or table.ndim != 4:
+        raise ValueError('Invalid conversion function, expecting results with shape (..., C), instead shape is %s' % str (table.shape))
+    return Lut3D (table, domain_min, domain_max, title)
+
+# The .npy file holds a single record, with the title, the domain and the table.
+
+def _save_npy (lut, filename):
+    '''Save the lookup table as a .npy file.'''
+    record_type = numpy.dtype ([
+        ('title', 'U%d' % max (1, len (lut.title))),
+        ('domain_min', float, (3,)),
+        ('domain_max', float, (3,)),
+        ('table', float, lut.table.shape)])
+    record = numpy.zeros ((), record_type)
+    record ['title'] = lut.title
+    record ['domain_min'] = lut.domain_min
+    record ['domain_max'] = lut.domain_max
+    record ['table'] = lut.table
+    numpy.save (filename, record)
+
+def _load_npy (filename):
+    '''Load a lookup table from a .npy file.  A plain array is taken as the table, over the domain 0.0 - 1.0.'''
+    record = numpy.load (filename)
+    if record.dtype.names is None:
+        return Lut3D (record)
+    title = str (record ['title']) if 'title' in record.dtype.names else ''
+    return Lut3D (record ['table'], record ['domain_min'], record ['domain_max'], title)
+
+# The .cube file lists the grid points with the first component changing fastest.
+
+def _save_cube (lut, filename):
+    '''Save the lookup table as a .cube file.  Only 3 component tables can be saved this way.'''
+    if lut.num_outputs != 3:
+        raise ValueError('Invalid lookup table for a .cube file, expecting 3 outputs, not %d' % (lut.num_outputs))
+    with open (filename, 'w') as f:
+        if lut.title:
+            f.write ('TITLE "%s"\n' % lut.title)
+        f.write ('LUT_3D_SIZE %d\n' % lut.size)
+        f.write ('DOMAIN_MIN %.10g %.10g %.10g\n' % tuple (lut.domain_min))
+        f.write ('DOMAIN_MAX %.10g %.10g %.10g\n' % tuple (lut.domain_max))
+        rows = lut.table.transpose ((2, 1, 0, 3)).reshape ((-1, 3))
+        numpy.savetxt (f, rows, fmt='%.10g')
+
+def _load_cube (filename):
+    '''Load a lookup table from a .cube file.'''
+    title = ''
+    size = None
+    domain_min = (0.0, 0.0, 0.0)
+    domain_max = (1.0, 1.0, 1.0)
+    rows = []
+    with open (filename) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith ('#'):
+                continue
+            fields = line.split()
+            keyword = fields [0]
+            if keyword == 'TITLE':
+                title = line [len (keyword):].strip().strip ('"')
+            elif keyword == 'LUT_3D_SIZE':
+                size = int (fields [1])
+            elif keyword == 'DOMAIN_MIN':
+                domain_min = [float (field) for field in fields [1:4]]
+            elif keyword == 'DOMAIN_MAX':
+                domain_max = [float (field) for field in fields [1:4]]
+            elif keyword [0].isalpha():
+                raise ValueError('Invalid .cube file %s, unsupported keyword %s' % (str (filename), keyword))
+            else:
+                rows.append ([float (field) for field in fields])
+    if size is None or len (rows) != size * size * size:
+        raise ValueError('Invalid .cube file %s, expecting LUT_3D_SIZE and size**3 rows' % str (filename))
+    table = numpy.array (rows).reshape ((size, size, size, 3)).transpose ((2, 1, 0, 3))
+    return Lut3D (table, domain_min, domain_max, title)
+
+def load_lut (filename):
+    '''Load a Lut3D from a .npy or .cube file.'''
+    extension = os.path.splitext (filename) [1].lower()
+    if extension == '.npy':
+        return _load_npy (filename)
+    elif extension == '.cube':
+        return _load_cube (filename)
+    raise ValueError('Invalid lookup table file %s, expecting .npy or .cube' % str (filename))
+
+#
+# Standard conversions, to display values (range 0.0 - 1.0).
+#
+# The display values are found as 16 bit display codes, with the gamma lookup table,
+# which is (much) more precise than the 8 bit codes the table will usually be used for.
+#
+
+def display_rgb_from_xyz (color_space = None):
+    '''Get the function that converts xyz colors into display values (range 0.0 - 1.0),
+    by clipping and gamma correction in the color space (by default, the current one).'''
+    if color_space is None:
+        color_space = colormodels.get_color_space()
+    def function (xyz):
+        irgb = color_space.clip_rgb_colors (color_space.rgb_from_xyz (xyz), numpy.uint16) [0]
+        return irgb / 65535.0
+    return function
+
+def display_rgb_from_lab (color_space = None):
+    '''Get the function that converts Lab colors into display values (range 0.0 - 1.0),
+    by clipping and gamma correction in the color space (by default, the current one).'''
+    if color_space is None:
+        color_space = colormodels.get_color_space()
+    from_xyz = display_rgb_from_xyz (color_space)
+    def function (Lab):
+        return from_xyz (color_space.xyz_from_lab (Lab))
+    return function
+
+def build_xyz_lut (size = 33, color_space = None):
+    '''Build a Lut3D for display_rgb_from_xyz(), over the xyz colors of the displayable rgb cube.'''
+    if color_space is None:
+        color_space = colormodels.get_color_space()
+    # the largest X, Y and Z are those of white, as all the matrix entries are positive
+    domain_max = color_space.xyz_from_rgb (numpy.ones (3))
+    return build_lut (display_rgb_from_xyz (color_space), size, (0.0, 0.0, 0.0), domain_max, 'ColorPy xyz to display rgb')
+
+def build_lab_lut (size = 33, color_space = None):
+    '''Build a Lut3D for display_rgb_from_lab(), over L = 0 - 100, and a, b = -128 - 128.'''
+    return build_lut (display_rgb_from_lab (color_space), size, (0.0, -128.0, -128.0), (100.0, 128.0, 128.0), 'ColorPy Lab to display rgb')
+
+#
+# Measurement of the interpolation errors.
+#
+
+def error_report (lut, function, num_samples = 100000, method = INTERPOLATE_TETRAHEDRAL, scale = 255.0):
+    '''Compare the table against the exact conversion function, at random colors in the domain,
+    and the centers of the grid cells.  Return a dictionary of the errors, measured as the
+    largest difference in any component, times scale (so by default in 8 bit display codes).
+
+    The dictionary has the number of colors compared ('num_samples'), the 'max', 'mean',
+    'rms' and 99th percentile ('p99') errors, and the color with the largest error ('worst_color').'''
+    random_state = numpy.random.RandomState (0)
+    span = lut.domain_max - lut.domain_min
+    random_colors = lut.domain_min + span * random_state.random_sample ((num_samples, 3))
+    # centers of the cells, furthest from the samples
+    centers = (numpy.arange (lut.size - 1) + 0.5) / (lut.size - 1)
+    center_colors = numpy.stack (numpy.meshgrid (centers, centers, centers, indexing='ij'), axis=-1).reshape ((-1, 3))
+    colors = numpy.concatenate ((random_colors, lut.domain_min + span * center_colors))
+    exact = numpy.asarray (function (colors), dtype=float)
+    approx = lut.evaluate (colors, method)
+    errors = scale * numpy.max (numpy.abs (approx - exact), axis=-1)
+    worst = numpy.argmax (errors)
+    report = {
+        'num_samples' : len (colors),
+        'max'         : float (errors [worst]),
+        'mean'        : float (numpy.mean (errors)),
+        'rms'         : float (numpy.sqrt (numpy.mean (errors * errors))),
+        'p99'         : float (numpy.percentile (errors, 99.0)),
+        'worst_color' : colors [worst],
+    }
+    return report
+
+def print_error_report (report, title = ''):
+    '''Print the result of error_report().'''
+    print ('%s%d colors: max %.4f  mean %.4f  rms %.4f  99%% %.4f  worst at %s' % (
+        (title + ': ') if title else '', report ['num_samples'], report ['max'], report ['mean'],
+        report ['rms'], report ['p99'], str (report ['worst_color'])))
+
+def main ():
+    '''Print the errors of the standard tables, for each size and interpolation method.'''
+    methods = [(INTERPOLATE_TRILINEAR, 'trilinear'), (INTERPOLATE_TETRAHEDRAL, 'tetrahedral')]
+    for (build, function, name) in [
+        (build_xyz_lut, display_rgb_from_xyz(), 'xyz'),
+        (build_lab_lut, display_rgb_from_lab(), 'Lab')]:
+        for size in [17, 33, 65]:
+            lut = build (size)
+            for (method, method_name) in methods:
+                report = error_report (lut, function, method=method)
+                print_error_report (report, '%s %2d %-11s' % (name, size, method_name))
+
+if __name__ == '__main__':
+    main()
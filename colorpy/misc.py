@@ -128,11 +128,10 @@ primary_names = [ 'Black', 'Red', 'Green', 'Blue', 'Yellow', 'Magenta', 'Cyan',
 
 def colorstring_patch_plot (colorstrings, color_names, title, filename, num_across=6):
     '''Color patch plot for colors specified as hex strings.'''
-    rgb_colors = []
-    for color in colorstrings:
-        irgb = colormodels.irgb_from_irgb_string (color)
-        rgb = colormodels.rgb_from_irgb (irgb)
-        rgb_colors.append (rgb)
+    (irgb_colors, invalid) = colormodels.irgb_colors_from_irgb_strings (colorstrings)
+    if numpy.any (invalid):
+        raise ValueError('Invalid color hex strings %s' % str ([colorstrings [i] for i in numpy.flatnonzero (invalid)]))
+    rgb_colors = list (colormodels.rgb_from_irgb (irgb_colors))
     plots.rgb_patch_plot (
         rgb_colors,
         color_names,
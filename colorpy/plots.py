@@ -231,11 +231,8 @@ def spectrum_subplot (spectrum):
     It is assumed that this function is being called by one that handles those things.'''
     (num_wl, num_cols) = spectrum.shape
     # get rgb colors for each wavelength
-    rgb_colors = numpy.empty ((num_wl, 3))
-    for i in range (0, num_wl):
-        wl_nm = spectrum [i][0]
-        xyz = ciexyz.xyz_from_wavelength (wl_nm)
-        rgb_colors [i] = colormodels.rgb_from_xyz (xyz)
+    xyz_colors = ciexyz.xyz_from_wavelength (spectrum [:,0])
+    rgb_colors = colormodels.rgb_from_xyz (xyz_colors)
     # scale to make brightest rgb value = 1.0
     rgb_max = numpy.max (rgb_colors)
     scaling = 1.0 / rgb_max
@@ -364,11 +361,8 @@ def visible_spectrum_plot ():
     spectrum = ciexyz.empty_spectrum()
     (num_wl, num_cols) = spectrum.shape
     # get rgb colors for each wavelength
-    rgb_colors = numpy.empty ((num_wl, 3))
-    for i in range (0, num_wl):
-        xyz = ciexyz.xyz_from_wavelength (spectrum [i][0])
-        rgb = colormodels.rgb_from_xyz (xyz)
-        rgb_colors [i] = rgb
+    xyz_colors = ciexyz.xyz_from_wavelength (spectrum [:,0])
+    rgb_colors = colormodels.rgb_from_xyz (xyz_colors)
     # scale to make brightest rgb value = 1.0
     rgb_max = numpy.max (rgb_colors)
     scaling = 1.0 / rgb_max
@@ -389,13 +383,10 @@ def cie_matching_functions_plot ():
     spectrum_x = ciexyz.empty_spectrum()
     spectrum_y = ciexyz.empty_spectrum()
     spectrum_z = ciexyz.empty_spectrum()
-    (num_wl, num_cols) = spectrum_x.shape
-    for i in range (0, num_wl):
-        wl_nm = spectrum_x [i][0]
-        xyz = ciexyz.xyz_from_wavelength (wl_nm)
-        spectrum_x [i][1] = xyz [0]
-        spectrum_y [i][1] = xyz [1]
-        spectrum_z [i][1] = xyz [2]
+    xyz_colors = ciexyz.xyz_from_wavelength (spectrum_x [:,0])
+    spectrum_x [:,1] = xyz_colors [:,0]
+    spectrum_y [:,1] = xyz_colors [:,1]
+    spectrum_z [:,1] = xyz_colors [:,2]
     # Plot three separate subplots, with CIE X in the first, CIE Y in the second, and CIE Z in the third.
     # Label appropriately for the whole plot.
     pylab.clf ()
@@ -425,12 +416,9 @@ def scattered_visual_brightness ():
     '''Plot the perceptual brightness of Rayleigh scattered light.'''
     # get 'spectra' for y matching functions and multiply by 1/wl^4
     spectrum_y = ciexyz.empty_spectrum()
-    (num_wl, num_cols) = spectrum_y.shape
-    for i in range (0, num_wl):
-        wl_nm = spectrum_y [i][0]
-        rayleigh = math.pow (550.0 / wl_nm, 4)
-        xyz = ciexyz.xyz_from_wavelength (wl_nm)
-        spectrum_y [i][1] = xyz [1] * rayleigh
+    rayleigh = numpy.power (550.0 / spectrum_y [:,0], 4)
+    xyz_colors = ciexyz.xyz_from_wavelength (spectrum_y [:,0])
+    spectrum_y [:,1] = xyz_colors [:,1] * rayleigh
     pylab.clf ()
     pylab.title ('Perceptual Brightness of Rayleigh Scattered Light')
     pylab.xlabel ('Wavelength (nm)')
@@ -451,11 +439,12 @@ def shark_fin_plot ():
     (num_colors, num_cols) = xy_list.shape
     for i in range (0, num_colors):
         colormodels.xyz_normalize (xy_list [i])
-    # get phosphor colors and normalize
-    red   = colormodels.PhosphorRed
-    green = colormodels.PhosphorGreen
-    blue  = colormodels.PhosphorBlue
-    white = colormodels.PhosphorWhite
+    # get phosphor colors and normalize (copies, so the module settings are not changed)
+    space = colormodels.get_color_space()
+    red   = space.phosphor_red.copy()
+    green = space.phosphor_green.copy()
+    blue  = space.phosphor_blue.copy()
+    white = space.white_point.copy()
     colormodels.xyz_normalize (red)
     colormodels.xyz_normalize (green)
     colormodels.xyz_normalize (blue)
@@ -573,14 +562,9 @@ def visible_spectrum_table (filename='visible_spectrum.html'):
     spectrum = ciexyz.empty_spectrum()
     (num_wl, num_cols) = spectrum.shape
     # get rgb colors for each wavelength
-    rgb_colors_1 = numpy.empty ((num_wl, 3))
-    rgb_colors_2 = numpy.empty ((num_wl, 3))
-    for i in range (0, num_wl):
-        xyz = ciexyz.xyz_from_wavelength (spectrum [i][0])
-        rgb_1 = colormodels.rgb_from_xyz (xyz)
-        rgb_2 = colormodels.brightest_rgb_from_xyz (xyz)
-        rgb_colors_1 [i] = rgb_1
-        rgb_colors_2 [i] = rgb_2
+    xyz_colors = ciexyz.xyz_from_wavelength (spectrum [:,0])
+    rgb_colors_1 = colormodels.rgb_from_xyz (xyz_colors)
+    rgb_colors_2 = colormodels.brightest_rgb_from_xyz (xyz_colors)
     # scale 1 to make brightest rgb value = 1.0
     rgb_max = numpy.max (rgb_colors_1)
     scaling = 1.0 / rgb_max
@@ -63,13 +63,14 @@ You should have received a copy of the GNU Lesser General Public License
 along with ColorPy.  If not, see <http://www.gnu.org/licenses/>.
 '''
 import math
-import numpy, pylab
+import numpy
 
 import colormodels
 import ciexyz
 import illuminants
 import blackbody
-import plots
+
+# The plots module (and matplotlib) is only imported by the figure functions.
 
 def rayleigh_scattering (wl_nm):
     '''Get the Rayleigh scattering factor for the wavelength.
@@ -108,6 +109,7 @@ def rayleigh_illuminated_color (illuminant):
 
 def rayleigh_patch_plot (named_illuminant_list, title, filename):
     '''Make a patch plot of the Rayleigh scattering color for each illuminant.'''
+    import plots
     xyz_colors = []
     color_names = []
     for (illuminant, name) in named_illuminant_list:
@@ -118,13 +120,15 @@ def rayleigh_patch_plot (named_illuminant_list, title, filename):
 
 def rayleigh_color_vs_illuminant_temperature_plot (T_list, title, filename):
     '''Make a plot of the Rayleigh scattered color vs. temperature of blackbody illuminant.'''
+    import pylab
+    import plots
     num_T = len (T_list)
-    rgb_list = numpy.empty ((num_T, 3))
+    xyz_list = numpy.empty ((num_T, 3))
     for i in range (0, num_T):
         T_i = T_list [i]
         illuminant = illuminants.get_blackbody_illuminant (T_i)
-        xyz = rayleigh_illuminated_color (illuminant)
-        rgb_list [i] = colormodels.rgb_from_xyz (xyz)
+        xyz_list [i] = rayleigh_illuminated_color (illuminant)
+    rgb_list = colormodels.rgb_from_xyz (xyz_list)
     plots.color_vs_param_plot (
         T_list,
         rgb_list,
@@ -137,6 +141,7 @@ def rayleigh_color_vs_illuminant_temperature_plot (T_list, title, filename):
 
 def rayleigh_spectrum_plot (illuminant, title, filename):
     '''Plot the spectrum of Rayleigh scattering of the specified illuminant.'''
+    import plots
     spectrum = rayleigh_illuminated_spectrum (illuminant)
     plots.spectrum_plot (
         spectrum,
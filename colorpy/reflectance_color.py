@@ -3,13 +3,149 @@ Created on Wed Dec 28 15:45:34 2016
 
 functions for calculating the color values in various color spaces from a reflectance spectrum
 
+The xyz color of a reflectance spectrum is computed with a tristimulus weighting
+table (see weighting_table()), in the manner of ASTM E308, so that converting
+many reflectances under the same illuminant costs one dot product each.
+
 .. moduleauthor:: Annie Stephenson <stephenson@g.harvard.edu>
 """
 
+import collections
+import threading
 import numpy as np
-import matplotlib.pyplot as plt
 import colorpy.ciexyz, colorpy.illuminants, colorpy.colormodels
-from scipy import interpolate
+
+# Bandpass correction coefficient of Stearns and Stearns, as used in ASTM E308
+BANDPASS_ALPHA = 0.083
+
+# Number of weighting tables that are saved for reuse
+WEIGHTING_TABLE_CACHE_SIZE = 16
+
+# Weighting tables for the most recently used (illuminant, wavelengths, bandpass) combinations,
+# least recently used first
+_weighting_tables = collections.OrderedDict()
+
+# Guards _weighting_tables, so that threads can share the tables
+_weighting_tables_lock = threading.Lock()
+
+def _get_illuminant(illuminant_name):
+    """
+    Get the named illuminant, as a (shared, read-only) ColorPy spectrum at 1 nm increments.
+    The names are those of colorpy.illuminants.get_illuminant(): 'D65', 'A', 'E' or 'BB<T>'.
+    """
+    return colorpy.illuminants.get_illuminant(illuminant_name)
+
+def weighting_table(wavelengths = np.arange(360, 831), illuminant_name = 'D65', bandpass_correction = False):
+    """
+    Get the tristimulus weighting table, in the manner of ASTM E308, for
+    reflectances sampled at the given wavelengths.
+
+    Parameters
+    ----------
+    wavelengths: 1D numpy array
+        wavelengths of the reflectance values, in increasing order, within 360-830 nm.
+        These need not be evenly spaced, and may be coarse (e.g. 10 or 20 nm)
+    illuminant_name: string
+        illuminant, as in color_from_refl(). Default is D65
+    bandpass_correction: boolean
+        if True, the weights also apply the Stearns and Stearns bandpass
+        correction, for reflectances measured with a triangular bandpass equal to
+        the wavelength spacing. Default is False
+
+    Returns
+    -------
+    table: 2D numpy array, shape (len(wavelengths), 3)
+        weights such that the xyz color of a reflectance array refl is
+        np.dot(refl, table). The table is shared and read-only
+
+    Notes
+    -----
+    The product of the illuminant and the CIE 1931 2 degree matching functions is
+    taken at the 1 nm table increments, and the reflectance is taken as linear
+    between the given wavelengths, so each weight is the sum of that product
+    times the linear interpolation weight of the wavelength. At 1 nm increments
+    this is the same as multiplying by the illuminant and integrating. The table
+    is scaled so that a perfect reflector over 360-830 nm has Y = 1.0, as the
+    illuminant does.
+
+    Tables for the most recently used combinations of illuminant, wavelengths and
+    bandpass correction are saved, so repeated use costs only a lookup. The saved
+    tables may be used from several threads.
+    """
+    wavelengths = np.asarray(wavelengths, dtype=float)
+    # equivalent names, like 'D65' and 'd65', share a table
+    key = (colorpy.illuminants.illuminant_key(illuminant_name), wavelengths.tobytes(), bool(bandpass_correction))
+    with _weighting_tables_lock:
+        table = _weighting_tables.get(key)
+        if table is not None:
+            _weighting_tables.move_to_end(key)
+            return table
+
+    assert wavelengths.ndim == 1 and len(wavelengths) >= 2, 'expecting at least two wavelengths'
+    assert np.all(np.diff(wavelengths) > 0), 'expecting wavelengths in increasing order'
+    assert wavelengths[0] >= 360, 'expecting reflectance for wavelength values > 360 nm'
+    assert wavelengths[-1] <= 830, 'expecting reflectance for wavelength values < 830 nm'
+
+    # illuminant times matching functions, at the 1 nm table wavelengths, scaled so Y = 1
+    illuminant = _get_illuminant(illuminant_name)
+    table_wl = illuminant[:, 0]
+    product = illuminant[:, 1, np.newaxis] * colorpy.ciexyz.integration_kernel(table_wl)
+    product /= np.sum(product[:, 1])
+
+    # spread each 1 nm sample over the two neighboring reflectance wavelengths
+    inside = (table_wl >= wavelengths[0]) & (table_wl <= wavelengths[-1])
+    table_wl = table_wl[inside]
+    product = product[inside]
+    index = np.searchsorted(wavelengths, table_wl, side='right') - 1
+    index = np.clip(index, 0, len(wavelengths) - 2)
+    t = ((table_wl - wavelengths[index]) / (wavelengths[index + 1] - wavelengths[index]))[:, np.newaxis]
+    table = np.zeros((len(wavelengths), 3))
+    np.add.at(table, index, (1.0 - t) * product)
+    np.add.at(table, index + 1, t * product)
+
+    if bandpass_correction:
+        # corrected reflectance is np.dot(bandpass, refl), so fold the transpose into the weights
+        num_wl = len(wavelengths)
+        bandpass = np.zeros((num_wl, num_wl))
+        i = np.arange(1, num_wl - 1)
+        bandpass[i, i] = 1.0 + 2.0 * BANDPASS_ALPHA
+        bandpass[i, i - 1] = -BANDPASS_ALPHA
+        bandpass[i, i + 1] = -BANDPASS_ALPHA
+        bandpass[0, 0] = bandpass[-1, -1] = 1.0 + BANDPASS_ALPHA
+        bandpass[0, 1] = bandpass[-1, -2] = -BANDPASS_ALPHA
+        table = np.dot(bandpass.T, table)
+
+    table.flags.writeable = False
+    with _weighting_tables_lock:
+        _weighting_tables[key] = table
+        while len(_weighting_tables) > WEIGHTING_TABLE_CACHE_SIZE:
+            _weighting_tables.popitem(last=False)
+    return table
+
+def xyz_from_refl(refl, wavelengths = np.arange(360, 831), illuminant_name = 'D65', bandpass_correction = False):
+    """
+    Calculate the xyz colors of one or many reflectance spectra, with a
+    single product against the weighting table.
+
+    Parameters
+    ----------
+    refl: numpy array, shape (..., len(wavelengths))
+        reflectance values corresponding to wavelengths. Each 1D slice along
+        the last axis is one reflectance spectrum
+    wavelengths: 1D numpy array
+        wavelengths corresponding to reflectance values
+    illuminant_name: string
+        illuminant, as in color_from_refl(). Default is D65
+    bandpass_correction: boolean
+        whether to apply the bandpass correction, see weighting_table()
+
+    Returns
+    -------
+    xyz: numpy array, shape (..., 3)
+        xyz colors of the reflected light
+    """
+    table = weighting_table(wavelengths, illuminant_name, bandpass_correction)
+    return np.matmul(np.asarray(refl, dtype=float), table)
 
 def color_from_refl(refl, wavelengths = np.arange(360, 831), illuminant_name = 'D65', show_spectrum_plot = False):
     """
@@ -22,8 +158,9 @@ def color_from_refl(refl, wavelengths = np.arange(360, 831), illuminant_name = '
     wavelengths: 1D numpy array
         wavelengths corresponding to reflectance values
     illuninant_name : string
-        any illuminant described in colorpy.illuminants. Default is set to D65 
-        which simulates normal sunlight conditions
+        any illuminant named in colorpy.illuminants.get_illuminant(): 'D65',
+        'A', 'E' (constant) or 'BB<T>' for a blackbody at T kelvin (e.g.
+        'BB5778'). Default is set to D65 which simulates normal sunlight conditions
     show_spectrum_plot: boolean
         determines whether to plot power spectrum plot and color swatch. Default
         set to False. 
@@ -41,37 +178,41 @@ def color_from_refl(refl, wavelengths = np.arange(360, 831), illuminant_name = '
     an error
 
     The illuminant (light source) is "D65" (standard daylight) by default,
-    which approximates natural daylight. You can use any other function in 
-    colorpy.illuminants instead if you like, or make your own array with the 
-    same format.
+    which approximates natural daylight. You can name any other illuminant
+    from colorpy.illuminants.get_illuminant() instead if you like.
+
+    The xyz color is found with the weighting table from weighting_table(),
+    which treats the reflectance as linear between the given wavelengths.
 
     """
-    if illuminant_name == 'D65':
-        illuminant = colorpy.illuminants.get_illuminant_D65()
-    else:
-        raise ValueError("That illuminant hasn't been added...yet. Use D65 for now")
-    
+    refl = np.asarray(refl, dtype=float)
     assert len(refl) == len(wavelengths), 'expecting reflectance of length equal to wavelength length'
-    assert all(0 <= x <= 1 for x in refl), 'expecting reflectance less than or equal to 1'
+    assert np.all((0 <= refl) & (refl <= 1)), 'expecting reflectance less than or equal to 1'
     assert min(wavelengths) >= 360, 'expecting reflectance for wavelength values > 360 nm'
     assert max(wavelengths) <=830, 'expecting reflectance for wavelength values < 830 nm'
-    
-    f_illuminant = interpolate.interp1d(illuminant[:,0], illuminant[:,1])
-    illum = f_illuminant(wavelengths)
 
-    # multiply illuminant power by reflectance to find the power of the reflected light
-    refl_power = illum*refl
-    spectrum = np.transpose(np.vstack((wavelengths, refl_power)))
+    # the weighting table combines the illuminant power with the matching functions
+    xyz = xyz_from_refl(refl, wavelengths, illuminant_name)
 
     # plots the power spectrum of reflected light vs wavelength
     if show_spectrum_plot:
+        # plotting is only imported when it is needed
+        import matplotlib.pyplot as plt
+        import colorpy.plots as plots
+
+        illuminant = _get_illuminant(illuminant_name)
+        illum = np.interp(wavelengths, illuminant[:,0], illuminant[:,1])
+
+        # multiply illuminant power by reflectance to find the power of the reflected light
+        refl_power = illum*refl
+        spectrum = np.transpose(np.vstack((wavelengths, refl_power)))
+
         plt.figure()
-        colorpy.plots.spectrum_plot(spectrum,
-                                    title='Reflected light',
-                                    filename='temp.png',
-                                    ylabel='Power')	
+        plots.spectrum_plot(spectrum,
+                            title='Reflected light',
+                            filename='temp.png',
+                            ylabel='Power')	
     
-    xyz = colorpy.ciexyz.xyz_from_spectrum(spectrum)
     lab = colorpy.colormodels.lab_from_xyz(xyz)
     luv = colorpy.colormodels.luv_from_xyz(xyz)
     rgb = colorpy.colormodels.rgb_from_xyz(xyz)
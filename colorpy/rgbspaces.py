@@ -0,0 +1,237 @@
+'''
+rgbspaces.py - Named rgb display spaces, and conversions between them.
+
+Description:
+
+colormodels.py has the phosphor chromaticities of several rgb displays,
+but only one of them can be set up at a time, with colormodels.init().
+This module keeps a registry of named rgb spaces, each a colormodels.ColorSpace
+(with its xyz/rgb matrices already calculated), and converts colors directly
+from one rgb space to another.
+
+Linear rgb colors are converted from space a to space b with a single 3x3 matrix,
+the product (rgb_from_xyz_matrix of b) * (xyz_from_rgb_matrix of a), rather than
+by going through xyz.  The matrix for each pair of spaces is calculated the
+first time it is needed, and the most recently used are kept.
+
+Displayable (gamma corrected) colors are converted by decoding with the gamma
+lookup table of space a, converting with the matrix, and then clipping and gamma
+correcting for space b, all with array operations, a chunk of colors at a time.
+
+All of the spaces use D65 as the white point, so no chromatic adaptation is needed.
+(The white point is unspecified for the Foley and Judd phosphors, and D65 is used,
+as colormodels.init() does by default.)
+
+Available spaces:
+
+'sRGB'       - sRGB standard, with the sRGB gamma correction.
+'HDTV'       - HDTV standard phosphors.
+'SMPTE'      - SMPTE phosphors.
+'NTSC'       - NTSC phosphors (original standard for TV).
+'FoleyShort' - Typical short persistence phosphors, from Foley/Van Dam.
+'FoleyLong'  - Typical long persistence phosphors, from Foley/Van Dam.
+'Judd'       - Typical TV phosphors, from Judd/Wyszecki.
+    These all use the sRGB gamma correction, which is the ColorPy default.
+
+'DisplayP3'  - Display P3 (DCI-P3 primaries with D65 white), with the sRGB gamma correction.
+'AdobeRGB'   - Adobe RGB (1998), with a simple power law gamma of 563/256 (about 2.2).
+'Rec2020'    - ITU-R BT.2020, with the BT.1886 display gamma of 2.4.
+
+Functions:
+
+register_rgb_space (
+    name,
+    phosphor_red,
+    phosphor_green,
+    phosphor_blue,
+    white_point = colormodels.WhiteD65,
+    display_from_linear_function = colormodels.srgb_gamma_invert,
+    linear_from_display_function = colormodels.srgb_gamma_correct,
+    gamma = colormodels.STANDARD_GAMMA,
+    clip_method = colormodels.CLIP_ADD_WHITE) -
+
+    Add (or replace) a named rgb space, with the settings as for colormodels.color_space().
+    Return the colormodels.ColorSpace for it.
+
+rgb_space (name) -
+    Get the colormodels.ColorSpace for the named rgb space.
+
+rgb_space_names () -
+    Get a list of the names of the registered rgb spaces.
+
+In the following functions, the source and target spaces can be given either
+by name, or as colormodels.ColorSpace objects.
+
+rgb_from_rgb_matrix (source, target) -
+    Get the 3x3 matrix that converts linear rgb colors in the source space to the target space.
+
+rgb_from_rgb (rgb, source, target, out = None) -
+    Convert linear rgb colors, an array of shape (..., 3), from the source space to the target space.
+    The result can optionally be placed into an existing array out, of the same shape.
+
+irgb_from_irgb (irgbs, source, target, dtype = numpy.uint8, out = None) -
+    Convert displayable irgb colors, an array of shape (..., 3) of codes in the range of dtype
+    (uint8 for 0 - 255, uint16 for 0 - 65535), from the source space to the target space.
+    The colors are clipped as needed for the target space.
+    The result, of type dtype, can optionally be placed into an existing array out.
+
+References:
+
+SMPTE RP 431-2, D-Cinema Quality - Reference Projector and Environment, 2011.
+    The DCI-P3 primaries, used with a D65 white point for Display P3.
+
+Adobe RGB (1998) Color Image Encoding, Version 2005-05, Adobe Systems, 2005.
+
+ITU-R Recommendation BT.2020, Parameter values for ultra-high definition television systems, 2012.
+
+ITU-R Recommendation BT.1886, Reference electro-optical transfer function for flat panel displays, 2011.
+
+License:
+
+This file is part of ColorPy.
+
+ColorPy is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+ColorPy is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with ColorPy.  If not, see <http://www.gnu.org/licenses/>.
+'''
+import collections
+import threading
+import numpy
+
+import colorpy.colormodels as colormodels
+
+# Gamma exponents for the wide gamut spaces
+ADOBE_RGB_GAMMA = 563.0 / 256.0
+BT1886_GAMMA    = 2.4
+
+# The registered spaces, by name, in the order registered
+_rgb_spaces = collections.OrderedDict()
+
+def register_rgb_space (
+    name,
+    phosphor_red,
+    phosphor_green,
+    phosphor_blue,
+    white_point = colormodels.WhiteD65,
+    display_from_linear_function = colormodels.srgb_gamma_invert,
+    linear_from_display_function = colormodels.srgb_gamma_correct,
+    gamma = colormodels.STANDARD_GAMMA,
+    clip_method = colormodels.CLIP_ADD_WHITE):
+    '''Add (or replace) a named rgb space, with the settings as for colormodels.color_space().
+    Return the colormodels.ColorSpace for it.'''
+    space = colormodels.color_space (
+        phosphor_red, phosphor_green, phosphor_blue, white_point,
+        display_from_linear_function = display_from_linear_function,
+        linear_from_display_function = linear_from_display_function,
+        gamma = gamma,
+        clip_method = clip_method)
+    _rgb_spaces [name] = space
+    return space
+
+def rgb_space (name):
+    '''Get the colormodels.ColorSpace for the named rgb space.'''
+    space = _rgb_spaces.get (name)
+    if space is None:
+        raise ValueError('Invalid rgb space name %s' % str (name))
+    return space
+
+def rgb_space_names ():
+    '''Get a list of the names of the registered rgb spaces.'''
+    return list (_rgb_spaces.keys())
+
+def _get_space (space):
+    '''Get the ColorSpace, given either its name or the ColorSpace itself.'''
+    if isinstance (space, str):
+        return rgb_space (space)
+    return space
+
+# Number of rgb to rgb matrices that are saved for reuse
+RGB_FROM_RGB_CACHE_SIZE = 64
+
+# The most recently used rgb to rgb matrices, by (source, target) ColorSpace, least recently used first
+_rgb_from_rgb_matrices = collections.OrderedDict()
+_rgb_from_rgb_matrices_lock = threading.Lock()
+
+def rgb_from_rgb_matrix (source, target):
+    '''Get the 3x3 matrix that converts linear rgb colors in the source space to the target space.'''
+    source = _get_space (source)
+    target = _get_space (target)
+    key = (source, target)
+    with _rgb_from_rgb_matrices_lock:
+        matrix = _rgb_from_rgb_matrices.get (key)
+        if matrix is None:
+            matrix = numpy.dot (target.rgb_from_xyz_matrix, source.xyz_from_rgb_matrix)
+            matrix.flags.writeable = False
+            _rgb_from_rgb_matrices [key] = matrix
+            while len (_rgb_from_rgb_matrices) > RGB_FROM_RGB_CACHE_SIZE:
+                _rgb_from_rgb_matrices.popitem (last=False)
+        else:
+            _rgb_from_rgb_matrices.move_to_end (key)
+    return matrix
+
+def rgb_from_rgb (rgb, source, target, out = None):
+    '''Convert linear rgb colors, an array of shape (..., 3), from the source space to the target space.'''
+    matrix = rgb_from_rgb_matrix (source, target)
+    return numpy.matmul (rgb, matrix.T, out=out)
+
+# Number of colors converted at once by irgb_from_irgb(), so that the temporary arrays are small.
+IRGB_FROM_IRGB_CHUNK_SIZE = 16384
+
+def irgb_from_irgb (irgbs, source, target, dtype = numpy.uint8, out = None):
+    '''Convert displayable irgb colors, an array of shape (..., 3) of codes in the range of dtype
+    (uint8 for 0 - 255, uint16 for 0 - 65535), from the source space to the target space.
+
+    Each chunk of colors is decoded with the gamma lookup table of the source space,
+    converted with rgb_from_rgb_matrix(), and then clipped and gamma corrected in place
+    for the target space, into the result (or the supplied array out), of type dtype.'''
+    source = _get_space (source)
+    target = _get_space (target)
+    matrix = rgb_from_rgb_matrix (source, target)
+    irgbs = numpy.asarray (irgbs)
+    assert (irgbs.ndim >= 1 and irgbs.shape [-1] == 3), 'Expecting irgb colors with shape (..., 3), instead shape is %s' % (str (irgbs.shape))
+    if out is None:
+        out = numpy.empty (irgbs.shape, dtype)
+    assert out.shape == irgbs.shape, 'Expecting out to have shape %s' % (str (irgbs.shape))
+    # flat views of the colors and result, with a temporary result if out is not contiguous
+    result = out if out.flags.c_contiguous else numpy.empty (out.shape, out.dtype)
+    colors = irgbs.reshape ((-1, 3))
+    converted = result.reshape ((-1, 3))
+    for start in range (0, colors.shape [0], IRGB_FROM_IRGB_CHUNK_SIZE):
+        stop = min (start + IRGB_FROM_IRGB_CHUNK_SIZE, colors.shape [0])
+        rgb = source.linear_from_display_codes (colors [start:stop], dtype)
+        numpy.matmul (rgb, matrix.T, out=rgb)
+        target.clip_rgb_colors (rgb, result.dtype, out=converted [start:stop], overwrite_input=True)
+    if result is not out:
+        out [...] = result
+    return out
+
+#
+# The standard spaces
+#
+
+register_rgb_space ('sRGB',       colormodels.SRGB_Red,       colormodels.SRGB_Green,       colormodels.SRGB_Blue,  colormodels.SRGB_White)
+register_rgb_space ('HDTV',       colormodels.HDTV_Red,       colormodels.HDTV_Green,       colormodels.HDTV_Blue)
+register_rgb_space ('SMPTE',      colormodels.SMPTE_Red,      colormodels.SMPTE_Green,      colormodels.SMPTE_Blue)
+register_rgb_space ('NTSC',       colormodels.NTSC_Red,       colormodels.NTSC_Green,       colormodels.NTSC_Blue)
+register_rgb_space ('FoleyShort', colormodels.FoleyShort_Red, colormodels.FoleyShort_Green, colormodels.FoleyShort_Blue)
+register_rgb_space ('FoleyLong',  colormodels.FoleyLong_Red,  colormodels.FoleyLong_Green,  colormodels.FoleyLong_Blue)
+register_rgb_space ('Judd',       colormodels.Judd_Red,       colormodels.Judd_Green,       colormodels.Judd_Blue)
+
+register_rgb_space ('DisplayP3',  colormodels.DisplayP3_Red,  colormodels.DisplayP3_Green,  colormodels.DisplayP3_Blue)
+register_rgb_space ('AdobeRGB',   colormodels.AdobeRGB_Red,   colormodels.AdobeRGB_Green,   colormodels.AdobeRGB_Blue,
+    display_from_linear_function = colormodels.simple_gamma_invert,
+    linear_from_display_function = colormodels.simple_gamma_correct,
+    gamma = ADOBE_RGB_GAMMA)
+register_rgb_space ('Rec2020',    colormodels.Rec2020_Red,    colormodels.Rec2020_Green,    colormodels.Rec2020_Blue,
+    display_from_linear_function = colormodels.simple_gamma_invert,
+    linear_from_display_function = colormodels.simple_gamma_correct,
+    gamma = BT1886_GAMMA)
@@ -0,0 +1,320 @@
+'''
+scalarcolors.py - Conversions of single colors, with plain Python floats and tuples.
+
+Description:
+
+The conversions in colormodels.py work on numpy arrays, which is the fast way to
+convert many colors at once.  But for a single color, making the small numpy arrays,
+and the numpy function calls, take much longer than the arithmetic itself.
+
+The functions here do the same conversions for one color at a time, using only Python
+floats, with the matrix entries, white point and gamma tables of each ColorSpace
+converted to Python floats and lists (once, the first time the ColorSpace is used).
+They accept any sequence of three numbers (tuple, list or numpy array) as the color,
+and return a tuple of three floats (or ints, for irgb colors).
+
+The results are the same as the colormodels functions, to rounding error.
+The irgb colors are the same exactly, as the gamma correction uses the same
+encoding thresholds as the colormodels lookup tables.
+
+Each function takes an optional color_space argument, a colormodels.ColorSpace,
+by default the current one (colormodels.get_color_space()).
+
+benchmarks.py compares the time per call with the colormodels functions.
+
+Functions:
+
+rgb_from_xyz (xyz, color_space = None) -
+    Convert an xyz color to linear rgb.
+
+xyz_from_rgb (rgb, color_space = None) -
+    Convert a linear rgb color to xyz.
+
+irgb_from_rgb (rgb, color_space = None) -
+    Convert a linear rgb color into a displayable irgb color (ints in the range 0 - 255),
+    clipping as necessary.  The same as the irgb color from colormodels.clip_rgb_color().
+
+rgb_from_irgb (irgb, color_space = None) -
+    Convert a displayable irgb color into a linear rgb color.
+
+irgb_from_xyz (xyz, color_space = None) -
+    Convert an xyz color directly into a displayable irgb color.
+
+irgb_string_from_irgb (irgb) -
+    Convert a displayable irgb color into a hex string, like '#AB13D2'.
+
+irgb_from_irgb_string (irgb_string) -
+    Convert a hex string, like '#AB13D2', into a displayable irgb color.
+
+irgb_string_from_rgb (rgb, color_space = None) -
+irgb_string_from_xyz (xyz, color_space = None) -
+    Convert a linear rgb or xyz color directly into a hex string.
+
+luv_from_xyz (xyz, color_space = None) -
+    Convert an xyz color to Luv.
+
+xyz_from_luv (luv, color_space = None) -
+    Convert a Luv color to xyz.
+
+lab_from_xyz (xyz, color_space = None) -
+    Convert an xyz color to Lab.
+
+xyz_from_lab (Lab, color_space = None) -
+    Convert a Lab color to xyz.
+
+License:
+
+This file is part of ColorPy.
+
+ColorPy is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+ColorPy is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with ColorPy.  If not, see <http://www.gnu.org/licenses/>.
+'''
+import bisect
+import collections
+import math
+import threading
+import numpy
+
+import colorpy.colormodels as colormodels
+
+# Cube root, for positive values.
+_cbrt = getattr (math, 'cbrt', None) or (lambda x: math.pow (x, 1.0 / 3.0))
+
+def _float_matrix (matrix):
+    '''Get the 3x3 numpy matrix as a tuple of rows, each a tuple of Python floats.'''
+    return tuple (tuple (float (value) for value in row) for row in matrix)
+
+class _ScalarSpace:
+    '''The settings of a ColorSpace, as Python floats and lists, for the scalar conversions.'''
+    def __init__ (self, space):
+        self.rgb_from_xyz_matrix = _float_matrix (space.rgb_from_xyz_matrix)
+        self.xyz_from_rgb_matrix = _float_matrix (space.xyz_from_rgb_matrix)
+        self.reference_white = tuple (float (value) for value in space.reference_white)
+        self.reference_u_prime = float (space.reference_u_prime)
+        self.reference_v_prime = float (space.reference_v_prime)
+        self.clip_add_white = (space.clip_method == colormodels.CLIP_ADD_WHITE)
+        # gamma correction, with the encoding thresholds (if available) and the decoding table
+        if space.has_gamma_encode_table():
+            self.encode_thresholds = space.gamma_encode_thresholds (numpy.uint8).tolist()
+        else:
+            self.encode_thresholds = None
+        self.display_from_linear = space.display_from_linear_component
+        self.linear_from_display = space.linear_from_display_component
+        self.decode_table = space.linear_from_display_codes (numpy.arange (256)).tolist()
+
+    def encode (self, x):
+        '''Gamma correct the linear component x, and convert to a display code 0 - 255.'''
+        if self.encode_thresholds is not None:
+            return bisect.bisect_right (self.encode_thresholds, x)
+        code = int (round (255.0 * float (self.display_from_linear (x))))
+        return min (255, max (0, code))
+
+    def decode (self, code):
+        '''Convert the display code into a linear component.'''
+        if type (code) is int and 0 <= code <= 255:
+            return self.decode_table [code]
+        return float (self.linear_from_display (float (code) / 255.0))
+
+# Number of ColorSpaces whose scalar settings are saved for reuse
+SCALAR_SPACE_CACHE_SIZE = 32
+
+# The scalar settings of the most recently used ColorSpaces, least recently used first
+_scalar_spaces = collections.OrderedDict()
+_scalar_spaces_lock = threading.Lock()
+
+def _get_space (color_space):
+    '''Get the scalar settings of the ColorSpace, by default the current one.'''
+    if color_space is None:
+        color_space = colormodels.get_color_space()
+    with _scalar_spaces_lock:
+        scalar_space = _scalar_spaces.get (color_space)
+        if scalar_space is not None:
+            _scalar_spaces.move_to_end (color_space)
+            return scalar_space
+    scalar_space = _ScalarSpace (color_space)
+    with _scalar_spaces_lock:
+        _scalar_spaces [color_space] = scalar_space
+        while len (_scalar_spaces) > SCALAR_SPACE_CACHE_SIZE:
+            _scalar_spaces.popitem (last=False)
+    return scalar_space
+
+# Conversions between xyz and linear rgb
+
+def _multiply (matrix, a, b, c):
+    '''Multiply the vector (a, b, c) by the matrix.'''
+    ((m00, m01, m02), (m10, m11, m12), (m20, m21, m22)) = matrix
+    return (
+        m00 * a + m01 * b + m02 * c,
+        m10 * a + m11 * b + m12 * c,
+        m20 * a + m21 * b + m22 * c)
+
+def rgb_from_xyz (xyz, color_space = None):
+    '''Convert an xyz color to linear rgb.'''
+    (x, y, z) = xyz
+    return _multiply (_get_space (color_space).rgb_from_xyz_matrix, x, y, z)
+
+def xyz_from_rgb (rgb, color_space = None):
+    '''Convert a linear rgb color to xyz.'''
+    (r, g, b) = rgb
+    return _multiply (_get_space (color_space).xyz_from_rgb_matrix, r, g, b)
+
+# Conversions between linear rgb and displayable irgb
+
+def _irgb_from_rgb (space, r, g, b):
+    '''Clip the linear rgb color, and convert to a displayable irgb color.  See colormodels.clip_rgb_color().'''
+    # clip chromaticity if needed (negative rgb values)
+    if space.clip_add_white:
+        # add enough white to make all rgb values nonnegative, maintaining the maximum of rgb
+        rgb_min = min (0.0, r, g, b)
+        if rgb_min < 0.0:
+            rgb_max = max (r, g, b)
+            scaling = 1.0
+            if rgb_max > 0.0:
+                scaling = rgb_max / (rgb_max - rgb_min)
+            r = scaling * (r - rgb_min)
+            g = scaling * (g - rgb_min)
+            b = scaling * (b - rgb_min)
+    else:
+        # set negative rgb values to zero
+        r = max (r, 0.0)
+        g = max (g, 0.0)
+        b = max (b, 0.0)
+    # clip intensity if needed (rgb values > 1.0) by scaling
+    rgb_max = max (r, g, b)
+    intensity_cutoff = 1.0 + (0.5 / 255.0)
+    if rgb_max > intensity_cutoff:
+        scaling = intensity_cutoff / rgb_max
+        r *= scaling
+        g *= scaling
+        b *= scaling
+    # gamma correction, and scale to 0 - 255
+    return (space.encode (r), space.encode (g), space.encode (b))
+
+def irgb_from_rgb (rgb, color_space = None):
+    '''Convert a linear rgb color into a displayable irgb color (ints in the range 0 - 255),
+    clipping as necessary.  The same as the irgb color from colormodels.clip_rgb_color().'''
+    (r, g, b) = rgb
+    return _irgb_from_rgb (_get_space (color_space), float (r), float (g), float (b))
+
+def rgb_from_irgb (irgb, color_space = None):
+    '''Convert a displayable irgb color into a linear rgb color.'''
+    (ir, ig, ib) = irgb
+    space = _get_space (color_space)
+    return (space.decode (int (ir)), space.decode (int (ig)), space.decode (int (ib)))
+
+def irgb_from_xyz (xyz, color_space = None):
+    '''Convert an xyz color directly into a displayable irgb color.'''
+    (x, y, z) = xyz
+    space = _get_space (color_space)
+    (r, g, b) = _multiply (space.rgb_from_xyz_matrix, x, y, z)
+    return _irgb_from_rgb (space, r, g, b)
+
+# Hex strings
+
+def irgb_string_from_irgb (irgb):
+    '''Convert a displayable irgb color into a hex string, like '#AB13D2'.'''
+    (ir, ig, ib) = irgb
+    return '#%02X%02X%02X' % (min (255, max (0, ir)), min (255, max (0, ig)), min (255, max (0, ib)))
+
+def irgb_from_irgb_string (irgb_string):
+    '''Convert a hex string, like '#AB13D2', into a displayable irgb color.'''
+    if len (irgb_string) != 7 or irgb_string [0] != '#':
+        raise ValueError('irgb_from_irgb_string(): Expecting 7 character string like #AB13D2')
+    return (int (irgb_string [1:3], 16), int (irgb_string [3:5], 16), int (irgb_string [5:7], 16))
+
+def irgb_string_from_rgb (rgb, color_space = None):
+    '''Convert a linear rgb color directly into a hex string.'''
+    return '#%02X%02X%02X' % irgb_from_rgb (rgb, color_space)
+
+def irgb_string_from_xyz (xyz, color_space = None):
+    '''Convert an xyz color directly into a hex string.'''
+    return '#%02X%02X%02X' % irgb_from_xyz (xyz, color_space)
+
+# Luv and Lab, with the same formulas as colormodels.
+
+def _L_luminance (y):
+    '''L coefficient for Luv and Lab models.'''
+    if y > colormodels.L_LUM_CUTOFF:
+        return colormodels.L_LUM_A * _cbrt (y) - colormodels.L_LUM_B
+    return colormodels.L_LUM_C * y
+
+def _L_luminance_inverse (L):
+    '''Inverse of _L_luminance().'''
+    if L <= (colormodels.L_LUM_C * colormodels.L_LUM_CUTOFF):
+        return L / colormodels.L_LUM_C
+    t = (L + colormodels.L_LUM_B) / colormodels.L_LUM_A
+    return t * t * t
+
+def _Lab_f (t):
+    '''Lab utility function.'''
+    if t > colormodels.L_LUM_CUTOFF:
+        return _cbrt (t)
+    return colormodels.LAB_F_A * t + colormodels.LAB_F_B
+
+def _Lab_f_inverse (F):
+    '''Inverse of _Lab_f().'''
+    if F <= (colormodels.LAB_F_A * colormodels.L_LUM_CUTOFF + colormodels.LAB_F_B):
+        return (F - colormodels.LAB_F_B) / colormodels.LAB_F_A
+    return F * F * F
+
+def luv_from_xyz (xyz, color_space = None):
+    '''Convert an xyz color to Luv.'''
+    (x, y, z) = xyz
+    space = _get_space (color_space)
+    w_denom = x + 15.0 * y + 3.0 * z
+    if w_denom != 0.0:
+        u_prime = 4.0 * x / w_denom
+        v_prime = 9.0 * y / w_denom
+    else:
+        u_prime = v_prime = 0.0
+    L = _L_luminance (y / space.reference_white [1])
+    return (
+        float (L),
+        float (13.0 * L * (u_prime - space.reference_u_prime)),
+        float (13.0 * L * (v_prime - space.reference_v_prime)))
+
+def xyz_from_luv (luv, color_space = None):
+    '''Convert a Luv color to xyz.'''
+    (L, u, v) = luv
+    if L == 0.0:
+        return (0.0, 0.0, 0.0)
+    space = _get_space (color_space)
+    y = _L_luminance_inverse (L)
+    u_prime = space.reference_u_prime + (u / (13.0 * L))
+    v_prime = space.reference_v_prime + (v / (13.0 * L))
+    if v_prime == 0.0:
+        return (0.0, 0.0, 0.0)
+    w_denom = (9.0 * y) / v_prime
+    x = 0.25 * u_prime * w_denom
+    z = (w_denom - x - 15.0 * y) / 3.0
+    return (float (x), float (y), float (z))
+
+def lab_from_xyz (xyz, color_space = None):
+    '''Convert an xyz color to Lab.'''
+    (x, y, z) = xyz
+    (white_x, white_y, white_z) = _get_space (color_space).reference_white
+    y_p = y / white_y
+    f_x = _Lab_f (x / white_x)
+    f_y = _Lab_f (y_p)
+    f_z = _Lab_f (z / white_z)
+    return (float (_L_luminance (y_p)), float (500.0 * (f_x - f_y)), float (200.0 * (f_y - f_z)))
+
+def xyz_from_lab (Lab, color_space = None):
+    '''Convert a Lab color to xyz.'''
+    (L, a, b) = Lab
+    (white_x, white_y, white_z) = _get_space (color_space).reference_white
+    y_p = _L_luminance_inverse (L)
+    f_y = _Lab_f (y_p)
+    x_p = _Lab_f_inverse (f_y + (a / 500.0))
+    z_p = _Lab_f_inverse (f_y - (b / 200.0))
+    return (float (x_p * white_x), float (y_p * white_y), float (z_p * white_z))
@@ -24,6 +24,8 @@ data_files = [
     'COPYING.LESSER.txt',
     'license.txt',
     'ColorPy.html',
+    'data/ciexyz31_1.npy',
+    'data/Illuminantd65.npy',
 ]
 
 long_description = '''
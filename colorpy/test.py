@@ -37,6 +37,14 @@ import test_illuminants
 import test_blackbody
 import test_rayleigh
 import test_thinfilm
+import test_reflectance_color
+import test_datatables
+import test_imports
+import test_rgbspaces
+import test_lut3d
+import test_irgbtables
+import test_scalarcolors
+import test_cct
 
 def test ():
     # no test cases for plots/misc - but figures.py will exercise those.
@@ -51,6 +59,14 @@ def test ():
         test_illuminants,
         test_rayleigh,
         test_thinfilm,
+        test_reflectance_color,
+        test_datatables,
+        test_imports,
+        test_rgbspaces,
+        test_lut3d,
+        test_irgbtables,
+        test_scalarcolors,
+        test_cct,
     ]
     for module in modules:
         result = unittest.TestResult()
@@ -24,74 +24,33 @@ along with ColorPy.  If not, see <http://www.gnu.org/licenses/>.
 '''
 from __future__ import print_function
 
-import math
+import math, os, shutil, tempfile
 import numpy
 import unittest
 
 import blackbody
 import colormodels
 
-# FIXME: The following calculation is not working currently.
-# It is an attempt to get the scale of the intensity correct.
-# It needs more investigation.
+# The total intensity of a blackbody, over all wavelengths, follows the Stefan-Boltzman law.
+# sigma T^4 is the power per unit area, into all directions of a hemisphere,
+# which is pi times the specific intensity (integrated over wavelength).
 
 STEFAN_BOLTZMAN = 5.670e-8        # W/(m^2 K^4)
 
 def blackbody_total_intensity (T_K, start_wl_nm, end_wl_nm):
-    '''Get the sum of the specific intensity, at 1 nm increments, from start_wl_nm to end_wl_nm.'''
-    total = 0.0
-    for wl_nm in range (start_wl_nm, end_wl_nm+1):
-        specific = blackbody.blackbody_specific_intensity (wl_nm, T_K)
-        total += specific
+    '''Get the sum of the specific intensity, at 1 nm increments, from start_wl_nm to end_wl_nm.
+    This approximates the integral of the specific intensity over those wavelengths.'''
+    wl_nm = numpy.arange (start_wl_nm, end_wl_nm+1, dtype=float)
+    specific = blackbody.blackbody_specific_intensity (wl_nm, T_K)
+    # specific intensity is per m of wavelength
+    total = numpy.sum (specific) * 1.0e-9
     return total
 
 def blackbody_total_intensity_stefan_boltzman (T_K):
-    '''Get the sum of the intensities over all wavelengths, assuming the Stefan-Boltzman law.'''
-    total = STEFAN_BOLTZMAN * math.pow (T_K, 4)
-    # TODO - What (if any) scaling is required of this result to correspond to blackbody_specific_intensity()?
-    # I am not sure, and there is a mismatch.
-    # not entirely sure about the following scaling...  See Shu.
-    scaling = blackbody.SPEED_OF_LIGHT     # almost
-    total *= scaling
+    '''Get the specific intensity integrated over all wavelengths, from the Stefan-Boltzman law.'''
+    total = STEFAN_BOLTZMAN * math.pow (T_K, 4) / math.pi
     return total
 
-def test_stefan_boltzman():
-    '''Test that the total intensity over many wavelengths matches the Stefan-Boltman formula.
-    NOTE - This currently does not match.  I am not sure what the situation is.'''
-    T = 100.0
-    sb_test0 = blackbody_total_intensity_stefan_boltzman (T)
-    print ('sb_test0', sb_test0)
-    sb_test1 = blackbody_total_intensity (T, 0, 1000)
-    print ('sb_test1', sb_test1)
-    sb_test2 = blackbody_total_intensity (T, 0, 10000)
-    print ('sb_test2', sb_test2)
-    sb_test3 = blackbody_total_intensity (T, 0, 100000)
-    print ('sb_test3', sb_test3)
-    # following start to get slow...
-    #sb_test4 = blackbody_total_intensity (T, 0, 1000000)
-    #print ('sb_test4', sb_test4)
-    #sb_test5 = blackbody_total_intensity (T, 0, 10000000)
-    #print ('sb_test5', sb_test5)
-
-    # compare the computed result with the stefan-boltzman formula
-    # TODO - these do not match, although the T^4 behavior is observed...
-    T_list = [100.0, 1000.0, 4000.0, 6500.0, 10000.0, 15000.0]
-    for T in T_list:
-        total_sb = blackbody_total_intensity_stefan_boltzman (T)
-        # larger wavelength intervals capture more of the total power
-        total1 = blackbody_total_intensity (T, 360, 830)
-        total2 = blackbody_total_intensity (T, 1, 1000)
-        total3 = blackbody_total_intensity (T, 1, 10000)
-        total4 = blackbody_total_intensity (T, 1, 100000)
-        ratio = total4 / total_sb
-        print ('T', T)
-        print ('total_sb', total_sb)
-        print ('total1', total1)
-        print ('total2', total2)
-        print ('total3', total3)
-        print ('total4', total4)
-        print ('ratio', ratio)
-
 
 # Table of xy chromaticities for blackbodies. From (I think):
 #     Judd and Wyszecki, Color in Business, Science and Industry, 1975, p. 164.
@@ -145,6 +104,54 @@ class TestBlackbody(unittest.TestCase):
         blackbody_total_intensity (0.0, 0, 100000)
         blackbody_total_intensity (100000.0, 0, 100000)
 
+    def test_stefan_boltzman(self, verbose=False):
+        '''Test that the total intensity over all wavelengths matches the Stefan-Boltzman law.'''
+        T_list = [100.0, 1000.0, 4000.0, 6500.0, 10000.0, 15000.0]
+        for T in T_list:
+            total_sb   = blackbody_total_intensity_stefan_boltzman (T)
+            total_band = blackbody.blackbody_band_intensity (0.0, numpy.inf, T)
+            # sum at 1 nm, and the exact integral, over the same wavelengths
+            total_sum  = blackbody_total_intensity (T, 1, 100000)
+            total_part = blackbody.blackbody_band_intensity (0.5, 100000.5, T)
+            if verbose:
+                print ('T: %g K    Stefan-Boltzman: %g    Band: %g    1 nm sum: %g    Band (1 - 100000 nm): %g' % (
+                    T, total_sb, total_band, total_sum, total_part))
+            # ColorPy uses older values of the physical constants, which give sigma = 5.6691e-8.
+            self.assertAlmostEqual(total_band / total_sb, 1.0, delta=2.0e-4)
+            self.assertAlmostEqual(total_sum / total_part, 1.0, delta=1.0e-4)
+
+    def test_band_intensity(self, verbose=False):
+        '''Test the band-integrated intensities against fine sampling, and coarse spectra.'''
+        # exact integral against the sum over 0.01 nm steps
+        for (start_wl_nm, end_wl_nm, T) in [(400.0, 410.0, 1000.0), (360.0, 830.0, 5778.0), (500.0, 501.0, 1.0e6), (2000.0, 2100.0, 300.0)]:
+            wl_nm = numpy.linspace (start_wl_nm, end_wl_nm, 100 * int (end_wl_nm - start_wl_nm) + 1)
+            specific = blackbody.blackbody_specific_intensity (wl_nm, T) * 1.0e-9
+            expected = 0.5 * numpy.sum ((specific [1:] + specific [:-1]) * numpy.diff (wl_nm))
+            actual = blackbody.blackbody_band_intensity (start_wl_nm, end_wl_nm, T)
+            if verbose:
+                print ('%g - %g nm, T: %g K    band: %.10g    sampled: %.10g' % (start_wl_nm, end_wl_nm, T, actual, expected))
+            self.assertAlmostEqual(actual / expected, 1.0, delta=1.0e-7)
+        # Bands add up, zero width bands, and zero temperature or wavelength, are fine.
+        T_list = numpy.array ([0.0, 500.0, 5778.0, 1.0e6])
+        parts = blackbody.blackbody_band_intensity (numpy.array ([0.0, 400.0, 450.0]), numpy.array ([400.0, 450.0, 1000.0]), T_list [:, numpy.newaxis])
+        self.assertEqual(parts.shape, (4, 3))
+        self.assertTrue(numpy.allclose (numpy.sum (parts, axis=-1), blackbody.blackbody_band_intensity (0.0, 1000.0, T_list), rtol=1.0e-12, atol=0.0))
+        self.assertTrue(numpy.array_equal (parts [0], numpy.zeros (3)))
+        self.assertEqual(blackbody.blackbody_band_intensity (500.0, 500.0, 5778.0), 0.0)
+        # Coarse spectra hold the exact energy in each band.
+        for step in [1.0, 10.0, 20.0]:
+            wl_nm = numpy.arange (360.0, 831.0, step)
+            spectra = blackbody.blackbody_band_spectra (T_list, wl_nm)
+            self.assertEqual(spectra.shape, (len (T_list), len (wl_nm)))
+            total = numpy.sum (spectra, axis=-1) * step
+            expected = blackbody.blackbody_band_intensity (wl_nm [0] - 0.5 * step, wl_nm [-1] + 0.5 * step, T_list)
+            self.assertTrue(numpy.allclose (total, expected, rtol=1.0e-12, atol=0.0))
+        # At 1 nm, the band averages are close to the samples at the centers.
+        self.assertTrue(numpy.allclose (blackbody.blackbody_band_spectra (5778.0), blackbody.blackbody_spectrum (5778.0) [:,1], rtol=1.0e-5))
+        self.assertEqual(blackbody.blackbody_band_spectra (T_list, dtype=numpy.float32).dtype, numpy.float32)
+        with self.assertRaises(ValueError):
+            blackbody.blackbody_band_spectra (T_list, [500.0])
+
     def test_gold_point(self, verbose=False):
         ''' Test the chromaticity at the 'gold point'. '''
         # From Wyszecki & Stiles, p. 28.
@@ -197,9 +204,83 @@ class TestBlackbody(unittest.TestCase):
             if verbose:
                 print (msg)
 
+    def test_blackbody_colors(self, verbose=False):
+        ''' Test the colors and spectra for many temperatures at once, against one at a time. '''
+        T_list = numpy.array ([0.0, 10.0, 500.0, 1336.0, 5778.0, 40000.0, 1.0e6])
+        spectra = blackbody.blackbody_spectra (T_list)
+        xyzs = blackbody.blackbody_colors (T_list, exact=True)
+        self.assertEqual(xyzs.shape, (len (T_list), 3))
+        for (i, T) in enumerate (T_list):
+            spectrum = blackbody.blackbody_spectrum (T)
+            self.assertEqual(spectra.shape, (len (T_list), len (spectrum)))
+            self.assertTrue(numpy.allclose (spectra [i], spectrum [:,1], rtol=1.0e-12, atol=0.0))
+            xyz = blackbody.blackbody_color (T, exact=True)
+            if verbose:
+                print ('T: %g K    xyz: %s    %s' % (T, str (xyz), str (xyzs [i])))
+            self.assertTrue(numpy.allclose (xyzs [i], xyz, rtol=1.0e-12, atol=0.0))
+        # Zero temperature and very cold blackbodies are black, without overflow.
+        self.assertTrue(numpy.array_equal (xyzs [0:2], numpy.zeros ((2, 3))))
+        self.assertEqual(blackbody.blackbody_specific_intensity (0.0, 5778.0), 0.0)
+        # Any shape of temperatures, and chunks of them.
+        T_grid = numpy.linspace (1000.0, 20000.0, 2 * blackbody.BLACKBODY_COLORS_CHUNK_SIZE + 6).reshape ((2, -1))
+        xyz_grid = blackbody.blackbody_colors (T_grid, exact=True)
+        self.assertEqual(xyz_grid.shape, T_grid.shape + (3,))
+        self.assertTrue(numpy.allclose (xyz_grid [1, -1], blackbody.blackbody_color (T_grid [1, -1], exact=True), rtol=1.0e-12))
+        self.assertEqual(blackbody.blackbody_colors (T_list, numpy.float32).dtype, numpy.float32)
+        # Broadcasting of wavelengths and temperatures.
+        intensities = blackbody.blackbody_specific_intensity (numpy.array ([400.0, 500.0, 600.0]), T_list [:, numpy.newaxis])
+        self.assertEqual(intensities.shape, (len (T_list), 3))
+        self.assertEqual(intensities [4, 1], blackbody.blackbody_specific_intensity (500.0, 5778.0))
+
+    def test_locus_table(self, verbose=False):
+        '''Test the colors from the Planckian locus table against the exact colors.'''
+        T_K = numpy.concatenate ([
+            numpy.logspace (numpy.log10 (blackbody.LOCUS_MIN_T), numpy.log10 (blackbody.LOCUS_MAX_T), 5001),
+            1.0e6 / numpy.random.uniform (1.0, 2000.0, 5000)])
+        xyzs  = blackbody.blackbody_colors (T_K)
+        exact = blackbody.blackbody_colors (T_K, exact=True)
+        xy_error = numpy.max (numpy.abs (xyzs [:, 0:2] / numpy.sum (xyzs, axis=-1, keepdims=True)
+            - exact [:, 0:2] / numpy.sum (exact, axis=-1, keepdims=True)))
+        Y_error = numpy.max (numpy.abs (xyzs [:, 1] / exact [:, 1] - 1.0))
+        if verbose:
+            print ('Locus table max errors: xy %g    Y (relative) %g' % (xy_error, Y_error))
+        # the errors documented in blackbody.py
+        self.assertLess(xy_error, 1.2e-7)
+        self.assertLess(Y_error, 2.0e-6)
+        # The scalar lookup agrees with the array one.
+        for T in [blackbody.LOCUS_MIN_T, 1336.0, blackbody.SUN_TEMPERATURE, blackbody.LOCUS_MAX_T]:
+            self.assertTrue(numpy.allclose (blackbody.blackbody_color (T), blackbody.blackbody_colors (T), rtol=1.0e-12, atol=0.0))
+        # Temperatures outside the table are exact.
+        T_out = numpy.array ([0.0, 100.0, 499.0, 2.0e6])
+        self.assertTrue(numpy.array_equal (blackbody.blackbody_colors (T_out), blackbody.blackbody_colors (T_out, exact=True)))
+        self.assertTrue(numpy.array_equal (blackbody.blackbody_color (100.0), blackbody.blackbody_color (100.0, exact=True)))
+
+    def test_locus_table_file(self):
+        '''Test saving and loading the locus table.'''
+        dirname = tempfile.mkdtemp()
+        try:
+            filename = os.path.join (dirname, 'locus.npy')
+            # a small table is built, and saved
+            blackbody.init_locus_table (64, filename)
+            self.assertTrue(os.path.exists (filename))
+            small = blackbody.blackbody_colors (blackbody.SUN_TEMPERATURE)
+            blackbody.init_locus_table()
+            self.assertFalse(numpy.array_equal (small, blackbody.blackbody_colors (blackbody.SUN_TEMPERATURE)))
+            # the existing file is loaded, rather than building the default table
+            blackbody.init_locus_table (filename=filename)
+            self.assertTrue(numpy.array_equal (small, blackbody.blackbody_colors (blackbody.SUN_TEMPERATURE)))
+            saved = os.path.join (dirname, 'saved.npy')
+            blackbody.save_locus_table (saved)
+            blackbody.init_locus_table (filename=saved)
+            self.assertTrue(numpy.array_equal (small, blackbody.blackbody_colors (blackbody.SUN_TEMPERATURE)))
+            with self.assertRaises(ValueError):
+                blackbody.save_locus_table (os.path.join (dirname, 'locus.txt'))
+            with self.assertRaises(ValueError):
+                blackbody.init_locus_table (1)
+        finally:
+            blackbody.init_locus_table()
+            shutil.rmtree (dirname)
+
 
 if __name__ == '__main__':
-    if False:
-        # This calculation is not working yet...
-        test_stefan_boltzman()
     unittest.main()
@@ -0,0 +1,100 @@
+'''
+test_cct.py - Test module for cct.py.
+
+License:
+
+This file is part of ColorPy.
+
+ColorPy is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+ColorPy is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with ColorPy.  If not, see <http://www.gnu.org/licenses/>.
+'''
+from __future__ import print_function
+
+import unittest
+import numpy
+
+import cct
+import ciexyz
+import illuminants
+
+# the modules that cct uses
+blackbody   = cct.blackbody
+colormodels = cct.colormodels
+
+
+class TestCCT(unittest.TestCase):
+    ''' Test cases for correlated color temperature and Duv. '''
+
+    def test_round_trip(self, verbose=False):
+        ''' Test the CCT and Duv of colors made from known CCT and Duv. '''
+        random = numpy.random.RandomState (23)
+        T_K = numpy.exp (random.uniform (numpy.log (1010.0), numpy.log (99000.0), 20000))
+        duv = random.uniform (-0.05, 0.05, 20000)
+        xyzs = cct.xyz_from_cct_duv (T_K, duv, Y=0.5)
+        self.assertTrue(numpy.allclose (xyzs [:, 1], 0.5))
+        (T_actual, duv_actual) = cct.cct_duv_from_xyz (xyzs)
+        T_error   = numpy.max (numpy.abs (T_actual / T_K - 1.0))
+        duv_error = numpy.max (numpy.abs (duv_actual - duv))
+        if verbose:
+            print ('CCT max relative error: %g    Duv max error: %g' % (T_error, duv_error))
+        # the errors documented in cct.py
+        self.assertLess(T_error, 1.0e-6)
+        self.assertLess(duv_error, 1.0e-7)
+        # Blackbodies are on the locus.
+        T_list = numpy.array ([1500.0, 2856.0, blackbody.SUN_TEMPERATURE, 20000.0])
+        (T_bb, duv_bb) = cct.cct_duv_from_xyz (blackbody.blackbody_colors (T_list, exact=True))
+        self.assertTrue(numpy.allclose (T_bb, T_list, rtol=1.0e-6))
+        self.assertTrue(numpy.allclose (duv_bb, 0.0, atol=1.0e-7))
+
+    def test_illuminants(self, verbose=False):
+        ''' Test the CCT and Duv of standard illuminants. '''
+        # D65 has a CCT of approximately 6504 K, just above the locus.  (Wyszecki, p. 144)
+        (T_D65, duv_D65) = cct.cct_duv_from_xyz (ciexyz.xyz_from_spectrum (illuminants.get_illuminant_D65()))
+        # A is a blackbody at 2856 K.
+        (T_A, duv_A) = cct.cct_duv_from_xyz (ciexyz.xyz_from_spectrum (illuminants.get_illuminant_A()))
+        if verbose:
+            print ('D65: %.1f K, Duv %.5f    A: %.1f K, Duv %.5f' % (T_D65, duv_D65, T_A, duv_A))
+        self.assertAlmostEqual(float (T_D65), 6504.0, delta=5.0)
+        self.assertAlmostEqual(float (duv_D65), 0.0032, delta=1.0e-4)
+        self.assertAlmostEqual(float (T_A), 2856.0, delta=0.1)
+        self.assertAlmostEqual(float (duv_A), 0.0, delta=1.0e-6)
+
+    def test_shapes(self):
+        ''' Test the shapes and types of the results, and colors without a CCT. '''
+        xyzs = cct.xyz_from_cct_duv (numpy.array ([[3000.0], [6500.0]]), numpy.array ([-0.01, 0.0, 0.01]))
+        self.assertEqual(xyzs.shape, (2, 3, 3))
+        (T_K, duv) = cct.cct_duv_from_xyz (xyzs)
+        self.assertEqual(T_K.shape, (2, 3))
+        self.assertTrue(numpy.allclose (T_K, [[3000.0] * 3, [6500.0] * 3]))
+        self.assertTrue(numpy.allclose (duv, [[-0.01, 0.0, 0.01]] * 2, atol=1.0e-7))
+        self.assertTrue(numpy.allclose (cct.cct_from_xyz (xyzs), T_K))
+        # float32 colors give float32 results
+        (T32, duv32) = cct.cct_duv_from_xyz (xyzs.astype (numpy.float32))
+        self.assertEqual(T32.dtype, numpy.float32)
+        self.assertTrue(numpy.allclose (T32, T_K, rtol=1.0e-4))
+        # A single color, black, a color far from the locus, and temperatures outside the table.
+        (T_one, duv_one) = cct.cct_duv_from_xyz (xyzs [0, 0])
+        self.assertEqual(T_one.shape, ())
+        (T_K, duv) = cct.cct_duv_from_xyz (numpy.array ([[0.0, 0.0, 0.0], [1.0, 0.0, 0.0]]))
+        self.assertTrue(numpy.all (numpy.isnan (T_K)) and numpy.all (numpy.isnan (duv)))
+        T_K = cct.cct_from_xyz (blackbody.blackbody_colors (numpy.array ([500.0, 1.0e6]), exact=True))
+        self.assertTrue(numpy.all (numpy.isnan (T_K)))
+        # Colors are converted a chunk at a time.
+        many = numpy.tile (xyzs.reshape ((-1, 3)), (cct.CCT_CHUNK_SIZE, 1))
+        self.assertTrue(numpy.allclose (cct.cct_from_xyz (many) [-6:], 3 * [3000.0] + 3 * [6500.0]))
+        with self.assertRaises(ValueError):
+            cct.init (min_T=1000.0, max_T=500.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -24,10 +24,37 @@ along with ColorPy.  If not, see <http://www.gnu.org/licenses/>.
 '''
 from __future__ import print_function
 
+import math
 import random
+import threading
+import numpy
 import unittest
 
 import ciexyz
+import colormodels
+
+
+def xyz_from_wavelength_scalar (wl_nm):
+    '''Reference version of xyz_from_wavelength(), for a single wavelength.'''
+    # separate wl_nm into integer and fraction
+    int_wl_nm = math.floor (wl_nm)
+    frac_wl_nm = wl_nm - float (int_wl_nm)
+    # skip out of range (invisible) wavelengths
+    if (int_wl_nm < ciexyz.start_wl_nm - 1) or (int_wl_nm > ciexyz.end_wl_nm + 1):
+        return numpy.zeros (3)
+    # get index into main table
+    index = int_wl_nm - ciexyz.start_wl_nm + 1
+    # apply linear interpolation to get the color
+    return ciexyz._xyz_colors [index] + frac_wl_nm * ciexyz._xyz_deltas [index]
+
+def xyz_from_spectrum_loop (spectrum):
+    '''Reference version of xyz_from_spectrum(), one wavelength at a time.'''
+    d_wl_nm = spectrum[1][0] - spectrum[0][0]
+    rtn = numpy.zeros (3)
+    for i in range (0, spectrum.shape[0]):
+        xyz = xyz_from_wavelength_scalar (spectrum [i][0])
+        rtn += spectrum [i][1] * xyz * d_wl_nm
+    return rtn
 
 
 class TestCiexyz(unittest.TestCase):
@@ -52,6 +79,228 @@ class TestCiexyz(unittest.TestCase):
         if verbose:
             print ('555 nm = %s' % (str (xyz_555)))
 
+    def test_xyz_from_wavelength(self, verbose=False):
+        ''' Test xyz_from_wavelength() on arrays of wavelengths, against one at a time. '''
+        wl_nm = 1000.0 * numpy.random.random ((4, 25))
+        # Include the ends of the table and just outside them.
+        wl_nm [0][:8] = [358.5, 359.0, 359.5, 360.0, 830.0, 830.5, 831.0, 831.5]
+        xyzs = ciexyz.xyz_from_wavelength (wl_nm)
+        self.assertEqual(xyzs.shape, (4, 25, 3))
+        for i in range (4):
+            for j in range (25):
+                xyz = xyz_from_wavelength_scalar (wl_nm [i][j])
+                msg = 'wl_nm = %7.3f, xyz = %s, %s' % (wl_nm [i][j], str (xyz), str (xyzs [i][j]))
+                if verbose:
+                    print (msg)
+                self.assertTrue(numpy.allclose (xyz, xyzs [i][j], rtol=1.0e-14, atol=0.0))
+        # A single wavelength gives a single color.
+        xyz = ciexyz.xyz_from_wavelength (555.0)
+        self.assertEqual(xyz.shape, (3,))
+
+    def check_xyz_from_spectrum(self, spectrum, verbose):
+        ''' Check that xyz_from_spectrum() matches the one wavelength at a time version. '''
+        xyz0 = xyz_from_spectrum_loop (spectrum)
+        xyz1 = ciexyz.xyz_from_spectrum (spectrum)
+        msg = 'loop: %s    vectorized: %s' % (str (xyz0), str (xyz1))
+        if verbose:
+            print (msg)
+        self.assertTrue(numpy.allclose (xyz0, xyz1, rtol=1.0e-12, atol=1.0e-15))
+
+    def test_xyz_from_spectrum(self, verbose=False):
+        ''' Test xyz_from_spectrum() on the standard and some other wavelength sets. '''
+        # Standard wavelengths, which use the table directly.
+        spectrum = ciexyz.empty_spectrum()
+        spectrum [:,1] = numpy.random.random (spectrum.shape[0])
+        self.check_xyz_from_spectrum(spectrum, verbose)
+        # Coarser spacing, fractional wavelengths, and some out of range wavelengths.
+        for wl_nm in [
+            numpy.arange (380.0, 781.0, 5.0),
+            numpy.arange (360.25, 830.0, 2.5),
+            numpy.arange (300.0, 900.0, 0.7)]:
+            spectrum = numpy.column_stack ((wl_nm, numpy.random.random (len (wl_nm))))
+            self.check_xyz_from_spectrum(spectrum, verbose)
+
+    def test_xyz_from_spectra(self, verbose=False):
+        ''' Test that xyz_from_spectra() matches xyz_from_spectrum() for each spectrum. '''
+        wl_nm = numpy.arange (380.0, 781.0, 5.0)
+        intensities = numpy.random.random ((2, 4, len (wl_nm)))
+        xyzs = ciexyz.xyz_from_spectra (wl_nm, intensities)
+        self.assertEqual(xyzs.shape, (2, 4, 3))
+        for i in range (2):
+            for j in range (4):
+                spectrum = numpy.column_stack ((wl_nm, intensities [i][j]))
+                xyz = ciexyz.xyz_from_spectrum (spectrum)
+                if verbose:
+                    print ('spectrum %d, %d: %s, %s' % (i, j, str (xyz), str (xyzs [i][j])))
+                self.assertTrue(numpy.allclose (xyz, xyzs [i][j], rtol=1.0e-12, atol=1.0e-15))
+        # A single spectrum gives a single color.
+        xyz = ciexyz.xyz_from_spectra (wl_nm, intensities [0][0])
+        self.assertEqual(xyz.shape, (3,))
+
+    def test_irgb_from_spectra(self, verbose=False):
+        ''' Test that irgb_from_spectra() matches the separate conversion steps. '''
+        wl_nm = numpy.arange (360.0, 831.0, 5.0)
+        # Several chunks of spectra, some bright enough to be clipped.
+        num_spectra = ciexyz.IRGB_FROM_SPECTRA_CHUNK_SIZE + 100
+        intensities = 0.04 * numpy.random.random ((num_spectra, len (wl_nm)))
+        rgbs = colormodels.rgb_from_xyz (ciexyz.xyz_from_spectra (wl_nm, intensities))
+        for dtype in [numpy.uint8, numpy.uint16]:
+            (expected, clipped_chrom, clipped_int) = colormodels.clip_rgb_colors (rgbs, dtype)
+            irgbs = ciexyz.irgb_from_spectra (wl_nm, intensities, dtype=dtype)
+            self.assertEqual(irgbs.dtype, numpy.dtype (dtype))
+            self.assertEqual(irgbs.shape, (num_spectra, 3))
+            # The combined matrix can round differently, so allow a difference of one.
+            err = numpy.max (numpy.abs (irgbs.astype (int) - expected.astype (int)))
+            msg = '%s: max difference %d, %d intensity clipped' % (numpy.dtype (dtype).name, err, numpy.count_nonzero (clipped_int))
+            if verbose:
+                print (msg)
+            self.assertLessEqual(err, 1, msg)
+        # The result can be written into a supplied (even non-contiguous) array.
+        out = numpy.zeros ((3, num_spectra), numpy.uint8).T
+        result = ciexyz.irgb_from_spectra (wl_nm, intensities, out=out)
+        self.assertTrue(result is out)
+        self.assertTrue(numpy.array_equal (out, ciexyz.irgb_from_spectra (wl_nm, intensities)))
+        # Non-contiguous N-d spectra (a strided slice of a larger array) give the same colors.
+        larger = numpy.zeros ((2, num_spectra, 2 * len (wl_nm)))
+        larger [1, :, ::2] = intensities
+        strided = larger [1:, :, ::2]
+        self.assertFalse(strided.flags.c_contiguous)
+        self.assertTrue(numpy.array_equal (
+            ciexyz.irgb_from_spectra (wl_nm, strided) [0], ciexyz.irgb_from_spectra (wl_nm, intensities)))
+        # A different color space, without changing the current one.
+        space = colormodels.color_space (
+            colormodels.SMPTE_Red, colormodels.SMPTE_Green, colormodels.SMPTE_Blue, colormodels.WhiteD65,
+            clip_method = colormodels.CLIP_CLAMP_TO_ZERO)
+        (expected, clipped_chrom, clipped_int) = space.clip_rgb_colors (
+            space.rgb_from_xyz (ciexyz.xyz_from_spectra (wl_nm, intensities)))
+        irgbs = ciexyz.irgb_from_spectra (wl_nm, intensities, color_space=space)
+        err = numpy.max (numpy.abs (irgbs.astype (int) - expected.astype (int)))
+        self.assertLessEqual(err, 1)
+
+    def check_linear_integration(self, wl_nm, intensities, verbose):
+        ''' Check that linear integration of the spectrum matches that of the same spectrum,
+        linearly interpolated onto a much finer set of wavelengths. '''
+        fine_wl_nm = numpy.union1d (wl_nm, numpy.arange (wl_nm [0], wl_nm [-1], 0.1))
+        fine_intensities = numpy.interp (fine_wl_nm, wl_nm, intensities)
+        xyz0 = ciexyz.xyz_from_spectrum (
+            numpy.column_stack ((wl_nm, intensities)), ciexyz.INTEGRATE_LINEAR)
+        xyz1 = ciexyz.xyz_from_spectra (
+            fine_wl_nm, fine_intensities, ciexyz.INTEGRATE_LINEAR)
+        msg = 'coarse: %s    fine: %s' % (str (xyz0), str (xyz1))
+        if verbose:
+            print (msg)
+        self.assertTrue(numpy.allclose (xyz0, xyz1, rtol=1.0e-12, atol=1.0e-12))
+
+    def test_linear_integration(self, verbose=False):
+        ''' Test the exact integration of spectra that are linear between samples. '''
+        # Coarse, evenly spaced.
+        wl_nm = numpy.arange (380.0, 781.0, 10.0)
+        self.check_linear_integration(wl_nm, numpy.random.random (len (wl_nm)), verbose)
+        # Unevenly spaced, fractional wavelengths, some out of range.
+        wl_nm = numpy.sort (300.0 + 600.0 * numpy.random.random (30))
+        self.check_linear_integration(wl_nm, numpy.random.random (len (wl_nm)), verbose)
+        # A narrow line, like misc.spectral_line_555nm_plot().
+        wl_nm = numpy.array ([360.0, 549.0, 552.0, 555.0, 558.0, 561.0, 830.0])
+        intensities = numpy.array ([0.0, 0.0, 100.0, 100.0, 100.0, 0.0, 0.0])
+        self.check_linear_integration(wl_nm, intensities, verbose)
+        # On the standard wavelengths, the result is close to the default method.
+        spectrum = ciexyz.empty_spectrum()
+        spectrum [:,1] = 1.0
+        xyz0 = ciexyz.xyz_from_spectrum (spectrum)
+        xyz1 = ciexyz.xyz_from_spectrum (spectrum, ciexyz.INTEGRATE_LINEAR)
+        self.assertTrue(numpy.allclose (xyz0, xyz1, rtol=1.0e-5))
+        # Wavelengths out of order are not allowed.
+        spectrum = numpy.array ([[550.0, 1.0], [560.0, 1.0], [555.0, 1.0]])
+        self.assertRaises(ValueError, ciexyz.xyz_from_spectrum, spectrum, ciexyz.INTEGRATE_LINEAR)
+
+    def test_kernel_cache(self, verbose=False):
+        ''' Test the saving and reuse of integration kernels. '''
+        ciexyz.init_kernel_cache (maxsize=2)
+        try:
+            grid_5nm  = numpy.arange (380.0, 781.0, 5.0)
+            grid_10nm = numpy.arange (400.0, 701.0, 10.0)
+            grid_odd  = numpy.array ([400.0, 401.0, 405.0, 420.0, 500.0])
+            kernel = ciexyz.integration_kernel (grid_5nm)
+            self.assertFalse(kernel.flags.writeable)
+            # A separately constructed but identical grid reuses the kernel.
+            self.assertIs(ciexyz.integration_kernel (numpy.linspace (380.0, 780.0, 81)), kernel)
+            ciexyz.integration_kernel (grid_10nm)
+            info = ciexyz.kernel_cache_info()
+            if verbose:
+                print (str (info))
+            self.assertEqual(info, (1, 2, 2, 2))
+            # Adding a third grid discards the least recently used one (10 nm).
+            ciexyz.integration_kernel (grid_5nm)
+            ciexyz.integration_kernel (grid_odd)
+            ciexyz.integration_kernel (grid_5nm)
+            self.assertEqual(ciexyz.kernel_cache_info(), (3, 3, 2, 2))
+            ciexyz.integration_kernel (grid_10nm)
+            self.assertEqual(ciexyz.kernel_cache_info(), (3, 4, 2, 2))
+            # Initialization discards all the saved kernels.
+            ciexyz.init()
+            self.assertEqual(ciexyz.kernel_cache_info(), (0, 0, 2, 0))
+            self.assertIsNot(ciexyz.integration_kernel (grid_5nm), kernel)
+        finally:
+            ciexyz.init_kernel_cache()
+
+    def test_kernel_cache_threads(self, verbose=False):
+        ''' Several threads can share the saved kernels, even while they are being discarded. '''
+        ciexyz.init_kernel_cache (maxsize=1)
+        try:
+            grids = [numpy.arange (400.0, 701.0, step) for step in [5.0, 10.0, 20.0]]
+            errors = []
+            def work (grid):
+                try:
+                    for i in range (0, 200):
+                        kernel = ciexyz.integration_kernel (grid)
+                        assert kernel.shape == (len (grid), 3)
+                except Exception as e:
+                    errors.append (e)
+            threads = [threading.Thread (target=work, args=(grid,)) for grid in grids * 2]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            if verbose:
+                print (str (ciexyz.kernel_cache_info()))
+            self.assertEqual(errors, [])
+            info = ciexyz.kernel_cache_info()
+            self.assertEqual(info.hits + info.misses, 1200)
+            self.assertEqual(info.currsize, 1)
+        finally:
+            ciexyz.init_kernel_cache()
+
+    def test_float32_spectra(self, verbose=False):
+        ''' Test converting float32 spectra, which keeps them float32. '''
+        spectrum = ciexyz.empty_spectrum()
+        self.assertEqual(spectrum.dtype, numpy.float64)
+        spectrum32 = ciexyz.empty_spectrum (numpy.float32)
+        self.assertEqual(spectrum32.dtype, numpy.float32)
+        self.assertTrue(numpy.array_equal (spectrum32 [:,0], spectrum [:,0]))
+        spectrum [:,1] = numpy.random.random (len (spectrum))
+        spectrum32 [:,1] = spectrum [:,1]
+        xyz = ciexyz.xyz_from_spectrum (spectrum)
+        xyz32 = ciexyz.xyz_from_spectrum (spectrum32)
+        if verbose:
+            print ('float64: %s    float32: %s' % (str (xyz), str (xyz32)))
+        self.assertEqual(xyz32.dtype, numpy.float32)
+        self.assertTrue(numpy.allclose (xyz32, xyz, rtol=1.0e-5))
+        self.assertEqual(ciexyz.xyz_from_spectrum (spectrum32, dtype=numpy.float64).dtype, numpy.float64)
+        # Spectra sharing the wavelengths.
+        intensities = numpy.random.random ((5, 7, len (spectrum))).astype (numpy.float32)
+        xyzs = ciexyz.xyz_from_spectra (spectrum [:,0], intensities)
+        self.assertEqual(xyzs.dtype, numpy.float32)
+        self.assertTrue(numpy.allclose (xyzs, ciexyz.xyz_from_spectra (spectrum [:,0], intensities.astype (float)), rtol=1.0e-5))
+        irgbs = ciexyz.irgb_from_spectra (spectrum [:,0], intensities * 0.01)
+        irgbs64 = ciexyz.irgb_from_spectra (spectrum [:,0], intensities.astype (float) * 0.01)
+        self.assertLessEqual(numpy.max (numpy.abs (irgbs.astype (int) - irgbs64)), 1)
+        # The kernels for each float type are saved separately.
+        kernel = ciexyz.integration_kernel (spectrum [:,0], dtype=numpy.float64)
+        kernel32 = ciexyz.integration_kernel (spectrum [:,0], dtype=numpy.float32)
+        self.assertEqual(kernel32.dtype, numpy.float32)
+        self.assertIs(ciexyz.integration_kernel (spectrum [:,0], dtype=numpy.float32), kernel32)
+        self.assertIs(ciexyz.integration_kernel (spectrum [:,0], dtype=numpy.float64), kernel)
+
 
 if __name__ == '__main__':
     unittest.main()
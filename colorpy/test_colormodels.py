@@ -101,6 +101,34 @@ class TestColormodels(unittest.TestCase):
             xyz0 = colormodels.xyz_color (x0, y0, z0)
             self.check_xyz_rgb (xyz0, verbose)
 
+    def test_xyz_rgb_arrays(self, verbose=False):
+        ''' Test the conversions on arrays of colors, against the single color conversions. '''
+        xyzs = 10.0 * numpy.random.random ((4, 5, 3))
+        rgbs = colormodels.rgb_from_xyz (xyzs)
+        xyzs2 = colormodels.xyz_from_rgb (rgbs)
+        brights = colormodels.brightest_rgb_from_xyz (xyzs, 0.5)
+        self.assertEqual(rgbs.shape, xyzs.shape)
+        self.assertEqual(brights.shape, xyzs.shape)
+        for index in numpy.ndindex (xyzs.shape [:-1]):
+            xyz = xyzs [index]
+            rgb = numpy.dot (colormodels.rgb_from_xyz_matrix, xyz)
+            bright = rgb * (0.5 / max (rgb))
+            self.assertTrue(numpy.allclose (rgbs [index], rgb, rtol=1.0e-12, atol=1.0e-12))
+            self.assertTrue(numpy.allclose (brights [index], bright, rtol=1.0e-12, atol=1.0e-12))
+            self.assertTrue(numpy.allclose (xyzs2 [index], xyz, rtol=1.0e-10, atol=1.0e-10))
+        # results into an existing array, including the input itself
+        out = numpy.empty_like (xyzs)
+        result = colormodels.rgb_from_xyz (xyzs, out=out)
+        self.assertTrue(result is out)
+        self.assertTrue(numpy.array_equal (out, rgbs))
+        colormodels.xyz_from_rgb (out, out=out)
+        self.assertTrue(numpy.allclose (out, xyzs, rtol=1.0e-10, atol=1.0e-10))
+        # black is left alone by brightest_rgb_from_xyz()
+        black = colormodels.brightest_rgb_from_xyz (numpy.zeros ((2, 3)))
+        self.assertTrue(numpy.array_equal (black, numpy.zeros ((2, 3))))
+        if verbose:
+            print ('rgb: %s' % str (rgbs [0, 0]))
+
     def check_xyz_irgb(self, xyz0, verbose):
         ''' Check the direct conversions from xyz to irgb. '''
         irgb0 = colormodels.irgb_from_rgb (
@@ -188,6 +216,40 @@ class TestColormodels(unittest.TestCase):
             irgb = colormodels.irgb_color (ir, ig, ib)
             self.check_irgb_string(irgb, verbose)
 
+    def test_irgb_strings_arrays(self, verbose=False):
+        ''' Test the batched conversions between irgb colors and irgb strings. '''
+        irgbs = numpy.random.randint (0, 256, (10, 20, 3)).astype (numpy.uint8)
+        (irgb_strings, clipped) = colormodels.irgb_strings_from_irgb_colors (irgbs)
+        self.assertEqual(irgb_strings.shape, (10, 20))
+        self.assertFalse(numpy.any (clipped))
+        for index in [(0, 0), (3, 7), (9, 19)]:
+            self.assertEqual(irgb_strings [index], colormodels.irgb_string_from_irgb (list (irgbs [index])))
+        (irgbs2, invalid) = colormodels.irgb_colors_from_irgb_strings (irgb_strings)
+        self.assertTrue(numpy.array_equal (irgbs2, irgbs))
+        self.assertEqual(irgbs2.dtype, numpy.uint8)
+        self.assertFalse(numpy.any (invalid))
+        # Out of range colors are clamped, without changing the input.
+        wide = numpy.array ([[300, -1, 17], [1, 2, 3]])
+        (irgb_strings, clipped) = colormodels.irgb_strings_from_irgb_colors (wide)
+        self.assertEqual(list (irgb_strings), ['#FF0011', '#010203'])
+        self.assertEqual(list (clipped), [True, False])
+        self.assertEqual(wide [0, 0], 300)
+        # Invalid strings are marked, and converted to black, rather than raising.
+        strings = ['#00ff80', '#GG0000', '#000', '#0000001', '00FF80#', None, '#00€080', b'#ABCDEF', '#ABCDEF']
+        (irgbs, invalid) = colormodels.irgb_colors_from_irgb_strings (strings)
+        if verbose:
+            print (irgbs, invalid)
+        self.assertEqual(list (invalid), [False, True, True, True, True, True, True, True, False])
+        self.assertEqual(irgbs [0].tolist(), [0, 255, 128])
+        self.assertEqual(irgbs [-1].tolist(), [171, 205, 239])
+        self.assertFalse(numpy.any (irgbs [invalid]))
+        # Byte strings, and empty lists.
+        (irgbs, invalid) = colormodels.irgb_colors_from_irgb_strings (numpy.array ([b'#ABCDEF', b'#12']))
+        self.assertEqual(irgbs.tolist(), [[171, 205, 239], [0, 0, 0]])
+        self.assertEqual(list (invalid), [False, True])
+        (irgbs, invalid) = colormodels.irgb_colors_from_irgb_strings ([])
+        self.assertEqual(irgbs.shape, (0, 3))
+
     # Clipping.
 
     def test_clipping(self, verbose=False):
@@ -213,6 +275,46 @@ class TestColormodels(unittest.TestCase):
             if verbose:
                 print (msg)
 
+    def check_clip_rgb_colors(self, rgb_colors, verbose):
+        ''' Check that clip_rgb_colors() matches clip_rgb_color() on each color. '''
+        (irgbs, clipped_chrom, clipped_int) = colormodels.clip_rgb_colors (rgb_colors)
+        self.assertEqual(irgbs.dtype, numpy.uint8)
+        self.assertEqual(irgbs.shape, rgb_colors.shape)
+        self.assertEqual(clipped_chrom.shape, rgb_colors.shape [:-1])
+        for index in numpy.ndindex (rgb_colors.shape [:-1]):
+            (irgb, (chrom, intensity)) = colormodels.clip_rgb_color (rgb_colors [index])
+            msg = 'rgb: %s    irgb: %s    array irgb: %s' % (
+                str (rgb_colors [index]), str (irgb), str (irgbs [index]))
+            if verbose:
+                print (msg)
+            self.assertTrue(numpy.array_equal (irgbs [index], irgb), msg)
+            self.assertEqual(clipped_chrom [index], chrom)
+            self.assertEqual(clipped_int [index], intensity)
+        # 16 bit results, into an existing array.
+        out = numpy.empty (rgb_colors.shape, numpy.uint16)
+        (irgbs16, clipped_chrom16, clipped_int16) = colormodels.clip_rgb_colors (rgb_colors, numpy.uint16, out=out)
+        self.assertTrue(irgbs16 is out)
+        self.assertTrue(numpy.array_equal (clipped_chrom16, clipped_chrom))
+        # The 8 and 16 bit values should agree to within the 8 bit rounding,
+        # except where the intensity was clipped, as the cutoffs are different.
+        unclipped = ~(clipped_int | clipped_int16)
+        err = numpy.abs (irgbs16 / 65535.0 - irgbs / 255.0) [unclipped]
+        self.assertTrue(numpy.all (err <= 0.5 / 255.0 + 1.0e-6))
+
+    def test_clip_rgb_colors(self, verbose=False):
+        ''' Test the array clipping for both clipping methods. '''
+        rgb_colors = 1.5 * numpy.random.random ((6, 50, 3)) - 0.25
+        # Include black, all negative, and very bright colors.
+        rgb_colors [0, 0] = 0.0
+        rgb_colors [0, 1] = [-0.1, -0.2, -0.3]
+        rgb_colors [0, 2] = [10.0, 0.5, -1.0]
+        try:
+            for clip_method in [colormodels.CLIP_ADD_WHITE, colormodels.CLIP_CLAMP_TO_ZERO]:
+                colormodels.init_clipping (clip_method)
+                self.check_clip_rgb_colors (rgb_colors, verbose)
+        finally:
+            colormodels.init_clipping()
+
     # Gamma correction.
 
     def check_gamma_correction(self, verbose):
@@ -259,6 +361,75 @@ class TestColormodels(unittest.TestCase):
                 gamma = gamma)
             self.check_gamma_correction(verbose)
 
+    def check_gamma_encode_table(self, dtype, verbose):
+        ''' Check that the encoding lookup table gives the same codes as rounding the gamma function. '''
+        max_value = numpy.iinfo (dtype).max
+        (scale, table, thresholds) = colormodels.get_color_space()._gamma_encode_table (dtype)
+        # Random values, and the values at and beside each threshold, where errors would be.
+        steps = thresholds [:-1]
+        x = numpy.concatenate ((
+            1.1 * numpy.random.random (10000) - 0.05,
+            steps, numpy.nextafter (steps, 0.0), numpy.nextafter (steps, 2.0),
+            [0.0, -1.0, 10.0]))
+        expected = numpy.clip (numpy.rint (max_value * colormodels.display_from_linear_component (x)), 0, max_value)
+        codes = colormodels.display_codes_from_linear (x, dtype)
+        self.assertEqual(codes.dtype, numpy.dtype (dtype))
+        num_wrong = numpy.count_nonzero (codes != expected)
+        msg = '%s: %d values, %d wrong' % (numpy.dtype (dtype).name, len (x), num_wrong)
+        if verbose:
+            print (msg)
+        self.assertEqual(num_wrong, 0, msg)
+        # The public thresholds give the same codes.
+        public_thresholds = colormodels.gamma_encode_thresholds (dtype)
+        self.assertFalse(public_thresholds.flags.writeable)
+        self.assertEqual(len (public_thresholds), max_value)
+        self.assertTrue(numpy.array_equal (numpy.searchsorted (public_thresholds, x, side='right'), expected))
+
+    def check_gamma_decode_table(self, verbose):
+        ''' Check the decoding lookup tables against the gamma function. '''
+        for dtype in [numpy.uint8, numpy.uint16]:
+            max_value = numpy.iinfo (dtype).max
+            codes = numpy.arange (0, max_value + 1, 7).astype (dtype)
+            linear = colormodels.linear_from_display_codes (codes, dtype)
+            for (code, value) in zip (codes, linear):
+                self.assertEqual(value, colormodels.linear_from_display_component (float (code) / float (max_value)))
+        # rgb_from_irgb() uses the table for the usual irgb colors
+        irgbs = numpy.random.randint (0, 256, (20, 3))
+        for irgb in irgbs:
+            rgb = colormodels.rgb_from_irgb (irgb)
+            for index in range (3):
+                self.assertEqual(rgb [index], colormodels.linear_from_display_component (float (irgb [index]) / 255.0))
+        self.assertTrue(numpy.array_equal (colormodels.rgb_from_irgb (irgbs), colormodels.linear_from_display_codes (irgbs)))
+        # empty batches, and batches with values outside 0 - 255
+        empty = colormodels.rgb_from_irgb (numpy.zeros ((0, 3), int))
+        self.assertEqual(empty.shape, (0, 3))
+        wide = numpy.array ([[0, 128, 300], [-10, 255, 0]])
+        rgb = colormodels.rgb_from_irgb (wide)
+        self.assertEqual(rgb.shape, (2, 3))
+        for (irgb, rgb_i) in zip (wide, rgb):
+            for index in range (3):
+                self.assertAlmostEqual(rgb_i [index], colormodels.linear_from_display_component (float (irgb [index]) / 255.0), delta=1.0e-15)
+        self.assertEqual(colormodels.rgb_from_irgb (wide, numpy.float32).dtype, numpy.float32)
+        if verbose:
+            print ('irgb: %s    rgb: %s' % (str (irgbs [0]), str (colormodels.rgb_from_irgb (irgbs [0]))))
+
+    def test_gamma_tables(self, verbose=False):
+        ''' Test the gamma correction lookup tables, for several gamma functions. '''
+        settings = [
+            (colormodels.srgb_gamma_invert, colormodels.srgb_gamma_correct, colormodels.STANDARD_GAMMA),
+            (colormodels.simple_gamma_invert, colormodels.simple_gamma_correct, 0.5),
+            (colormodels.simple_gamma_invert, colormodels.simple_gamma_correct, colormodels.POYNTON_GAMMA),
+        ]
+        try:
+            for (display_from_linear, linear_from_display, gamma) in settings:
+                colormodels.init_gamma_correction (display_from_linear, linear_from_display, gamma)
+                self.assertTrue(colormodels.has_gamma_encode_table())
+                self.check_gamma_encode_table (numpy.uint8, verbose)
+                self.check_gamma_encode_table (numpy.uint16, verbose)
+                self.check_gamma_decode_table (verbose)
+        finally:
+            colormodels.init_gamma_correction()
+
     # Conversions between standard device independent color space (CIE XYZ)
     # and the almost perceptually uniform space Luv.
 
@@ -329,6 +500,50 @@ class TestColormodels(unittest.TestCase):
             xyz0 = colormodels.xyz_color (x0, y0, z0)
             self.check_xyz_lab(xyz0, verbose)
 
+    def check_uniform_arrays(self, from_xyz, xyz_from, verbose):
+        ''' Check that the Luv/Lab conversions of an array match the conversions of each color. '''
+        # Include black, and values on both sides of the luminance cutoff.
+        xyzs = numpy.random.random ((3, 7, 3))
+        xyzs [0] *= 0.01
+        xyzs [1] *= 10.0
+        xyzs [2, 0] = 0.0
+        uniform = from_xyz (xyzs)
+        xyzs2 = xyz_from (uniform)
+        self.assertEqual(uniform.shape, xyzs.shape)
+        self.assertEqual(xyzs2.shape, xyzs.shape)
+        for index in numpy.ndindex (xyzs.shape [:-1]):
+            uniform_i = from_xyz (xyzs [index])
+            xyz_i = xyz_from (uniform_i)
+            msg = 'xyz: %s    uniform: %s    array uniform: %s' % (
+                str (xyzs [index]), str (uniform_i), str (uniform [index]))
+            if verbose:
+                print (msg)
+            self.assertTrue(numpy.allclose (uniform [index], uniform_i, rtol=1.0e-12, atol=1.0e-12), msg)
+            self.assertTrue(numpy.allclose (xyzs2 [index], xyz_i, rtol=1.0e-12, atol=1.0e-12), msg)
+        self.assertTrue(numpy.allclose (xyzs2, xyzs, rtol=1.0e-10, atol=1.0e-10))
+        self.assertTrue(numpy.array_equal (xyzs2 [2, 0], numpy.zeros (3)))
+
+    def test_xyz_luv_arrays(self, verbose=False):
+        ''' Test luv_from_xyz() and xyz_from_luv() on arrays of colors. '''
+        self.check_uniform_arrays (colormodels.luv_from_xyz, colormodels.xyz_from_luv, verbose)
+
+    def test_xyz_lab_arrays(self, verbose=False):
+        ''' Test lab_from_xyz() and xyz_from_lab() on arrays of colors. '''
+        self.check_uniform_arrays (colormodels.lab_from_xyz, colormodels.xyz_from_lab, verbose)
+
+    def test_scalar_results(self, verbose=False):
+        ''' The Luv/Lab utility functions still return floats for single values. '''
+        values = [
+            colormodels.L_luminance (0.5),
+            colormodels.L_luminance_inverse (50.0),
+            colormodels.Lab_f (0.001),
+            colormodels.Lab_f_inverse (0.5),
+        ] + list (colormodels.uv_primes (colormodels.xyz_color (0.0, 0.0, 0.0)))
+        if verbose:
+            print (values)
+        for value in values:
+            self.assertTrue(isinstance (value, float))
+
     # Luminance function [of Y value of an XYZ color] used in Luv and Lab.
 
     def check_L_luminance_inverse_1(self, y0, verbose):
@@ -504,6 +719,121 @@ class TestColormodels(unittest.TestCase):
         # Test black explicitly.
         self.check_uv_primes_inverse_2(0.0, 0.0, 0.0, verbose)
 
+    # Color spaces.
+
+    def test_color_space_cache(self, verbose=False):
+        ''' Test that color_space() returns the same object for the same settings, and that it cannot be changed. '''
+        space = colormodels.color_space()
+        self.assertTrue(colormodels.color_space() is space)
+        # Equal settings, but different arrays, still find the same space.
+        self.assertTrue(colormodels.color_space (phosphor_red = colormodels.SRGB_Red.copy()) is space)
+        self.assertTrue(space.replace (gamma = colormodels.STANDARD_GAMMA) is space)
+        smpte = space.replace (phosphor_red = colormodels.SMPTE_Red)
+        self.assertFalse(smpte is space)
+        self.assertTrue(smpte.replace (phosphor_red = colormodels.SRGB_Red) is space)
+        if verbose:
+            print (str (smpte))
+        with self.assertRaises(AttributeError):
+            space.gamma = 1.0
+        with self.assertRaises(ValueError):
+            space.rgb_from_xyz_matrix [0, 0] = 1.0
+        with self.assertRaises(ValueError):
+            space.replace (clip_method = 42)
+        with self.assertRaises(ValueError):
+            space.replace (no_such_setting = 1.0)
+        # Only the most recently used spaces are kept.
+        first = space.replace (gamma = 1.5, display_from_linear_function = colormodels.simple_gamma_invert)
+        for i in range (colormodels.COLOR_SPACE_CACHE_SIZE):
+            space.replace (gamma = 1.6 + 0.01 * i, display_from_linear_function = colormodels.simple_gamma_invert)
+            self.assertTrue(colormodels.color_space() is space)
+        self.assertTrue(colormodels.color_space() is space)
+        self.assertFalse(space.replace (gamma = 1.5, display_from_linear_function = colormodels.simple_gamma_invert) is first)
+
+    def test_color_space_conversions(self, verbose=False):
+        ''' Test that a ColorSpace converts as the module functions do after the same init functions,
+        without changing the module settings. '''
+        xyzs = numpy.random.random ((50, 3))
+        xyzs [0] = 0.0
+        current = colormodels.get_color_space()
+        space = colormodels.color_space (
+            colormodels.SMPTE_Red, colormodels.SMPTE_Green, colormodels.SMPTE_Blue, colormodels.WhiteD65,
+            luv_lab_white_point = colormodels.WhiteA,
+            display_from_linear_function = colormodels.simple_gamma_invert,
+            linear_from_display_function = colormodels.simple_gamma_correct,
+            gamma = colormodels.POYNTON_GAMMA,
+            clip_method = colormodels.CLIP_CLAMP_TO_ZERO)
+        default_irgbs = colormodels.clip_rgb_colors (colormodels.rgb_from_xyz (xyzs)) [0]
+        space_irgbs = space.clip_rgb_colors (space.rgb_from_xyz (xyzs)) [0]
+        space_luvs = space.luv_from_xyz (xyzs)
+        space_labs = space.lab_from_xyz (xyzs)
+        space_irgb = space.irgb_from_xyz (xyzs [1])
+        # The module settings are not changed by using the space.
+        self.assertTrue(colormodels.get_color_space() is current)
+        try:
+            colormodels.init (colormodels.SMPTE_Red, colormodels.SMPTE_Green, colormodels.SMPTE_Blue, colormodels.WhiteD65)
+            colormodels.init_Luv_Lab_white_point (colormodels.WhiteA)
+            colormodels.init_gamma_correction (
+                colormodels.simple_gamma_invert, colormodels.simple_gamma_correct, colormodels.POYNTON_GAMMA)
+            colormodels.init_clipping (colormodels.CLIP_CLAMP_TO_ZERO)
+            self.assertTrue(colormodels.get_color_space() is space)
+            self.assertEqual(colormodels.gamma_exponent, colormodels.POYNTON_GAMMA)
+            self.assertTrue(numpy.array_equal (colormodels.rgb_from_xyz_matrix, space.rgb_from_xyz_matrix))
+            self.assertTrue(numpy.array_equal (colormodels.clip_rgb_colors (colormodels.rgb_from_xyz (xyzs)) [0], space_irgbs))
+            self.assertTrue(numpy.array_equal (colormodels.luv_from_xyz (xyzs), space_luvs))
+            self.assertTrue(numpy.array_equal (colormodels.lab_from_xyz (xyzs), space_labs))
+            self.assertTrue(numpy.array_equal (colormodels.irgb_from_xyz (xyzs [1]), space_irgb))
+        finally:
+            colormodels.set_color_space (current)
+        self.assertTrue(numpy.array_equal (colormodels.clip_rgb_colors (colormodels.rgb_from_xyz (xyzs)) [0], default_irgbs))
+        msg = 'xyz: %s    default irgb: %s    space irgb: %s' % (str (xyzs [1]), str (default_irgbs [1]), str (space_irgbs [1]))
+        if verbose:
+            print (msg)
+
+    def test_float_types(self, verbose=False):
+        ''' Test that the conversions keep float32 colors as float32, with results close to float64. '''
+        xyzs = numpy.random.random ((20, 30, 3))
+        xyzs32 = xyzs.astype (numpy.float32)
+        for (to, back) in [
+            (colormodels.rgb_from_xyz, colormodels.xyz_from_rgb),
+            (colormodels.luv_from_xyz, colormodels.xyz_from_luv),
+            (colormodels.lab_from_xyz, colormodels.xyz_from_lab)]:
+            colors64 = to (xyzs)
+            colors32 = to (xyzs32)
+            self.assertEqual(colors64.dtype, numpy.float64)
+            self.assertEqual(colors32.dtype, numpy.float32)
+            err = numpy.max (numpy.abs (colors32 - colors64))
+            if verbose:
+                print ('%s: float32 max error %g' % (to.__name__, err))
+            self.assertLess(err, 1.0e-3)
+            self.assertEqual(back (colors32).dtype, numpy.float32)
+            self.assertTrue(numpy.allclose (back (colors32), xyzs, atol=1.0e-4))
+            # The type can be chosen for each call, and single colors keep their type too.
+            self.assertEqual(to (xyzs, dtype=numpy.float32).dtype, numpy.float32)
+            self.assertEqual(to (xyzs32 [0, 0]).dtype, numpy.float32)
+        self.assertEqual(colormodels.brightest_rgb_from_xyz (xyzs32).dtype, numpy.float32)
+        self.assertEqual(colormodels.rgb_from_irgb (colormodels.irgb_color (10, 100, 200), numpy.float32).dtype, numpy.float32)
+        # The display codes of float32 colors are the same, except very close to a rounding boundary.
+        rgbs = colormodels.rgb_from_xyz (xyzs)
+        irgbs64 = colormodels.clip_rgb_colors (rgbs) [0]
+        irgbs32 = colormodels.clip_rgb_colors (rgbs.astype (numpy.float32)) [0]
+        self.assertLessEqual(numpy.max (numpy.abs (irgbs64.astype (int) - irgbs32)), 1)
+        # The default type is used for new colors.
+        self.assertEqual(colormodels.xyz_color (0.3, 0.3).dtype, numpy.float64)
+        colormodels.init_float_type (numpy.float32)
+        try:
+            self.assertEqual(colormodels.get_float_type(), numpy.float32)
+            self.assertEqual(colormodels.xyz_color (0.3, 0.3).dtype, numpy.float32)
+            self.assertEqual(colormodels.rgb_from_xyz ([0.3, 0.3, 0.4]).dtype, numpy.float32)
+            # but float64 arrays stay float64
+            self.assertEqual(colormodels.lab_from_xyz (xyzs).dtype, numpy.float64)
+            self.assertEqual(colormodels.lab_color (50.0, 0.0, 0.0, dtype=numpy.float64).dtype, numpy.float64)
+        finally:
+            colormodels.init_float_type()
+        with self.assertRaises(ValueError):
+            colormodels.init_float_type (numpy.float16)
+        with self.assertRaises(ValueError):
+            colormodels.rgb_color (1.0, 0.0, 0.0, dtype=int)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,65 @@
+'''
+test_datatables.py - Test module for datatables.py.
+
+License:
+
+This file is part of ColorPy.
+
+ColorPy is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+ColorPy is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with ColorPy.  If not, see <http://www.gnu.org/licenses/>.
+'''
+from __future__ import print_function
+
+import unittest
+import numpy
+
+import datatables
+
+
+class TestDataTables(unittest.TestCase):
+    ''' Test cases for the precompiled data tables. '''
+
+    def check_table(self, name, verbose=False):
+        ''' Check that the binary table matches the original text file. '''
+        table = datatables.get_table (name)
+        text_table = datatables.read_text_table (name)
+        msg = '%s: binary shape %s, text shape %s' % (name, str (table.shape), str (text_table.shape))
+        if verbose:
+            print (msg)
+        self.assertEqual(table.dtype, numpy.float64)
+        self.assertTrue(numpy.array_equal(table, text_table), msg)
+        self.assertFalse(table.flags.writeable)
+        # the same table is returned on later calls
+        self.assertTrue(datatables.get_table (name) is table)
+
+    def test_tables(self, verbose=False):
+        ''' Test the tables, both read into memory and memory-mapped. '''
+        names = [datatables.CIEXYZ_1931_TABLE, datatables.ILLUMINANT_D65_TABLE]
+        try:
+            for memory_map in [False, True]:
+                datatables.init (memory_map = memory_map)
+                for name in names:
+                    self.check_table (name, verbose=verbose)
+        finally:
+            datatables.init()
+        self.assertEqual(datatables.get_table (datatables.CIEXYZ_1931_TABLE).shape, (471, 4))
+        self.assertEqual(datatables.get_table (datatables.ILLUMINANT_D65_TABLE).shape, (531, 2))
+
+    def test_invalid_name(self, verbose=False):
+        ''' Unknown table names are rejected. '''
+        with self.assertRaises(ValueError):
+            datatables.get_table ('Illuminanta')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -24,6 +24,7 @@ along with ColorPy.  If not, see <http://www.gnu.org/licenses/>.
 '''
 from __future__ import print_function
 
+import numpy
 import unittest
 
 import illuminants
@@ -56,6 +57,72 @@ class TestIlluminants(unittest.TestCase):
                 print ('Blackbody Illuminant : %g K' % (T))
                 print (str (bb))
 
+    def test_registry(self):
+        ''' Named illuminants are shared and read-only, unless copied. '''
+        D65 = illuminants.get_illuminant ('D65')
+        self.assertFalse(D65.flags.writeable)
+        self.assertIs(illuminants.get_illuminant ('d65'), D65)
+        self.assertIs(illuminants.get_illuminant_D65(), D65)
+        D65_copy = illuminants.get_illuminant ('D65', copy=True)
+        self.assertIsNot(D65_copy, D65)
+        self.assertTrue(D65_copy.flags.writeable)
+        illuminants.scale_illuminant (D65_copy, 2.0)
+        self.assertTrue(numpy.allclose (D65_copy [:,1], 2.0 * D65 [:,1]))
+        # 'A' is a 2856 K blackbody.
+        self.assertIs(illuminants.get_illuminant ('A'), illuminants.get_illuminant ('BB2856'))
+        self.assertIs(illuminants.get_illuminant_A(), illuminants.get_blackbody_illuminant (2856))
+        E = illuminants.get_illuminant ('E')
+        self.assertIs(illuminants.get_constant_illuminant(), E)
+        self.assertTrue(numpy.all (E [:,1] == E [0,1]))
+        self.assertFalse(numpy.allclose (illuminants.get_illuminant ('BB5778'), D65))
+        for name in ['D50', 'BB', 'BB-100', 'BBnan', 'BBhot', '', 65]:
+            self.assertRaises(ValueError, illuminants.get_illuminant, name)
+            self.assertRaises(ValueError, illuminants.illuminant_key, name)
+        self.assertEqual(illuminants.illuminant_key (' a '), illuminants.illuminant_key ('BB2856'))
+        self.assertEqual(illuminants.illuminant_key ('d65'), ('D65', None))
+
+    def test_registry_cache(self):
+        ''' The saved illuminants are bounded, and kept per float type. '''
+        try:
+            illuminants.init_illuminant_cache (2)
+            bb1000 = illuminants.get_illuminant ('BB1000')
+            illuminants.get_illuminant ('BB1000')
+            bb1000_32 = illuminants.get_illuminant ('BB1000', dtype=numpy.float32)
+            self.assertEqual(bb1000_32.dtype, numpy.float32)
+            self.assertEqual(bb1000.dtype, numpy.float64)
+            self.assertEqual(illuminants.illuminant_cache_info(), (1, 2, 2, 2))
+            # the least recently used illuminant is discarded
+            illuminants.get_illuminant ('BB2000')
+            self.assertIsNot(illuminants.get_illuminant ('BB1000'), bb1000)
+            self.assertEqual(illuminants.illuminant_cache_info().currsize, 2)
+            # init() keeps the saved illuminants, clear_illuminant_cache() discards them
+            illuminants.init()
+            self.assertEqual(illuminants.illuminant_cache_info().currsize, 2)
+            illuminants.clear_illuminant_cache()
+            self.assertEqual(illuminants.illuminant_cache_info(), (0, 0, 2, 0))
+            self.assertRaises(ValueError, illuminants.init_illuminant_cache, -1)
+        finally:
+            illuminants.init_illuminant_cache()
+
+    def test_display_intensity(self, verbose=False):
+        ''' The saved illuminants stay normalized when the display intensity changes. '''
+        ciexyz = illuminants.ciexyz
+        names = ['D65', 'A', 'E', 'BB5778']
+        before = [illuminants.get_illuminant (name) for name in names]
+        try:
+            ciexyz.init (2.0 * ciexyz.DEFAULT_DISPLAY_INTENSITY)
+            for (name, illuminant) in zip (names, before):
+                after = illuminants.get_illuminant (name)
+                Y = ciexyz.xyz_from_spectrum (after) [1]
+                if verbose:
+                    print ('%s: Y = %g' % (name, Y))
+                self.assertIsNot(after, illuminant)
+                self.assertAlmostEqual(Y, 1.0, delta=1.0e-12)
+        finally:
+            ciexyz.init()
+        # The illuminants for the original intensity are still saved.
+        self.assertIs(illuminants.get_illuminant ('A'), before [1])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,42 @@
+'''
+test_imports.py - Test that the color calculations import without the plotting modules.
+
+License:
+
+This file is part of ColorPy.
+
+ColorPy is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+ColorPy is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with ColorPy.  If not, see <http://www.gnu.org/licenses/>.
+'''
+from __future__ import print_function
+
+import unittest
+
+import benchmarks
+
+
+class TestImports(unittest.TestCase):
+    ''' Test cases for the imports of the core modules. '''
+
+    def test_no_heavy_imports(self, verbose=False):
+        ''' The core modules must not import matplotlib or scipy. '''
+        results = benchmarks.import_benchmarks (repeat = 1)
+        if verbose:
+            benchmarks.print_import_benchmarks (results)
+        for (module_name, seconds, heavy) in results:
+            msg = 'importing %s loaded %s' % (module_name, ', '.join (heavy))
+            self.assertEqual(heavy, [], msg)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+'''
+test_irgbtables.py - Test module for irgbtables.py.
+
+License:
+
+This file is part of ColorPy.
+
+ColorPy is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+ColorPy is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with ColorPy.  If not, see <http://www.gnu.org/licenses/>.
+'''
+from __future__ import print_function
+
+import os, shutil, tempfile
+import unittest
+import numpy
+
+import irgbtables
+
+# the colormodels module that irgbtables uses
+colormodels = irgbtables.colormodels
+
+
+class TestIrgbTables(unittest.TestCase):
+    ''' Test cases for the tables of the colors of all irgb colors. '''
+
+    def test_table_digest(self, verbose=False):
+        ''' Test that the digest changes with the settings that the table depends on. '''
+        space = colormodels.color_space()
+        digest = irgbtables.table_digest (irgbtables.LAB_TABLE, space)
+        if verbose:
+            print ('sRGB Lab table digest: %s' % digest)
+        self.assertEqual(digest, irgbtables.table_digest (irgbtables.LAB_TABLE, space))
+        self.assertNotEqual(digest, irgbtables.table_digest (irgbtables.XYZ_TABLE, space))
+        # The clipping method does not matter, but the others do.
+        self.assertEqual(digest, irgbtables.table_digest (irgbtables.LAB_TABLE,
+            space.replace (clip_method = colormodels.CLIP_CLAMP_TO_ZERO)))
+        for changes in [
+            dict (phosphor_red = colormodels.SMPTE_Red),
+            dict (luv_lab_white_point = colormodels.WhiteA),
+            dict (display_from_linear_function = colormodels.simple_gamma_invert,
+                  linear_from_display_function = colormodels.simple_gamma_correct)]:
+            self.assertNotEqual(digest, irgbtables.table_digest (irgbtables.LAB_TABLE, space.replace (**changes)))
+        # The Lab white point does not change the xyz table.
+        self.assertEqual(irgbtables.table_digest (irgbtables.XYZ_TABLE, space),
+            irgbtables.table_digest (irgbtables.XYZ_TABLE, space.replace (luv_lab_white_point = colormodels.WhiteA)))
+        with self.assertRaises(ValueError):
+            irgbtables.table_digest ('hsv', space)
+
+    def test_lab_from_irgb(self, verbose=False):
+        ''' Test the Lab table against the exact conversions. '''
+        space = colormodels.color_space()
+        dirname = tempfile.mkdtemp()
+        try:
+            irgbtables.init (dirname, build=False)
+            with self.assertRaises(ValueError):
+                irgbtables.get_table (irgbtables.LAB_TABLE, space, numpy.float16)
+            irgbtables.init (dirname)
+            irgbs = numpy.random.randint (0, 256, (50, 40, 3)).astype (numpy.uint8)
+            irgbs [0, 0] = [0, 0, 0]
+            irgbs [0, 1] = [255, 255, 255]
+            labs = irgbtables.lab_from_irgb (irgbs, space, numpy.float16)
+            self.assertTrue(os.path.exists (irgbtables.table_filename (irgbtables.LAB_TABLE, space, numpy.float16)))
+            self.assertEqual(labs.shape, irgbs.shape)
+            self.assertEqual(labs.dtype, numpy.float16)
+            expected = space.lab_from_xyz (space.xyz_from_rgb (space.rgb_from_irgb (irgbs)))
+            err = numpy.max (numpy.abs (labs - expected))
+            if verbose:
+                print ('float16 Lab table max error: %g' % err)
+            self.assertLess(err, 0.07)
+            # The table is loaded once, and is read-only.
+            table = irgbtables.get_table (irgbtables.LAB_TABLE, space, numpy.float16)
+            self.assertTrue(table is irgbtables.get_table (irgbtables.LAB_TABLE, space, numpy.float16))
+            self.assertFalse(table.flags.writeable)
+            # Other integer types are fine, if in range.
+            for int_type in [int, numpy.uint16, numpy.uint64]:
+                self.assertTrue(numpy.array_equal (irgbtables.lab_from_irgb (irgbs.astype (int_type), space, numpy.float16), labs))
+            with self.assertRaises(ValueError):
+                irgbtables.lab_from_irgb (numpy.array ([[0, 256, 0]]), space, numpy.float16)
+            with self.assertRaises(ValueError):
+                irgbtables.lab_from_irgb (irgbs, space, numpy.float64)
+        finally:
+            irgbtables.init()
+            shutil.rmtree (dirname)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+'''
+test_lut3d.py - Test module for lut3d.py.
+
+License:
+
+This file is part of ColorPy.
+
+ColorPy is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+ColorPy is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with ColorPy.  If not, see <http://www.gnu.org/licenses/>.
+'''
+from __future__ import print_function
+
+import os, shutil, tempfile
+import unittest
+import numpy
+
+import lut3d
+
+methods = [lut3d.INTERPOLATE_TRILINEAR, lut3d.INTERPOLATE_TETRAHEDRAL]
+
+
+class TestLut3D(unittest.TestCase):
+    ''' Test cases for the 3D lookup tables. '''
+
+    def test_interpolation(self, verbose=False):
+        ''' Test that both interpolations are exact for an affine function, and at the grid points. '''
+        matrix = numpy.random.random ((4, 3))
+        offset = numpy.random.random (4)
+        def affine (colors):
+            return numpy.matmul (colors, matrix.T) + offset
+        lut = lut3d.build_lut (affine, 5, (-1.0, 0.0, 2.0), (1.0, 3.0, 2.5))
+        self.assertEqual(lut.table.shape, (5, 5, 5, 4))
+        colors = lut.domain_min + (lut.domain_max - lut.domain_min) * numpy.random.random ((6, 7, 3))
+        for method in methods:
+            values = lut.evaluate (colors, method)
+            self.assertEqual(values.shape, (6, 7, 4))
+            err = numpy.max (numpy.abs (values - affine (colors)))
+            if verbose:
+                print ('method %d: max error %g' % (method, err))
+            self.assertLess(err, 1.0e-12)
+        # Any function is exact at the grid points.
+        def curved (colors):
+            return numpy.sin (colors * 3.0)
+        lut = lut3d.build_lut (curved, 9)
+        grid = numpy.stack (numpy.meshgrid (*([numpy.linspace (0.0, 1.0, 9)] * 3), indexing='ij'), axis=-1)
+        for method in methods:
+            self.assertTrue(numpy.allclose (lut.evaluate (grid, method), curved (grid), rtol=0.0, atol=1.0e-12))
+        # Colors outside the domain are clamped to it.
+        outside = numpy.array ([[-1.0, 0.5, 2.0]])
+        clamped = numpy.array ([[0.0, 0.5, 1.0]])
+        for method in methods:
+            self.assertTrue(numpy.allclose (lut.evaluate (outside, method), curved (clamped), atol=1.0e-12))
+        with self.assertRaises(ValueError):
+            lut.evaluate (outside, 42)
+
+    def test_save_load(self, verbose=False):
+        ''' Test saving and loading the tables as .npy and .cube files. '''
+        lut = lut3d.build_lut (lambda colors: numpy.sqrt (colors), 7, (0.0, 0.0, 0.0), (1.0, 2.0, 4.0), 'sqrt')
+        dirname = tempfile.mkdtemp()
+        try:
+            for (extension, tolerance) in [('.npy', 0.0), ('.cube', 1.0e-9)]:
+                filename = os.path.join (dirname, 'test' + extension)
+                lut.save (filename)
+                loaded = lut3d.load_lut (filename)
+                if verbose:
+                    print ('%s: %s  %s - %s' % (extension, str (loaded.table.shape), str (loaded.domain_min), str (loaded.domain_max)))
+                self.assertEqual(loaded.table.shape, lut.table.shape)
+                self.assertTrue(numpy.allclose (loaded.table, lut.table, rtol=tolerance, atol=tolerance))
+                self.assertTrue(numpy.array_equal (loaded.domain_min, lut.domain_min))
+                self.assertTrue(numpy.array_equal (loaded.domain_max, lut.domain_max))
+                self.assertEqual(loaded.title, 'sqrt')
+            # An untitled table stays untitled.
+            filename = os.path.join (dirname, 'untitled.npy')
+            lut3d.Lut3D (lut.table).save (filename)
+            self.assertEqual(lut3d.load_lut (filename).title, '')
+            with self.assertRaises(ValueError):
+                lut.save (os.path.join (dirname, 'test.txt'))
+        finally:
+            shutil.rmtree (dirname)
+
+    def test_error_report(self, verbose=False):
+        ''' Test the standard tables against the exact conversions. '''
+        for (build, function) in [
+            (lut3d.build_xyz_lut, lut3d.display_rgb_from_xyz()),
+            (lut3d.build_lab_lut, lut3d.display_rgb_from_lab())]:
+            means = []
+            for size in [17, 33]:
+                lut = build (size)
+                report = lut3d.error_report (lut, function, num_samples=10000)
+                if verbose:
+                    lut3d.print_error_report (report, '%s %d' % (lut.title, size))
+                self.assertEqual(report ['num_samples'], 10000 + (size - 1) ** 3)
+                self.assertTrue(report ['mean'] <= report ['p99'] <= report ['max'])
+                means.append (report ['mean'])
+            # A larger table is more accurate, and accurate to about one display code.
+            self.assertLess(means [1], means [0])
+            self.assertLess(means [1], 2.0)
+        # Display codes from the table.
+        lut = lut3d.build_xyz_lut (17)
+        irgbs = lut.evaluate_irgb (numpy.array ([[0.0, 0.0, 0.0], lut.domain_max]))
+        self.assertEqual(irgbs.dtype, numpy.uint8)
+        self.assertTrue(numpy.array_equal (irgbs, [[0, 0, 0], [255, 255, 255]]))
+
+
+if __name__ == '__main__':
+    unittest.main()
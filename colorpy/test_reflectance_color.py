@@ -0,0 +1,112 @@
+'''
+test_reflectance_color.py - Test module for reflectance_color.py.
+
+License:
+
+This file is part of ColorPy.
+
+ColorPy is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+ColorPy is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with ColorPy.  If not, see <http://www.gnu.org/licenses/>.
+'''
+from __future__ import print_function
+
+import numpy
+import unittest
+
+import ciexyz
+import illuminants
+import reflectance_color
+
+
+class TestReflectanceColor(unittest.TestCase):
+    ''' Test cases for colors from reflectance spectra. '''
+
+    def test_weighting_table_1nm(self, verbose=False):
+        ''' At 1 nm increments, the weighting table matches multiplying by the illuminant. '''
+        wl_nm = numpy.arange (360.0, 831.0)
+        refl = numpy.random.random (len (wl_nm))
+        spectrum = illuminants.get_illuminant_D65 (copy=True)
+        spectrum [:,1] *= refl
+        xyz0 = ciexyz.xyz_from_spectrum (spectrum)
+        xyz1 = reflectance_color.xyz_from_refl (refl, wl_nm)
+        msg = 'xyz from spectrum: %s    xyz from weights: %s' % (str (xyz0), str (xyz1))
+        if verbose:
+            print (msg)
+        self.assertTrue(numpy.allclose (xyz0, xyz1, rtol=1.0e-10))
+
+    def test_weighting_table_coarse(self, verbose=False):
+        ''' Coarse weighting tables match 1 nm tables for reflectances linear between the samples. '''
+        wl_nm = numpy.arange (360.0, 831.0)
+        for step in [10.0, 20.0]:
+            coarse_wl_nm = numpy.arange (380.0, 781.0, step)
+            coarse_refl = numpy.random.random ((5, len (coarse_wl_nm)))
+            refl = numpy.array ([numpy.interp (wl_nm, coarse_wl_nm, r, left=0.0, right=0.0) for r in coarse_refl])
+            xyz0 = reflectance_color.xyz_from_refl (refl, wl_nm)
+            xyz1 = reflectance_color.xyz_from_refl (coarse_refl, coarse_wl_nm)
+            if verbose:
+                print ('%g nm: %s    %s' % (step, str (xyz0), str (xyz1)))
+            self.assertEqual(xyz1.shape, (5, 3))
+            self.assertTrue(numpy.allclose (xyz0, xyz1, rtol=1.0e-10))
+
+    def test_bandpass_correction(self, verbose=False):
+        ''' Bandpass correction does not change the color of a constant reflectance. '''
+        wl_nm = numpy.arange (400.0, 701.0, 10.0)
+        refl = 0.5 * numpy.ones (len (wl_nm))
+        xyz0 = reflectance_color.xyz_from_refl (refl, wl_nm)
+        xyz1 = reflectance_color.xyz_from_refl (refl, wl_nm, bandpass_correction=True)
+        if verbose:
+            print ('uncorrected: %s    corrected: %s' % (str (xyz0), str (xyz1)))
+        self.assertTrue(numpy.allclose (xyz0, xyz1, rtol=1.0e-12))
+        # But does change a varying reflectance.
+        refl = numpy.linspace (0.0, 1.0, len (wl_nm)) ** 2
+        xyz0 = reflectance_color.xyz_from_refl (refl, wl_nm)
+        xyz1 = reflectance_color.xyz_from_refl (refl, wl_nm, bandpass_correction=True)
+        self.assertFalse(numpy.allclose (xyz0, xyz1, rtol=1.0e-6))
+
+    def test_weighting_table_cache(self):
+        ''' Weighting tables are shared and read-only. '''
+        wl_nm = numpy.arange (400.0, 701.0, 20.0)
+        table0 = reflectance_color.weighting_table (wl_nm)
+        table1 = reflectance_color.weighting_table (wl_nm.copy())
+        self.assertIs(table0, table1)
+        self.assertFalse(table0.flags.writeable)
+        # A perfect reflector over the full range has Y = 1.0.
+        table = reflectance_color.weighting_table (numpy.arange (360.0, 831.0, 10.0))
+        self.assertAlmostEqual(numpy.sum (table [:,1]), 1.0, delta=1.0e-12)
+        self.assertRaises(ValueError, reflectance_color.weighting_table, wl_nm, 'NoSuchIlluminant')
+        # Equivalent illuminant names share the table.
+        self.assertIs(reflectance_color.weighting_table (wl_nm, 'd65'), table0)
+        self.assertIs(reflectance_color.weighting_table (wl_nm, ' D65 '), table0)
+
+    def test_color_from_refl(self, verbose=False):
+        ''' Colors of grey reflectances. '''
+        for value in [0.0, 0.5, 1.0]:
+            refl = value * numpy.ones (471)
+            color = reflectance_color.color_from_refl (refl)
+            if verbose:
+                print ('reflectance %g: %s' % (value, str (color)))
+            self.assertAlmostEqual(color ['xyz'][1], value, delta=1.0e-12)
+
+    def test_color_from_refl_illuminants(self):
+        ''' Colors under illuminants other than D65. '''
+        refl = 0.5 * numpy.ones (471)
+        xyz_D65 = reflectance_color.color_from_refl (refl) ['xyz']
+        for name in ['A', 'E', 'BB5778']:
+            xyz = reflectance_color.color_from_refl (refl, illuminant_name=name) ['xyz']
+            self.assertAlmostEqual(xyz [1], 0.5, delta=1.0e-12)
+            self.assertFalse(numpy.allclose (xyz, xyz_D65))
+        self.assertRaises(ValueError, reflectance_color.color_from_refl, refl, illuminant_name='D50')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+'''
+test_rgbspaces.py - Test module for rgbspaces.py.
+
+License:
+
+This file is part of ColorPy.
+
+ColorPy is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+ColorPy is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with ColorPy.  If not, see <http://www.gnu.org/licenses/>.
+'''
+from __future__ import print_function
+
+import unittest
+import numpy
+
+import rgbspaces
+
+# the colormodels module that rgbspaces uses
+colormodels = rgbspaces.colormodels
+
+
+class TestRgbSpaces(unittest.TestCase):
+    ''' Test cases for the named rgb spaces and conversions between them. '''
+
+    def check_rgb_space(self, name, verbose):
+        ''' Check that the space converts full white to its white point. '''
+        space = rgbspaces.rgb_space (name)
+        white = space.xyz_from_rgb (numpy.ones (3))
+        expected = colormodels.xyz_normalize_Y1 (space.white_point.copy())
+        msg = '%s: white %s, expected %s' % (name, str (white), str (expected))
+        if verbose:
+            print (msg)
+        self.assertTrue(numpy.allclose (white, expected, rtol=1.0e-12, atol=1.0e-12), msg)
+        eye = numpy.dot (space.rgb_from_xyz_matrix, space.xyz_from_rgb_matrix)
+        self.assertTrue(numpy.allclose (eye, numpy.eye (3), atol=1.0e-12))
+
+    def test_rgb_spaces(self, verbose=False):
+        ''' Test all the registered spaces. '''
+        names = rgbspaces.rgb_space_names()
+        for name in ['sRGB', 'HDTV', 'SMPTE', 'NTSC', 'DisplayP3', 'AdobeRGB', 'Rec2020']:
+            self.assertTrue(name in names)
+        for name in names:
+            self.check_rgb_space (name, verbose)
+        # sRGB is the ColorPy default.
+        self.assertTrue(rgbspaces.rgb_space ('sRGB') is colormodels.color_space())
+        with self.assertRaises(ValueError):
+            rgbspaces.rgb_space ('NoSuchSpace')
+
+    def test_rgb_from_rgb(self, verbose=False):
+        ''' Test that the direct rgb conversions match going through xyz. '''
+        rgbs = numpy.random.random ((10, 20, 3))
+        names = rgbspaces.rgb_space_names()
+        for source_name in names:
+            for target_name in names:
+                source = rgbspaces.rgb_space (source_name)
+                target = rgbspaces.rgb_space (target_name)
+                expected = target.rgb_from_xyz (source.xyz_from_rgb (rgbs))
+                converted = rgbspaces.rgb_from_rgb (rgbs, source_name, target_name)
+                self.assertTrue(numpy.allclose (converted, expected, rtol=1.0e-12, atol=1.0e-12))
+        # The matrix is calculated once, and can be used by name or by space.
+        matrix = rgbspaces.rgb_from_rgb_matrix ('sRGB', 'DisplayP3')
+        self.assertTrue(rgbspaces.rgb_from_rgb_matrix (rgbspaces.rgb_space ('sRGB'), 'DisplayP3') is matrix)
+        self.assertTrue(numpy.allclose (rgbspaces.rgb_from_rgb_matrix ('sRGB', 'sRGB'), numpy.eye (3), atol=1.0e-12))
+        out = numpy.empty_like (rgbs)
+        self.assertTrue(rgbspaces.rgb_from_rgb (rgbs, 'sRGB', 'Rec2020', out=out) is out)
+        if verbose:
+            print ('sRGB to DisplayP3:\n%s' % str (matrix))
+
+    def test_irgb_from_irgb(self, verbose=False):
+        ''' Test the conversions of displayable colors, against the separate conversion steps. '''
+        num_colors = rgbspaces.IRGB_FROM_IRGB_CHUNK_SIZE + 100
+        for dtype in [numpy.uint8, numpy.uint16]:
+            max_value = numpy.iinfo (dtype).max
+            irgbs = numpy.random.randint (0, max_value + 1, (num_colors, 3)).astype (dtype)
+            for (source_name, target_name) in [('sRGB', 'DisplayP3'), ('Rec2020', 'sRGB'), ('AdobeRGB', 'NTSC')]:
+                source = rgbspaces.rgb_space (source_name)
+                target = rgbspaces.rgb_space (target_name)
+                rgbs = rgbspaces.rgb_from_rgb (source.linear_from_display_codes (irgbs, dtype), source, target)
+                (expected, clipped_chrom, clipped_int) = target.clip_rgb_colors (rgbs, dtype)
+                converted = rgbspaces.irgb_from_irgb (irgbs, source_name, target_name, dtype)
+                msg = '%s: %s to %s, %d clipped' % (
+                    numpy.dtype (dtype).name, source_name, target_name, numpy.count_nonzero (clipped_chrom | clipped_int))
+                if verbose:
+                    print (msg)
+                self.assertEqual(converted.dtype, numpy.dtype (dtype))
+                self.assertTrue(numpy.array_equal (converted, expected), msg)
+            # Converting to the same space gives back the same colors.
+            same = rgbspaces.irgb_from_irgb (irgbs, 'sRGB', 'sRGB', dtype)
+            self.assertTrue(numpy.array_equal (same, irgbs))
+        # The result can be written into a supplied (even non-contiguous) array.
+        irgbs = numpy.random.randint (0, 256, (4, 5, 3)).astype (numpy.uint8)
+        out = numpy.zeros ((3, 5, 4), numpy.uint8).T
+        result = rgbspaces.irgb_from_irgb (irgbs, 'DisplayP3', 'sRGB', out=out)
+        self.assertTrue(result is out)
+        self.assertTrue(numpy.array_equal (out, rgbspaces.irgb_from_irgb (irgbs, 'DisplayP3', 'sRGB')))
+
+    def test_register_rgb_space(self, verbose=False):
+        ''' Test adding a space. '''
+        space = rgbspaces.register_rgb_space ('TestSMPTE_A',
+            colormodels.SMPTE_Red, colormodels.SMPTE_Green, colormodels.SMPTE_Blue, colormodels.WhiteA)
+        try:
+            self.assertTrue(rgbspaces.rgb_space ('TestSMPTE_A') is space)
+            self.check_rgb_space ('TestSMPTE_A', verbose)
+        finally:
+            del rgbspaces._rgb_spaces ['TestSMPTE_A']
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+'''
+test_scalarcolors.py - Test module for scalarcolors.py.
+
+License:
+
+This file is part of ColorPy.
+
+ColorPy is free software: you can redistribute it and/or modify
+it under the terms of the GNU Lesser General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+ColorPy is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public License
+along with ColorPy.  If not, see <http://www.gnu.org/licenses/>.
+'''
+from __future__ import print_function
+
+import unittest
+import numpy
+
+import scalarcolors
+
+# the colormodels module that scalarcolors uses
+colormodels = scalarcolors.colormodels
+
+
+class TestScalarColors(unittest.TestCase):
+    ''' Test cases for the single color conversions. '''
+
+    def check_spaces(self):
+        ''' Get the ColorSpaces to test, with each gamma and clipping method. '''
+        space = colormodels.color_space()
+        return [
+            space,
+            space.replace (clip_method = colormodels.CLIP_CLAMP_TO_ZERO),
+            space.replace (
+                display_from_linear_function = colormodels.simple_gamma_invert,
+                linear_from_display_function = colormodels.simple_gamma_correct),
+            space.replace (
+                display_from_linear_function = lambda x: numpy.sqrt (numpy.maximum (x, 0.0)),
+                linear_from_display_function = lambda x: numpy.square (x))]
+
+    def test_rgb_irgb(self, verbose=False):
+        ''' Test that the scalar rgb and irgb conversions match the array functions. '''
+        rgbs = numpy.random.uniform (-0.5, 1.5, (200, 3))
+        rgbs [0] = [0.0, 0.0, 0.0]
+        rgbs [1] = [1.0, 1.0, 1.0]
+        for space in self.check_spaces():
+            for rgb in rgbs:
+                irgb = scalarcolors.irgb_from_rgb (rgb, space)
+                self.assertEqual(irgb, tuple (space.clip_rgb_color (rgb) [0]))
+                self.assertTrue(all (type (i) is int for i in irgb))
+                self.assertEqual(scalarcolors.irgb_string_from_rgb (tuple (rgb), space), colormodels.irgb_string_from_irgb (list (irgb)))
+                back = scalarcolors.rgb_from_irgb (irgb, space)
+                self.assertTrue(numpy.allclose (back, space.rgb_from_irgb (numpy.array (irgb)), rtol=1.0e-12, atol=1.0e-15))
+                xyz = space.xyz_from_rgb (rgb)
+                self.assertTrue(numpy.allclose (scalarcolors.xyz_from_rgb (rgb, space), xyz, rtol=1.0e-12, atol=1.0e-15))
+                self.assertTrue(numpy.allclose (scalarcolors.rgb_from_xyz (xyz, space), space.rgb_from_xyz (xyz), rtol=1.0e-12, atol=1.0e-15))
+                self.assertEqual(scalarcolors.irgb_from_xyz (tuple (xyz), space), tuple (space.irgb_from_xyz (xyz)))
+            if verbose:
+                print ('%s: ok' % repr (space))
+        # The current ColorSpace by default.
+        self.assertEqual(scalarcolors.irgb_from_rgb ((1.0, 0.5, 0.0)), tuple (colormodels.irgb_from_rgb (colormodels.rgb_color (1.0, 0.5, 0.0))))
+
+    def test_hex_strings(self, verbose=False):
+        ''' Test the hex string conversions. '''
+        for irgb in [(0, 0, 0), (255, 255, 255), (171, 19, 210)]:
+            irgb_string = scalarcolors.irgb_string_from_irgb (irgb)
+            if verbose:
+                print ('%s -> %s' % (str (irgb), irgb_string))
+            self.assertEqual(irgb_string, colormodels.irgb_string_from_irgb (list (irgb)))
+            self.assertEqual(scalarcolors.irgb_from_irgb_string (irgb_string), irgb)
+        self.assertEqual(scalarcolors.irgb_from_irgb_string ('#ab13d2'), (171, 19, 210))
+        for bad in ['AB13D2', '#AB13D', '#AB13D2F']:
+            with self.assertRaises(ValueError):
+                scalarcolors.irgb_from_irgb_string (bad)
+
+    def test_lab_luv(self, verbose=False):
+        ''' Test that the scalar Lab and Luv conversions match the array functions. '''
+        space = colormodels.color_space()
+        xyzs = numpy.random.uniform (0.0, 1.0, (200, 3))
+        xyzs [0] = [0.0, 0.0, 0.0]
+        xyzs [1] = [0.001, 0.002, 0.001]
+        for xyz in xyzs:
+            lab = scalarcolors.lab_from_xyz (xyz, space)
+            luv = scalarcolors.luv_from_xyz (xyz, space)
+            self.assertTrue(numpy.allclose (lab, space.lab_from_xyz (xyz), rtol=1.0e-12, atol=1.0e-12))
+            self.assertTrue(numpy.allclose (luv, space.luv_from_xyz (xyz), rtol=1.0e-12, atol=1.0e-12))
+            self.assertTrue(numpy.allclose (scalarcolors.xyz_from_lab (lab, space), xyz, rtol=1.0e-10, atol=1.0e-12))
+            self.assertTrue(numpy.allclose (scalarcolors.xyz_from_luv (luv, space), xyz, rtol=1.0e-10, atol=1.0e-12))
+            if verbose:
+                print ('%s -> Lab %s, Luv %s' % (str (xyz), str (lab), str (luv)))
+
+
+if __name__ == '__main__':
+    unittest.main()
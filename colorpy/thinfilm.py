@@ -87,7 +87,8 @@ import math, cmath, numpy
 import colormodels
 import ciexyz
 import illuminants
-import plots
+
+# The plots module (and matplotlib) is only imported by the figure functions.
 
 class thin_film:
     '''A thin film of dielectric material.'''
@@ -180,6 +181,7 @@ def create_thin_films (n1, n2, n3, thickness_list):
 
 def thinfilm_patch_plot (n1, n2, n3, thickness_nm_list, illuminant, title, filename):
     '''Make a patch plot of the color of the film for each thickness [nm].'''
+    import plots
     films = create_thin_films(n1, n2, n3, thickness_nm_list)
     xyz_colors = []
     labels = []
@@ -192,13 +194,14 @@ def thinfilm_patch_plot (n1, n2, n3, thickness_nm_list, illuminant, title, filen
 
 def thinfilm_color_vs_thickness_plot (n1, n2, n3, thickness_nm_list, illuminant, title, filename):
     '''Plot the color of the thin film for the specfied thicknesses [nm].'''
+    import plots
     films = create_thin_films(n1, n2, n3, thickness_nm_list)
     num_films = len (films)
-    rgb_list = numpy.empty ((num_films, 3))
+    xyz_list = numpy.empty ((num_films, 3))
     for i in range (0, num_films):
         film = films[i]
-        xyz = film.illuminated_color (illuminant)
-        rgb_list [i] = colormodels.rgb_from_xyz (xyz)
+        xyz_list [i] = film.illuminated_color (illuminant)
+    rgb_list = colormodels.rgb_from_xyz (xyz_list)
     plots.color_vs_param_plot (
         thickness_nm_list,
         rgb_list,
@@ -209,6 +212,7 @@ def thinfilm_color_vs_thickness_plot (n1, n2, n3, thickness_nm_list, illuminant,
 
 def thinfilm_spectrum_plot (n1, n2, n3, thickness_nm, illuminant, title, filename):
     '''Plot the spectrum of the reflection from a thin film for the given thickness [nm].'''
+    import plots
     film = thin_film (n1, n2, n3, thickness_nm)
     illuminated_spectrum = film.illuminated_spectrum (illuminant)
     plots.spectrum_plot (
@@ -222,7 +226,7 @@ def figures ():
     '''Draw some thin film plots.'''
     # Simple patch plot. This is not all that interesting.
     thickness_nm_list = numpy.linspace(0.0, 750.0, 36)
-    illuminant = illuminants.get_illuminant_D65()
+    illuminant = illuminants.get_illuminant_D65 (copy=True)
     illuminants.scale_illuminant (illuminant, 9.50)
     thinfilm_patch_plot (1.500, 1.003, 1.500, thickness_nm_list,
         illuminant, 'ThinFilm Patch Plot', 'ThinFilm-Patch')
@@ -231,21 +235,21 @@ def figures ():
     # Scale the illuminant to get a better range of color.
     thickness_nm_list = numpy.linspace(0.0, 1000.0, 800)
     # Gap in glass/plastic.
-    illuminant = illuminants.get_illuminant_D65()
+    illuminant = illuminants.get_illuminant_D65 (copy=True)
     illuminants.scale_illuminant (illuminant, 4.50)
     thinfilm_color_vs_thickness_plot (
         1.500, 1.003, 1.500, thickness_nm_list, illuminant,
         'Thin Film - Gap In Glass/Plastic (n = 1.50)\nIlluminant D65',
         'ThinFilm-GlassGap')
     # Soap bubble.
-    illuminant = illuminants.get_illuminant_D65()
+    illuminant = illuminants.get_illuminant_D65 (copy=True)
     illuminants.scale_illuminant (illuminant, 9.50)
     thinfilm_color_vs_thickness_plot (
         1.003, 1.33, 1.003, thickness_nm_list, illuminant,
         'Thin Film - Soap Bubble (n = 1.33)\nIlluminant D65',
         'ThinFilm-SoapBubble')
     # Oil slick on water.
-    illuminant = illuminants.get_illuminant_D65()
+    illuminant = illuminants.get_illuminant_D65 (copy=True)
     illuminants.scale_illuminant (illuminant, 15.00)
     thinfilm_color_vs_thickness_plot (
         1.003, 1.44, 1.33, thickness_nm_list, illuminant,
@@ -253,7 +257,7 @@ def figures ():
         'ThinFilm-OilSlick')
     # Large index of refraction bubble.
     # This has the brightest colors, but is a bit of an artificial example.
-    illuminant = illuminants.get_illuminant_D65()
+    illuminant = illuminants.get_illuminant_D65 (copy=True)
     illuminants.scale_illuminant (illuminant, 3.33)
     thinfilm_color_vs_thickness_plot (
         1.003, 1.60, 1.003, thickness_nm_list, illuminant,
@@ -263,7 +267,7 @@ def figures ():
     # A very thick film to test the aliasing limits.
     # You have to go to very large thicknesses to get much aliasing.
     thickness_nm_list = numpy.linspace(0.0, 200000.0, 800)
-    illuminant = illuminants.get_illuminant_D65()
+    illuminant = illuminants.get_illuminant_D65 (copy=True)
     illuminants.scale_illuminant (illuminant, 9.50)
     thinfilm_color_vs_thickness_plot (
         1.003, 1.33, 1.003, thickness_nm_list, illuminant,
@@ -273,7 +277,7 @@ def figures ():
     # Plot the spectrum of the refection for a couple of thicknesses.
     # Use a constant illuminant for a cleaner plot.
     # FIXME: Should this really be using an illuminant?
-    illuminant = illuminants.get_constant_illuminant()
+    illuminant = illuminants.get_constant_illuminant (copy=True)
     illuminants.scale_illuminant (illuminant, 9.50)
     thinfilm_spectrum_plot (1.003, 1.33, 1.003, 400.0, illuminant,
         'Thin Film Interference Spectrum - 400 nm thick\nConstant Illuminant',